@@ -9,9 +9,14 @@ import warnings
 
 import click
 
+from .archive import extract
 from .content import generate_content
 from .lookml import lookml
 from .namespaces import namespaces
+from .pipeline import all_command
+from .profile import profile
+from .publish import publish_command
+from .shards import merge_shards
 from .spoke import update_spoke
 
 
@@ -20,8 +25,13 @@ def cli(prog_name=None):
     commands = {
         "namespaces": namespaces,
         "lookml": lookml,
+        "all": all_command,
         "update-spoke": update_spoke,
         "content": generate_content,
+        "merge-shards": merge_shards,
+        "extract": extract,
+        "publish": publish_command,
+        "profile": profile,
     }
 
     @click.group(commands=commands)
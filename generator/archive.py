@@ -0,0 +1,105 @@
+"""Extract an archive of generated LookML, written with `lookml --output-archive`."""
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Iterator, Tuple
+
+import click
+
+from .metrics import metrics_option
+from .tracing import span, trace_option
+
+TAR_MODES = {
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tar.xz": "xz",
+}
+ARCHIVE_SUFFIXES = (*TAR_MODES, ".zip")
+
+
+def _get_format(path: Path) -> str:
+    """Get the archive format from the name of an archive."""
+    for suffix in ARCHIVE_SUFFIXES:
+        if path.name.endswith(suffix):
+            return suffix
+    raise click.ClickException(
+        f"{path} is not an archive, expected one of {', '.join(ARCHIVE_SUFFIXES)}"
+    )
+
+
+def write_archive(source_dir: Path, path: Path):
+    """Write all files in source_dir to an archive in a single pass.
+
+    Entries are sorted by name, so the same files produce the same archive
+    listing regardless of the order they were generated in.
+    """
+    archive_format = _get_format(path)
+    files = sorted(p for p in source_dir.rglob("*") if p.is_file())
+    if archive_format == ".zip":
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for file in files:
+                zip_file.write(file, file.relative_to(source_dir).as_posix())
+        return
+
+    with tarfile.open(path, f"w:{TAR_MODES[archive_format]}") as tar:
+        for file in files:
+            info = tar.gettarinfo(str(file), file.relative_to(source_dir).as_posix())
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            with file.open("rb") as f:
+                tar.addfile(info, f)
+
+
+def _check_name(name: str) -> str:
+    """Refuse to extract entries outside of the target directory."""
+    path = PurePosixPath(name)
+    if path.is_absolute() or ".." in path.parts:
+        raise click.ClickException(f"refusing to extract unsafe path {name!r}")
+    return name
+
+
+def iter_archive(path: Path) -> Iterator[Tuple[str, bytes]]:
+    """Get the name and content of each file in an archive, in archive order."""
+    if _get_format(path) == ".zip":
+        with zipfile.ZipFile(path) as zip_file:
+            for info in zip_file.infolist():
+                if not info.is_dir():
+                    yield _check_name(info.filename), zip_file.read(info)
+        return
+
+    # stream, since tar members are read in order
+    with tarfile.open(path, "r|*") as tar:
+        for member in tar:
+            if member.isfile():
+                f = tar.extractfile(member)
+                assert f is not None
+                yield _check_name(member.name), f.read()
+
+
+def extract_archive(path: Path, target: Path):
+    """Write the files in an archive under target."""
+    with span("extract_archive", "io", archive=str(path)) as attrs:
+        files = 0
+        for name, content in iter_archive(path):
+            dest = target / name
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            dest.write_bytes(content)
+            files += 1
+        attrs["files"] = files
+
+
+@click.command(help=__doc__)
+@click.option(
+    "--target-dir",
+    default="looker-hub/",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="Path to a directory where lookml will be extracted",
+)
+@click.argument("archive", type=click.Path(exists=True, dir_okay=False))
+@trace_option
+@metrics_option
+def extract(target_dir, archive):
+    """Extract an archive of lookml."""
+    extract_archive(Path(archive), Path(target_dir))
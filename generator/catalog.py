@@ -0,0 +1,176 @@
+"""Write namespaces to a SQLite catalog.
+
+namespaces.sqlite has an indexed table for each kind of object in
+namespaces.yaml, so that tools can answer questions like "which views use
+this table" with a query instead of parsing all of namespaces.yaml.
+"""
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterator, Tuple
+
+CATALOG_NAME = "namespaces.sqlite"
+
+SCHEMA = """
+CREATE TABLE metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE namespaces (
+    name TEXT PRIMARY KEY,
+    pretty_name TEXT,
+    glean_app INTEGER NOT NULL,
+    spoke TEXT,
+    connection TEXT,
+    v1_name TEXT
+);
+CREATE TABLE owners (
+    namespace TEXT NOT NULL REFERENCES namespaces (name),
+    email TEXT NOT NULL
+);
+CREATE INDEX owners_namespace ON owners (namespace);
+CREATE INDEX owners_email ON owners (email);
+CREATE TABLE views (
+    namespace TEXT NOT NULL REFERENCES namespaces (name),
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    PRIMARY KEY (namespace, name)
+);
+CREATE TABLE tables (
+    namespace TEXT NOT NULL,
+    view TEXT NOT NULL,
+    channel TEXT,
+    -- the key of the table in the view definition, e.g. table or event_types
+    role TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    FOREIGN KEY (namespace, view) REFERENCES views (namespace, name)
+);
+CREATE INDEX tables_view ON tables (namespace, view);
+CREATE INDEX tables_table_name ON tables (table_name);
+CREATE TABLE explores (
+    namespace TEXT NOT NULL REFERENCES namespaces (name),
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    PRIMARY KEY (namespace, name)
+);
+CREATE TABLE explore_views (
+    namespace TEXT NOT NULL,
+    explore TEXT NOT NULL,
+    -- the key of the view in the explore definition, e.g. base_view
+    role TEXT NOT NULL,
+    view TEXT NOT NULL,
+    FOREIGN KEY (namespace, explore) REFERENCES explores (namespace, name)
+);
+CREATE INDEX explore_views_explore ON explore_views (namespace, explore);
+CREATE INDEX explore_views_view ON explore_views (namespace, view);
+"""
+
+
+def _content_hash(namespaces_content: str) -> str:
+    return hashlib.sha256(namespaces_content.encode()).hexdigest()
+
+
+def _iter_tables(namespaces: dict) -> Iterator[Tuple]:
+    for namespace, defn in namespaces.items():
+        for view, view_defn in defn.get("views", {}).items():
+            for table in view_defn.get("tables", []):
+                channel = table.get("channel")
+                for role, table_name in table.items():
+                    if role != "channel":
+                        yield namespace, view, channel, role, str(table_name)
+
+
+def write_catalog(path: Path, namespaces: dict, namespaces_content: str):
+    """Write a catalog of namespaces, which were serialized as namespaces_content.
+
+    The catalog is written in a single transaction to a temporary file, which
+    replaces path once it is complete.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    connection = sqlite3.connect(str(tmp_path), isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("BEGIN")
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                connection.execute(statement)
+        connection.execute(
+            "INSERT INTO metadata VALUES ('namespaces_sha256', ?)",
+            (_content_hash(namespaces_content),),
+        )
+        connection.executemany(
+            "INSERT INTO namespaces VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    name,
+                    defn.get("pretty_name"),
+                    bool(defn.get("glean_app")),
+                    defn.get("spoke"),
+                    defn.get("connection"),
+                    defn.get("v1_name"),
+                )
+                for name, defn in namespaces.items()
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO owners VALUES (?, ?)",
+            (
+                (name, email)
+                for name, defn in namespaces.items()
+                for email in defn.get("owners", [])
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO views VALUES (?, ?, ?)",
+            (
+                (name, view, view_defn["type"])
+                for name, defn in namespaces.items()
+                for view, view_defn in defn.get("views", {}).items()
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO tables VALUES (?, ?, ?, ?, ?)", _iter_tables(namespaces)
+        )
+        connection.executemany(
+            "INSERT INTO explores VALUES (?, ?, ?)",
+            (
+                (name, explore, explore_defn["type"])
+                for name, defn in namespaces.items()
+                for explore, explore_defn in defn.get("explores", {}).items()
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO explore_views VALUES (?, ?, ?, ?)",
+            (
+                (name, explore, role, view)
+                for name, defn in namespaces.items()
+                for explore, explore_defn in defn.get("explores", {}).items()
+                for role, view in explore_defn.get("views", {}).items()
+            ),
+        )
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.close()
+        tmp_path.unlink()
+        raise
+    connection.close()
+    tmp_path.replace(path)
+
+
+def catalog_matches(path: Path, namespaces_content: str) -> bool:
+    """Check whether the catalog at path was written for namespaces_content."""
+    if not path.is_file():
+        return False
+    connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        row = connection.execute(
+            "SELECT value FROM metadata WHERE key = 'namespaces_sha256'"
+        ).fetchone()
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        connection.close()
+    return row is not None and row[0] == _content_hash(namespaces_content)
@@ -5,7 +5,10 @@ from typing import Any, Sequence
 
 import click
 import looker_sdk
-import yaml
+
+from .metrics import metrics_option
+from .namespaces_yaml import safe_load
+from .tracing import span, trace_option
 
 
 def setup_env_with_looker_creds() -> bool:
@@ -42,107 +45,110 @@ def _get_id_from_list(arr: Sequence[Any], item: str) -> int:
 
 def generate_folders(namespaces: dict):
     """Generate folders and ACLs for namespaces."""
-    sdk = looker_sdk.init31()
-    logging.info("Looker SDK 3.1 initialized successfully.")
+    with span("looker_init", "network"):
+        sdk = looker_sdk.init31()
+        logging.info("Looker SDK 3.1 initialized successfully.")
 
-    shared_folders = sdk.search_folders(name="home")
-    shared_folder_id = _get_id_from_list(shared_folders, "Shared folders")
+        shared_folders = sdk.search_folders(name="home")
+        shared_folder_id = _get_id_from_list(shared_folders, "Shared folders")
 
     for namespace, defn in namespaces.items():
-        pretty_name = defn["pretty_name"]
-        owners = defn["owners"]
+        with span("looker_generate_folder", "network", namespace=namespace):
+            _generate_folder(sdk, shared_folder_id, defn)
+
+
+def _generate_folder(sdk, shared_folder_id: int, defn: dict):
+    """Generate the folder and ACLs for a single namespace."""
+    pretty_name = defn["pretty_name"]
+    owners = defn["owners"]
+
+    try:
+        folders = sdk.search_folders(name=pretty_name, parent_id=str(shared_folder_id))
+        folder_id = _get_id_from_list(folders, "Folders")
+    except click.ClickException as e:
+        if str(e).startswith("Item missing id"):
+            raise e
 
-        try:
-            folders = sdk.search_folders(
+        logging.info(f"Creating folder Shared/{pretty_name}")
+        folder_id_untyped = sdk.create_folder(
+            looker_sdk.models.CreateFolder(
                 name=pretty_name, parent_id=str(shared_folder_id)
             )
-            folder_id = _get_id_from_list(folders, "Folders")
-        except click.ClickException as e:
-            if str(e).startswith("Item missing id"):
-                raise e
-
-            logging.info(f"Creating folder Shared/{pretty_name}")
-            folder_id_untyped = sdk.create_folder(
-                looker_sdk.models.CreateFolder(
-                    name=pretty_name, parent_id=str(shared_folder_id)
+        ).id
+        if folder_id_untyped is None:
+            raise click.ClickException("Error: Folder missing id")
+        folder_id = int(folder_id_untyped)
+
+    content_metadatas = sdk.all_content_metadatas(parent_id=shared_folder_id)
+    content_metadata_folder = [
+        cm
+        for cm in content_metadatas
+        if cm.folder_id is not None and int(cm.folder_id) == folder_id
+    ]
+
+    content_metadata_id = _get_id_from_list(
+        content_metadata_folder, "Content metadata folders"
+    )
+
+    # Set the folder to not inherit from parent
+    logging.info(
+        f"Updating content metadata to not inherit for {content_metadata_folder[0]}"
+    )
+    sdk.update_content_metadata(
+        int(content_metadata_id), looker_sdk.models.WriteContentMeta(inherits=False)
+    )
+
+    content_metadata_accesses = sdk.all_content_metadata_accesses(
+        int(content_metadata_id)
+    )
+
+    # Delete all existing access controls
+    for content_metadata_access in content_metadata_accesses:
+        if content_metadata_access.id is None:
+            raise click.ClickException(
+                (
+                    f"Error: Content metadata accesses id is missing"
+                    f"in {content_metadata_accesses}"
                 )
-            ).id
-            if folder_id_untyped is None:
-                raise click.ClickException("Error: Folder missing id")
-            folder_id = int(folder_id_untyped)
-
-        content_metadatas = sdk.all_content_metadatas(parent_id=shared_folder_id)
-        content_metadata_folder = [
-            cm
-            for cm in content_metadatas
-            if cm.folder_id is not None and int(cm.folder_id) == folder_id
-        ]
-
-        content_metadata_id = _get_id_from_list(
-            content_metadata_folder, "Content metadata folders"
+            )
+        logging.info(f"Deleting content metadata access {content_metadata_access}")
+        sdk.delete_content_metadata_access(int(content_metadata_access.id))
+
+    # Add read access for all users (group id=1)
+    logging.info(f"Adding read access for all users for {content_metadata_id}")
+    sdk.create_content_metadata_access(
+        looker_sdk.models.ContentMetaGroupUser(
+            content_metadata_id=str(content_metadata_id),
+            permission_type=looker_sdk.models.PermissionType.view,
+            group_id=1,
         )
+    )
 
-        # Set the folder to not inherit from parent
-        logging.info(
-            f"Updating content metadata to not inherit for {content_metadata_folder[0]}"
-        )
-        sdk.update_content_metadata(
-            int(content_metadata_id), looker_sdk.models.WriteContentMeta(inherits=False)
-        )
+    # Add write access for admins
+    admin_roles = sdk.search_roles(name="Admin")
+    admin_role_id = _get_id_from_list(admin_roles, "Admin roles")
 
-        content_metadata_accesses = sdk.all_content_metadata_accesses(
-            int(content_metadata_id)
-        )
+    admins = sdk.role_users(admin_role_id)
+    write_access_users = {admin.id for admin in admins}
 
-        # Delete all existing access controls
-        for content_metadata_access in content_metadata_accesses:
-            if content_metadata_access.id is None:
-                raise click.ClickException(
-                    (
-                        f"Error: Content metadata accesses id is missing"
-                        f"in {content_metadata_accesses}"
-                    )
-                )
-            logging.info(f"Deleting content metadata access {content_metadata_access}")
-            sdk.delete_content_metadata_access(int(content_metadata_access.id))
+    # Write access for all owners
+    for owner in owners:
+        email_users = sdk.search_users(email=owner)
+        if len(email_users) > 1:
+            raise click.ClickException(f"Found more than one user with email {owner}")
+        elif len(email_users) == 1:
+            write_access_users.add(email_users[0].id)
 
-        # Add read access for all users (group id=1)
-        logging.info(f"Adding read access for all users for {content_metadata_id}")
+    for user_id in write_access_users:
+        logging.info(f"Adding write access for user id {user_id}")
         sdk.create_content_metadata_access(
             looker_sdk.models.ContentMetaGroupUser(
                 content_metadata_id=str(content_metadata_id),
-                permission_type=looker_sdk.models.PermissionType.view,
-                group_id=1,
+                permission_type=looker_sdk.models.PermissionType.edit,
+                user_id=user_id,
             )
         )
 
-        # Add write access for admins
-        admin_roles = sdk.search_roles(name="Admin")
-        admin_role_id = _get_id_from_list(admin_roles, "Admin roles")
-
-        admins = sdk.role_users(admin_role_id)
-        write_access_users = {admin.id for admin in admins}
-
-        # Write access for all owners
-        for owner in owners:
-            email_users = sdk.search_users(email=owner)
-            if len(email_users) > 1:
-                raise click.ClickException(
-                    f"Found more than one user with email {owner}"
-                )
-            elif len(email_users) == 1:
-                write_access_users.add(email_users[0].id)
-
-        for user_id in write_access_users:
-            logging.info(f"Adding write access for user id {user_id}")
-            sdk.create_content_metadata_access(
-                looker_sdk.models.ContentMetaGroupUser(
-                    content_metadata_id=str(content_metadata_id),
-                    permission_type=looker_sdk.models.PermissionType.edit,
-                    user_id=user_id,
-                )
-            )
-
 
 @click.command(help=__doc__)
 @click.option(
@@ -151,7 +157,9 @@ def generate_folders(namespaces: dict):
     type=click.File(),
     help="Path to a yaml namespaces file",
 )
+@trace_option
+@metrics_option
 def generate_content(namespaces):
     """Generate content folders."""
     setup_env_with_looker_creds()
-    generate_folders(yaml.safe_load(namespaces))
+    generate_folders(safe_load(namespaces))
@@ -1,11 +1,10 @@
 """Client Counts explore type."""
 from __future__ import annotations
 
-from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
 
-from ..views import View
+from ..views import View, lookml_utils
 from . import Explore
 
 
@@ -13,29 +12,31 @@ class ClientCountsExplore(Explore):
     """A Client Counts Explore, from Baseline Clients Last Seen."""
 
     type: str = "client_counts_explore"
-    queries: List[dict] = [
-        {
-            "description": "Client Counts of weekly cohorts over the past N days.",
-            "dimensions": ["days_since_first_seen", "first_seen_week"],
-            "measures": ["client_count"],
-            "pivots": ["first_seen_week"],
-            "filters": [
-                {"submission_date": "8 weeks"},
-                {"first_seen_date": "8 weeks"},
-                {"have_completed_period": "yes"},
-            ],
-            "sorts": [{"days_since_first_seen": "asc"}],
-            "name": "cohort_analysis",
-        },
-        {
-            "description": "Number of clients per build.",
-            "dimensions": ["submission_date", "app_build"],
-            "measures": ["client_count"],
-            "pivots": ["app_build"],
-            "sorts": [{"submission_date": "asc"}],
-            "name": "build_breakdown",
-        },
-    ]
+    queries: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "description": "Client Counts of weekly cohorts over the past N days.",
+                "dimensions": ["days_since_first_seen", "first_seen_week"],
+                "measures": ["client_count"],
+                "pivots": ["first_seen_week"],
+                "filters": [
+                    {"submission_date": "8 weeks"},
+                    {"first_seen_date": "8 weeks"},
+                    {"have_completed_period": "yes"},
+                ],
+                "sorts": [{"days_since_first_seen": "asc"}],
+                "name": "cohort_analysis",
+            },
+            {
+                "description": "Number of clients per build.",
+                "dimensions": ["submission_date", "app_build"],
+                "measures": ["client_count"],
+                "pivots": ["app_build"],
+                "sorts": [{"submission_date": "asc"}],
+                "name": "build_breakdown",
+            },
+        ]
+    )
 
     def _to_lookml(self, v1_name: Optional[str]) -> List[Dict[str, Any]]:
         """Generate LookML to represent this explore."""
@@ -47,7 +48,7 @@ class ClientCountsExplore(Explore):
                 "always_filter": {
                     "filters": self.get_required_filters("extended_view"),
                 },
-                "queries": deepcopy(ClientCountsExplore.queries),
+                "queries": list(ClientCountsExplore.queries),
             }
         ]
 
@@ -1,11 +1,10 @@
 """An explore for Events Views."""
 from __future__ import annotations
 
-from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
 
-from ..views import EventsView, View
+from ..views import EventsView, View, lookml_utils
 from .explore import Explore
 
 
@@ -14,17 +13,19 @@ class EventsExplore(Explore):
 
     type: str = "events_explore"
 
-    queries: List[dict] = [
-        {
-            "description": "Event counts from all events over the past two weeks.",
-            "dimensions": ["submission_date"],
-            "measures": ["event_count"],
-            "filters": [
-                {"submission_date": "14 days"},
-            ],
-            "name": "all_event_counts",
-        },
-    ]
+    queries: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "description": "Event counts from all events over the past two weeks.",
+                "dimensions": ["submission_date"],
+                "measures": ["event_count"],
+                "filters": [
+                    {"submission_date": "14 days"},
+                ],
+                "name": "all_event_counts",
+            },
+        ]
+    )
 
     @staticmethod
     def from_views(views: List[View]) -> Iterator[EventsExplore]:
@@ -49,7 +50,7 @@ class EventsExplore(Explore):
             "name": "event_counts",
             "view_name": self.views["base_view"],
             "description": "Event counts over time.",
-            "queries": deepcopy(EventsExplore.queries),
+            "queries": list(EventsExplore.queries),
         }
         required_filters = self.get_required_filters("extended_view")
         if required_filters:
@@ -1,7 +1,9 @@
 """Generic explore type."""
 from __future__ import annotations
 
+from copy import deepcopy
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -10,6 +12,14 @@ import lkml
 from ..views.lookml_utils import escape_filter_expr
 
 
+# explores of a namespace are generated right after its views, so only the
+# views of the namespaces in progress need to stay parsed
+@lru_cache(maxsize=64)
+def _load_view_lookml(path: Path, mtime_ns: int, size: int) -> dict:
+    """Parse a view file, once for each version of it."""
+    return lkml.load(path.read_text())
+
+
 @dataclass
 class Explore:
     """A generic explore."""
@@ -30,6 +40,9 @@ class Explore:
 
         Any generation done in dependent explore's
         `_to_lookml` takes precedence over these fields.
+
+        Default queries are shared between explores instead of copied,
+        and are read-only so they can't be changed for every explore at once.
         """
         base_lookml = {}
         base_view_name = next(
@@ -82,9 +95,15 @@ class Explore:
         raise NotImplementedError("Only implemented in subclasses")
 
     def get_view_lookml(self, view: str) -> dict:
-        """Get the LookML for a view."""
+        """Get the LookML for a view.
+
+        Views are parsed once for every explore that reads them, and each
+        explore gets its own copy.
+        """
         if self.views_path is not None:
-            return lkml.load((self.views_path / f"{view}.view.lkml").read_text())
+            path = self.views_path / f"{view}.view.lkml"
+            stat = path.stat()
+            return deepcopy(_load_view_lookml(path, stat.st_mtime_ns, stat.st_size))
         raise Exception("Missing view path for get_view_lookml")
 
     def _get_default_channel(self, view: str) -> Optional[str]:
@@ -4,8 +4,8 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Dict, Iterator, List, Optional
 
-from mozilla_schema_generator.glean_ping import GleanPing
-
+from .. import glean_probes
+from ..tracing import span
 from ..views import GleanPingView, View
 from .ping_explore import PingExplore
 
@@ -17,13 +17,13 @@ class GleanPingExplore(PingExplore):
 
     def _to_lookml(self, v1_name: Optional[str]) -> List[Dict[str, Any]]:
         """Generate LookML to represent this explore."""
-        repo = next((r for r in GleanPing.get_repos() if r["name"] == v1_name))
-        glean_app = GleanPing(repo)
-        # convert ping description indexes to snake case, as we already have
-        # for the explore name
-        ping_descriptions = {
-            k.replace("-", "_"): v for k, v in glean_app.get_ping_descriptions().items()
-        }
+        with span("fetch_ping_descriptions", "network", explore=self.name):
+            # convert ping description indexes to snake case, as we already have
+            # for the explore name
+            ping_descriptions = {
+                k.replace("-", "_"): v
+                for k, v in glean_probes.get_ping_descriptions(v1_name).items()
+            }
         # collapse whitespace in the description so the lookml looks a little better
         ping_description = " ".join(ping_descriptions[self.name].split())
 
@@ -0,0 +1,115 @@
+"""Fetch remote inputs concurrently, with a common timeout and retry policy."""
+import functools
+import logging
+import socket
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, TypeVar
+
+import click
+import requests  # type: ignore
+from google.api_core import exceptions
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_RETRIES = 3
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Check whether a fetch that failed with error may succeed when retried."""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    if isinstance(error, urllib.error.URLError):
+        # e.g. unknown url types and missing files are permanent
+        return isinstance(error.reason, (socket.timeout, ConnectionError))
+    return isinstance(
+        error,
+        (
+            socket.timeout,
+            ConnectionError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            exceptions.TooManyRequests,
+            exceptions.ServerError,
+        ),
+    )
+
+
+@dataclass
+class RetryPolicy:
+    """How long each attempt to fetch a remote input may take, and how often to retry.
+
+    Retries wait for backoff seconds, doubling after each retry.
+    """
+
+    timeout: float = DEFAULT_TIMEOUT
+    retries: int = DEFAULT_RETRIES
+    backoff: float = 1.0
+
+    def call(self, fetch: Callable[[float], T], description: str) -> T:
+        """Call fetch with the timeout, and retry it if it fails transiently."""
+        for attempt in range(self.retries):
+            try:
+                return fetch(self.timeout)
+            except Exception as e:
+                if not _is_transient(e):
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logging.warning(f"Retrying {description} in {delay:g}s after: {e!r}")
+                time.sleep(delay)
+        return fetch(self.timeout)
+
+    def read_uri(self, uri: str) -> bytes:
+        """Get the content of uri."""
+
+        def read(timeout: float) -> bytes:
+            with urllib.request.urlopen(uri, timeout=timeout) as f:
+                return f.read()
+
+        if urllib.parse.urlparse(uri).scheme == "file":
+            # reading a local file again fails the same way
+            return read(self.timeout)
+        return self.call(read, uri)
+
+
+@contextmanager
+def prefetch(fetches: Dict[str, Callable[[], Any]]) -> Iterator[Dict[str, Future]]:
+    """Start all fetches at once, and get futures of their results by name.
+
+    Leaving the context waits for fetches that are still running.
+    """
+    with ThreadPoolExecutor(
+        max_workers=max(len(fetches), 1), thread_name_prefix="prefetch"
+    ) as executor:
+        yield {name: executor.submit(fetch) for name, fetch in fetches.items()}
+
+
+def retry_policy_option(command):
+    """Add --fetch-timeout and --fetch-retries options, passed as a RetryPolicy."""
+
+    @click.option(
+        "--fetch-timeout",
+        default=DEFAULT_TIMEOUT,
+        type=click.FloatRange(min=0, min_open=True),
+        help="Seconds to wait for each attempt to fetch a remote input, like app "
+        "listings, generated-sql or operational monitoring projects",
+    )
+    @click.option(
+        "--fetch-retries",
+        default=DEFAULT_RETRIES,
+        type=click.IntRange(min=0),
+        help="Number of times to retry fetching a remote input after a timeout, "
+        "connection error or server error",
+    )
+    @functools.wraps(command)
+    def wrapper(*args, fetch_timeout, fetch_retries, **kwargs):
+        retry_policy = RetryPolicy(fetch_timeout, fetch_retries)
+        return command(*args, retry_policy=retry_policy, **kwargs)
+
+    return wrapper
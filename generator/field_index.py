@@ -0,0 +1,122 @@
+"""A full-text search index of the fields of generated views.
+
+The index is a SQLite database with an FTS5 table of every dimension,
+dimension group and measure, with their labels, descriptions and links such
+as Glean Dictionary references. Fields are recorded as views are written, so
+the index is built without reading the generated files again.
+
+    SELECT namespace, view, name FROM fields WHERE fields MATCH 'counter foo'
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from lkml.keys import singularize
+
+FIELD_KEYS = ("dimensions", "dimension_groups", "measures")
+
+SCHEMA = """
+CREATE VIRTUAL TABLE fields USING fts5(
+    namespace,
+    -- the name of the view file, which may contain multiple views
+    file UNINDEXED,
+    view,
+    kind UNINDEXED,
+    name,
+    type UNINDEXED,
+    label,
+    description,
+    links
+)
+"""
+
+Row = Tuple[str, str, str, str, str, str, str, str, str]
+
+
+def _get_row(namespace: str, file: str, view: str, key: str, field: dict) -> Row:
+    labels = (field.get(k) for k in ("label", "group_label", "group_item_label"))
+    return (
+        namespace,
+        file,
+        view,
+        singularize(key),
+        field.get("name") or "",
+        field.get("type") or "",
+        " ".join(label for label in labels if label),
+        field.get("description") or "",
+        " ".join(link.get("url", "") for link in field.get("links", [])),
+    )
+
+
+class FieldIndex:
+    """Write fields of views to an index, from any thread.
+
+    Fields are inserted as each view is written, in a single transaction that
+    is committed when the index is closed. The index replaces the file at
+    path only once it is complete.
+    """
+
+    def __init__(self, path: Path):
+        """Create an empty index that will be written to path."""
+        self.path = path
+        self.tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        if self.tmp_path.exists():
+            self.tmp_path.unlink()
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            str(self.tmp_path), isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("BEGIN")
+        self.connection.execute(SCHEMA)
+
+    def __enter__(self):
+        """Get this index."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commit the index, or discard it if there was an error."""
+        if exc_type is None:
+            self.connection.execute("COMMIT")
+            self.connection.close()
+            self.tmp_path.replace(self.path)
+        else:
+            self.connection.close()
+            self.tmp_path.unlink()
+
+    def _track(
+        self, lookml: Dict[str, Any], namespace: str, file: str, rows: List[Row]
+    ) -> Dict[str, Any]:
+        """Get lookml that adds the fields of its views to rows as they're written."""
+
+        def track_fields(view: str, key: str, fields: Iterable[dict]):
+            for field in fields:
+                rows.append(_get_row(namespace, file, view, key, field))
+                yield field
+
+        def track_views(views: Iterable[dict]) -> Iterator[dict]:
+            for view in views:
+                yield {
+                    key: track_fields(view.get("name", ""), key, value)
+                    if key in FIELD_KEYS
+                    else value
+                    for key, value in view.items()
+                }
+
+        return {
+            key: track_views(value) if key == "views" else value
+            for key, value in lookml.items()
+        }
+
+    @contextmanager
+    def indexing(self, namespace: str, file: str, lookml: Dict[str, Any]):
+        """Get lookml to write, and index its fields once it has been written."""
+        rows: List[Row] = []
+        yield self._track(lookml, namespace, file, rows)
+        with self.lock:
+            self.connection.executemany(
+                "INSERT INTO fields VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
@@ -0,0 +1,149 @@
+"""Get views and their references from bigquery-etl generated-sql.
+
+Views can be read from an archive of the generated-sql branch, or from a
+local checkout of it. For a checkout, the modification time, size and
+references of each metadata.yaml are kept in an index between runs, so that
+only files that changed since the previous run are parsed again.
+"""
+import json
+import logging
+import os
+import sys
+import tarfile
+from collections import defaultdict
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .namespaces_yaml import safe_load
+from .tracing import span
+
+PROJECT = "moz-fx-data-shared-prod"
+DEFAULT_INDEX = ".generated-sql-index.json"
+INDEX_VERSION = 1
+
+# references of views in generated-sql, by dataset and view, each split into
+# project, dataset and table
+DbViews = Dict[str, Dict[str, Tuple[Tuple[str, ...], ...]]]
+
+# modification time in ns, size, and references of view.sql, if any
+IndexEntry = Tuple[int, int, Optional[List[str]]]
+
+
+def _get_view_references(metadata) -> Optional[List[str]]:
+    """Get the references of a view from its metadata, or None if it isn't a view."""
+    references = (metadata or {}).get("references") or {}
+    return references.get("view.sql")
+
+
+def _to_db_views(views: Iterable[Tuple[str, str, Iterable[str]]]) -> DbViews:
+    """Get db_views from the dataset, name and references of views."""
+    db_views: DbViews = defaultdict(dict)
+    # views of all datasets reference the same projects, datasets and often the
+    # same tables, so references are interned and shared between views
+    references_by_name: Dict[str, Tuple[str, ...]] = {}
+
+    def get_reference(name: str) -> Tuple[str, ...]:
+        reference = references_by_name.get(name)
+        if reference is None:
+            reference = tuple(sys.intern(part) for part in name.split("."))
+            references_by_name[name] = reference
+        return reference
+
+    for dataset_id, view_id, references in views:
+        db_views[sys.intern(dataset_id)][sys.intern(view_id)] = tuple(
+            get_reference(name) for name in references
+        )
+    return db_views
+
+
+def parse_archive(content: bytes) -> DbViews:
+    """Get db_views from a .tar.gz archive of generated-sql."""
+
+    def iter_views() -> Iterator[Tuple[str, str, List[str]]]:
+        with tarfile.open(fileobj=BytesIO(content), mode="r:gz") as tar:
+            for tarinfo in tar:
+                if tarinfo.name.endswith("/metadata.yaml"):
+                    *_, project, dataset_id, view_id, _ = tarinfo.name.split("/")
+                    if project != PROJECT:
+                        continue
+                    metadata = safe_load(tar.extractfile(tarinfo.name))
+                    references = _get_view_references(metadata)
+                    if references is not None:
+                        yield dataset_id, view_id, references
+
+    with span("parse_generated_sql"):
+        return _to_db_views(iter_views())
+
+
+def _read_index(path: Path, root: Path) -> Dict[str, IndexEntry]:
+    """Read the index of a checkout, or get an empty one if it can't be used."""
+    try:
+        index = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if (
+        not isinstance(index, dict)
+        or index.get("version") != INDEX_VERSION
+        or index.get("root") != str(root)
+    ):
+        return {}
+    return {
+        key: (mtime_ns, size, references)
+        for key, (mtime_ns, size, references) in index["files"].items()
+    }
+
+
+def _write_index(path: Path, root: Path, files: Dict[str, IndexEntry]):
+    """Write the index of a checkout, replacing the previous one once it's written."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {"version": INDEX_VERSION, "root": str(root), "files": files},
+            separators=(",", ":"),
+        )
+    )
+    tmp_path.replace(path)
+
+
+def scan_checkout(root: Path, index_path: Optional[Path] = None) -> DbViews:
+    """Get db_views from a local checkout of generated-sql.
+
+    If index_path is set, only metadata.yaml files whose modification time or
+    size differ from the index are parsed, and the index is updated.
+    """
+    root = root.resolve()
+    previous = {} if index_path is None else _read_index(index_path, root)
+    files: Dict[str, IndexEntry] = {}
+    parsed = 0
+    with span("scan_generated_sql", "io", root=str(root)) as attrs:
+        project_dir = root / "sql" / PROJECT
+        for dataset in sorted(os.scandir(project_dir), key=lambda e: e.name):
+            if not dataset.is_dir():
+                continue
+            for view in sorted(os.scandir(dataset.path), key=lambda e: e.name):
+                path = Path(view.path, "metadata.yaml")
+                try:
+                    stat = path.stat()
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+                key = f"{dataset.name}/{view.name}"
+                entry = previous.get(key)
+                if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                    references = _get_view_references(safe_load(path.read_bytes()))
+                    entry = (stat.st_mtime_ns, stat.st_size, references)
+                    parsed += 1
+                files[key] = entry
+        attrs["files"] = len(files)
+        attrs["parsed"] = parsed
+    logging.info(f"Parsed {parsed} of {len(files)} metadata files in {root}")
+    if index_path is not None:
+        _write_index(index_path, root, files)
+
+    def iter_views() -> Iterator[Tuple[str, str, List[str]]]:
+        for key, (_, _, references) in files.items():
+            if references is not None:
+                dataset_id, view_id = key.split("/")
+                yield dataset_id, view_id, references
+
+    return _to_db_views(iter_views())
@@ -0,0 +1,55 @@
+"""Get the probes and ping descriptions of Glean apps, once for each app.
+
+Views and explores of an app are generated concurrently, but the probe cache
+of mozilla_schema_generator isn't safe to use from several threads, so
+fetches are serialized, and their results are shared by the views and
+explores of the app until it's forgotten.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from mozilla_schema_generator.glean_ping import GleanPing
+from mozilla_schema_generator.probes import GleanProbe
+
+_lock = threading.Lock()
+_repos: Optional[List[dict]] = None
+_probes: Dict[Optional[str], List[GleanProbe]] = {}
+_ping_descriptions: Dict[Optional[str], Dict[str, str]] = {}
+
+
+def _get_glean_ping(v1_name: Optional[str]) -> GleanPing:
+    global _repos
+    if _repos is None:
+        _repos = GleanPing.get_repos()
+    repo = next((r for r in _repos if r["name"] == v1_name))
+    return GleanPing(repo)
+
+
+def get_probes(v1_name: Optional[str]) -> List[GleanProbe]:
+    """Get the probes of an app, which must be treated as read-only."""
+    with _lock:
+        if v1_name not in _probes:
+            _probes[v1_name] = _get_glean_ping(v1_name).get_probes()
+        return _probes[v1_name]
+
+
+def get_ping_descriptions(v1_name: Optional[str]) -> Dict[str, str]:
+    """Get the descriptions of the pings of an app, by ping name."""
+    with _lock:
+        if v1_name not in _ping_descriptions:
+            glean_ping = _get_glean_ping(v1_name)
+            _ping_descriptions[v1_name] = glean_ping.get_ping_descriptions()
+        return _ping_descriptions[v1_name]
+
+
+def forget(v1_name: Optional[str] = None):
+    """Drop what was fetched for an app, or for all apps if v1_name is None."""
+    global _repos
+    with _lock:
+        if v1_name is None:
+            _repos = None
+            _probes.clear()
+            _ping_descriptions.clear()
+        else:
+            _probes.pop(v1_name, None)
+            _ping_descriptions.pop(v1_name, None)
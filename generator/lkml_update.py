@@ -1,51 +1,218 @@
-"""An updated lkml parser to handle explore queries."""
-from typing import List, Union
-
-from lkml.keys import KEYS_WITH_NAME_FIELDS
-from lkml.simple import DictParser
-from lkml.tree import BlockNode, DocumentNode, ListNode, PairNode
-
-
-def dump(obj: dict) -> str:
-    """Dump an object as LookML."""
-    parser = UpdatedDictParser()
-    tree: DocumentNode = parser.parse(obj)
-    return str(tree)
-
-
-class UpdatedDictParser(DictParser):
-    """An updated DictParser that properly handles queries."""
-
-    def parse_any(
-        self, key: str, value: Union[str, list, tuple, dict]
-    ) -> Union[
-        List[Union[BlockNode, ListNode, PairNode]], BlockNode, ListNode, PairNode
-    ]:
-        """Dynamically serializes a Python object based on its type.
-
-        Args:
-            key: A LookML field type (e.g. "suggestions" or "hidden")
-            value: A string, tuple, or list to serialize
-        Raises:
-            TypeError: If input value is not of a valid type
-        Returns:
-            A generator of serialized string chunks
-        """
+"""A streaming LookML serializer that handles explore queries.
+
+This produces the same text as `lkml.dump`, but writes it straight to a
+file handle instead of building a syntax tree first, and never mutates the
+objects it serializes, so fragments can be shared between views. Repeated
+entries (like views or dimensions) may be given as iterators, which are
+consumed as they are written.
+"""
+from io import StringIO
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+from lkml.keys import (
+    EXPR_BLOCK_KEYS,
+    KEYS_WITH_NAME_FIELDS,
+    PLURAL_KEYS,
+    QUOTED_LITERAL_KEYS,
+    singularize,
+)
+
+INDENT = "  "
+
+# Kinds of the last node written at the current level, used to pick the
+# whitespace preceding the next node. These mirror lkml's DictParser.
+_DOCUMENT, _PAIR, _LIST, _BLOCK = "document", "pair", "list", "block"
+
+
+def dump(obj: dict, file: Optional[IO[str]] = None) -> Optional[str]:
+    """Dump an object as LookML.
+
+    When a file handle is given, LookML is written to it and None is returned.
+    """
+    if file is not None:
+        LookMLWriter(file.write).write_document(obj)
+        return None
+
+    buffer = StringIO()
+    LookMLWriter(buffer.write).write_document(obj)
+    return buffer.getvalue()
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace(r"\"", '"').replace('"', r"\"") + '"'
+
+
+def _format_token(key: str, value: Any, force_quote: bool = False) -> str:
+    if force_quote or key in QUOTED_LITERAL_KEYS:
+        return _quote(value)
+    elif key in EXPR_BLOCK_KEYS:
+        return f"{value.strip()} ;;"
+    return str(value)
+
+
+class LookMLWriter:
+    """Write a primitive representation of LookML as text.
+
+    The output is identical to serializing with `lkml.simple.DictParser`,
+    except that children of a query are kept as lists.
+    See https://github.com/joshtemple/lkml/issues/53
+    """
+
+    def __init__(self, write: Callable[[str], Any]):
+        """Create a writer that emits text chunks through `write`."""
+        self.write = write
+        self.parent_key: Optional[str] = None
+        self.level = 0
+        self.latest: Optional[str] = _DOCUMENT
+        # number of nodes written at the current level
+        self.written = 0
+
+    @property
+    def newline_indent(self) -> str:
+        """Get a newline plus the current indent."""
+        return "\n" + INDENT * self.level
+
+    @property
+    def prefix(self) -> str:
+        """Get the whitespace preceding the next pair or list."""
+        if self.latest == _DOCUMENT:
+            return ""
+        elif self.latest is None:
+            return self.newline_indent
+        elif self.latest == _BLOCK:
+            return "\n" + self.newline_indent
+        return self.newline_indent
+
+    def is_plural_key(self, key: str) -> bool:
+        """Check whether a key is repeated once per item instead of listed."""
+        singular_key = singularize(key)
+        return (
+            singular_key in PLURAL_KEYS
+            and not (
+                singular_key == "allowed_value"
+                and self.parent_key is not None
+                and self.parent_key.rstrip("s") == "access_grant"
+            )
+            and not self.parent_key == "query"
+        )
+
+    def write_document(self, obj: Dict[str, Any]):
+        """Write a full LookML document."""
+        for key, value in obj.items():
+            self.write_any(key, value)
+
+    def write_any(self, key: str, value: Any):
+        """Write a value based on its type."""
         if isinstance(value, str):
-            return self.parse_pair(key, value)
-        elif isinstance(value, (list, tuple)):
-            if self.is_plural_key(key) and not self.parent_key == "query":
-                # See https://github.com/joshtemple/lkml/issues/53
-                # We check that the parent is not a query to ensure the
-                # query fields don't get unnested
-                return self.expand_list(key, value)
+            self.write_pair(key, value)
+        elif isinstance(value, (list, tuple, Iterator)):
+            if self.is_plural_key(key):
+                self.expand_list(key, value)
             else:
-                return self.parse_list(key, value)
-        elif isinstance(value, dict):
-            if key in KEYS_WITH_NAME_FIELDS or "name" not in value.keys():
-                name = None
+                self.write_list(key, list(value))
+        elif isinstance(value, Mapping):
+            if key in KEYS_WITH_NAME_FIELDS or "name" not in value:
+                self.write_block(key, value)
             else:
-                name = value.pop("name")
-            return self.parse_block(key, value, name)
+                self.write_block(key, value, value["name"])
+        else:
+            raise TypeError("Value must be a string, list, tuple, iterator, or dict.")
+
+    def expand_list(self, key: str, values: Iterable):
+        """Write each value of a repeatable key as its own node."""
+        if key == "filters":
+            values = list(values)
+            # filters can have three different syntaxes, see
+            # lkml.simple.DictParser.resolve_filters
+            if "name" in values[0]:
+                for value in values:
+                    self.write_block("filter", value, value["name"])
+            elif "field" in values[0] and "value" in values[0]:
+                for value in values:
+                    self.write_block("filters", value)
+            else:
+                self.write_list("filters", values)
+            return
+
+        singular_key = singularize(key)
+        for value in values:
+            self.write_any(singular_key, value)
+
+    def write_block(
+        self, key: str, items: Mapping[str, Any], name: Optional[str] = None
+    ):
+        """Write a dictionary as a LookML block."""
+        if self.latest and self.latest != _DOCUMENT:
+            prefix = "\n" + self.newline_indent
+        else:
+            prefix = self.prefix
+        self.write(f"{prefix}{key}: {name} {{" if name else f"{prefix}{key}: {{")
+
+        prev_parent_key, prev_latest, prev_written = (
+            self.parent_key,
+            self.latest,
+            self.written,
+        )
+        self.parent_key = key
+        self.level += 1
+        self.latest, self.written = None, 0
+        for child_key, value in items.items():
+            if name is not None and child_key == "name":
+                continue
+            self.write_any(child_key, value)
+        has_children = self.written > 0
+        self.level -= 1
+        self.parent_key, self.latest = prev_parent_key, prev_latest
+
+        self.write(self.newline_indent + "}" if has_children else "}")
+        self.latest, self.written = _BLOCK, prev_written + 1
+
+    def write_list(self, key: str, values: Sequence):
+        """Write a sequence as a LookML list."""
+        # `suggestions` is only quoted when it's a list, so override the default
+        force_quote = key == "suggestions"
+        prev_parent_key, prev_written = self.parent_key, self.written
+        self.parent_key = key
+        self.write(f"{self.prefix}{key}: [")
+
+        pair_mode = bool(values) and not isinstance(values[0], (str, int))
+        if len(values) >= 5 or pair_mode:
+            self.level += 1
+            self.latest = None
+            for i, value in enumerate(values):
+                if i > 0:
+                    self.write(",")
+                if pair_mode:
+                    [(pair_key, pair_value)] = value.items()
+                    self.write_pair(pair_key, pair_value)
+                else:
+                    self.write(
+                        self.newline_indent + _format_token(key, value, force_quote)
+                    )
+            self.level -= 1
+            self.write(("," if values else "") + self.newline_indent + "]")
         else:
-            raise TypeError("Value must be a string, list, tuple, or dict.")
+            self.write(
+                ", ".join(_format_token(key, value, force_quote) for value in values)
+                + "]"
+            )
+
+        self.parent_key = prev_parent_key
+        self.latest, self.written = _LIST, prev_written + 1
+
+    def write_pair(self, key: str, value: str):
+        """Write a key and value as a LookML pair."""
+        force_quote = self.parent_key == "filters" and key != "field"
+        self.write(f"{self.prefix}{key}: {_format_token(key, value, force_quote)}")
+        self.latest = _PAIR
+        self.written += 1
@@ -1,57 +1,104 @@
 """Generate lookml from namespaces."""
 import logging
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterable, Optional
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, cast
 
 import click
-import lkml
-import yaml
 from google.cloud import bigquery
 
-from .explores import EXPLORE_TYPES
-from .namespaces import _get_glean_apps
+from . import glean_probes, lkml_update
+from .archive import _get_format, write_archive
+from .catalog import CATALOG_NAME, catalog_matches
+from .explores import EXPLORE_TYPES, Explore
+from .field_index import FieldIndex
+from .memory import checkpoint, memory_report_option
+from .metrics import metrics_option
+from .namespaces import _get_glean_apps, _get_namespace_filter, allowlist_option
+from .namespaces_yaml import dump_namespaces, load_namespaces, read_index
+from .scheduler import Task, run_tasks
+from .selection import Selection, select_option
+from .shards import SHARD, _get_shard, _write_manifest
+from .tracing import span, trace_option
 from .views import VIEW_TYPES, View, ViewDict
 
+# generation mostly waits on BigQuery and probe-scraper requests
+DEFAULT_WORKERS = 8
 
-def _generate_views(
-    client, out_dir: Path, views: Iterable[View], v1_name: Optional[str]
-) -> Iterable[Path]:
-    for view in views:
-        logging.info(
-            f"Generating lookml for view {view.name} in {view.namespace} of type {view.view_type}"
-        )
-        path = out_dir / f"{view.name}.view.lkml"
-        lookml = view.to_lookml(client, v1_name)
-        path.write_text(lkml.dump(lookml))
-        yield path
+
+@contextmanager
+def _open_atomic(path: Path) -> Iterator[IO[str]]:
+    """Write to a temporary file that replaces path only if writing succeeds."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("w") as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
 
 
-def _generate_explores(
+def _generate_view(
     client,
+    out_dir: Path,
+    view: View,
+    v1_name: Optional[str],
+    field_index: Optional[FieldIndex] = None,
+) -> Path:
+    logging.info(
+        f"Generating lookml for view {view.name} in {view.namespace} of type {view.view_type}"
+    )
+    path = out_dir / f"{view.name}.view.lkml"
+    attrs = {"namespace": view.namespace, "view": view.name}
+    with span("to_lookml", **attrs):
+        lookml = view.iter_lookml(client, v1_name)
+    indexing = (
+        nullcontext(lookml)
+        if field_index is None
+        else field_index.indexing(view.namespace, view.name, lookml)
+    )
+    # views and their fields are generated lazily as they are written, so a
+    # failure part way through must not leave a truncated view behind
+    with span("write_lookml", "io", path=str(path), **attrs) as span_attrs:
+        with indexing as lookml, _open_atomic(path) as f:
+            lkml_update.dump(lookml, f)
+            span_attrs["bytes"] = f.tell()
+    return path
+
+
+def _generate_explore(
     out_dir: Path,
     namespace: str,
-    explores: dict,
-    views_dir: Path,
+    explore: Explore,
     v1_name: Optional[
         str
     ],  # v1_name for Glean explores: see: https://mozilla.github.io/probe-scraper/#tag/library
-) -> Iterable[Path]:
-    for explore_name, defn in explores.items():
-        logging.info(f"Generating lookml for explore {explore_name} in {namespace}")
-        explore = EXPLORE_TYPES[defn["type"]].from_dict(explore_name, defn, views_dir)
-        file_lookml = {
-            # Looker validates all included files,
-            # so if we're not explicit about files here, validation takes
-            # forever as looker re-validates all views for every explore (if we used *).
-            "includes": [
-                f"/looker-hub/{namespace}/views/{view}.view.lkml"
-                for view in explore.get_dependent_views()
-            ],
-            "explores": explore.to_lookml(v1_name),
-        }
-        path = out_dir / (explore_name + ".explore.lkml")
-        path.write_text(lkml.dump(file_lookml))
-        yield path
+) -> Path:
+    logging.info(f"Generating lookml for explore {explore.name} in {namespace}")
+    attrs = {"namespace": namespace, "explore": explore.name}
+    with span("to_lookml", **attrs):
+        explore_lookml = explore.to_lookml(v1_name)
+    file_lookml = {
+        # Looker validates all included files,
+        # so if we're not explicit about files here, validation takes
+        # forever as looker re-validates all views for every explore (if we used *).
+        "includes": [
+            f"/looker-hub/{namespace}/views/{view}.view.lkml"
+            for view in explore.get_dependent_views()
+        ],
+        "explores": explore_lookml,
+    }
+    path = out_dir / (explore.name + ".explore.lkml")
+    with span("write_lookml", "io", path=str(path), **attrs) as span_attrs:
+        with _open_atomic(path) as f:
+            lkml_update.dump(file_lookml, f)
+            span_attrs["bytes"] = f.tell()
+    return path
 
 
 def _get_views_from_dict(views: Dict[str, ViewDict], namespace: str) -> Iterable[View]:
@@ -65,11 +112,64 @@ def _glean_apps_to_v1_map(glean_apps):
     return {d["name"]: d["v1_name"] for d in glean_apps}
 
 
-def _lookml(namespaces, glean_apps, target_dir):
-    client = bigquery.Client()
+def _read_namespaces(
+    namespaces, selection: Optional[Selection] = None
+) -> Tuple[dict, str]:
+    """Parse a namespaces file, and get its content.
+
+    If there is a selection and the file has an index, only the selected
+    namespaces are parsed.
+    """
+    with span("read_namespaces", "io") as attrs:
+        namespaces_content = namespaces.read()
+        index, names = None, None
+        path = getattr(namespaces, "name", None)
+        if selection is not None and path is not None and Path(path).is_file():
+            index = read_index(Path(path), namespaces_content)
+            if index is not None:
+                names = [n for n in index if selection.includes_namespace(n)]
+        _namespaces = load_namespaces(namespaces_content, index, names)
+        attrs["bytes"] = len(namespaces_content)
+        attrs["namespaces"] = len(_namespaces)
+    checkpoint("read_namespaces")
+    return _namespaces, namespaces_content
+
+
+def _lookml(
+    namespaces,
+    glean_apps,
+    target_dir,
+    shard: Optional[Tuple[int, int]] = None,
+    selection: Optional[Selection] = None,
+    workers: int = DEFAULT_WORKERS,
+):
+    _namespaces, namespaces_content = _read_namespaces(
+        namespaces, selection if shard is None else None
+    )
+    _generate_lookml(
+        _namespaces,
+        namespaces_content,
+        glean_apps,
+        target_dir,
+        shard,
+        selection,
+        workers,
+    )
+
 
-    namespaces_content = namespaces.read()
-    _namespaces = yaml.safe_load(namespaces_content)
+def _generate_lookml(
+    _namespaces: dict,
+    namespaces_content: str,
+    glean_apps,
+    target_dir,
+    shard: Optional[Tuple[int, int]] = None,
+    selection: Optional[Selection] = None,
+    workers: int = DEFAULT_WORKERS,
+    catalog: Optional[Path] = None,
+    field_index_path: Optional[Path] = None,
+):
+    """Generate lookml for namespaces, which were parsed from namespaces_content."""
+    client = bigquery.Client()
     target = Path(target_dir)
     target.mkdir(parents=True, exist_ok=True)
 
@@ -77,28 +177,112 @@ def _lookml(namespaces, glean_apps, target_dir):
     # by the Glean Dictionary and other tools
     with open(target / "namespaces.yaml", "w") as target_namespaces_file:
         target_namespaces_file.write(namespaces_content)
+    if catalog is not None:
+        shutil.copyfile(catalog, target / CATALOG_NAME)
+
+    names = list(_namespaces)
+    if shard is not None:
+        names = _get_shard(_namespaces, shard)
+        logging.info(f"Generating shard {shard[0]}/{shard[1]}: {names}")
+    if selection is not None:
+        names = [name for name in names if selection.includes_namespace(name)]
 
+    field_index = None if field_index_path is None else FieldIndex(field_index_path)
     v1_mapping = _glean_apps_to_v1_map(glean_apps)
-    for namespace, lookml_objects in _namespaces.items():
-        logging.info(f"\nGenerating namespace {namespace}")
+    tasks: List[Task] = []
+    remaining: Dict[str, int] = {}
+    v1_names: Dict[str, Optional[str]] = {}
+    for namespace in names:
+        lookml_objects = _namespaces[namespace]
+        if selection is not None:
+            lookml_objects = {
+                kind: selection.filter(namespace, kind, lookml_objects.get(kind, {}))
+                for kind in ("views", "explores")
+            }
+        v1_name = _namespaces[namespace].get("v1_name", v1_mapping.get(namespace))
+        with span("plan_namespace", namespace=namespace):
+            namespace_tasks = _get_namespace_tasks(
+                client, target, namespace, lookml_objects, v1_name, field_index
+            )
+        tasks += namespace_tasks
+        remaining[namespace] = len(namespace_tasks)
+        v1_names[namespace] = v1_name
+
+    generating: Dict[str, ExitStack] = {}
 
-        view_dir = target / namespace / "views"
-        view_dir.mkdir(parents=True, exist_ok=True)
-        views = _get_views_from_dict(lookml_objects.get("views", {}), namespace)
+    def on_done(task: Task, path: Path):
+        logging.info(f"    ...Generated {path}")
+        namespace, _, _ = cast(Tuple[str, str, str], task.key)
+        remaining[namespace] -= 1
+        if not remaining[namespace]:
+            generating[namespace].close()
+        if not remaining[namespace] and v1_names[namespace] is not None:
+            # probes of an app are only kept while its namespace is generated
+            glean_probes.forget(v1_names[namespace])
+        # with several workers, tasks of other namespaces run in between, so
+        # memory can only be attributed to a namespace when running serially
+        if not remaining[namespace] and workers == 1:
+            checkpoint(f"namespace:{namespace}")
 
-        logging.info("  Generating views")
-        v1_name: Optional[str] = v1_mapping.get(namespace)
-        for view_path in _generate_views(client, view_dir, views, v1_name):
-            logging.info(f"    ...Generating {view_path}")
+    # views and explores of all namespaces are generated concurrently, and each
+    # explore starts as soon as the view files it reads have been written, so
+    # a namespace is generated from the start until its last task is done
+    with field_index or nullcontext(), ExitStack() as spans:
+        for namespace in names:
+            generating[namespace] = spans.enter_context(ExitStack())
+            generating[namespace].enter_context(
+                span("generate_namespace", namespace=namespace)
+            )
+        run_tasks(tasks, workers, on_done)
 
-        explore_dir = target / namespace / "explores"
-        explore_dir.mkdir(parents=True, exist_ok=True)
-        explores = lookml_objects.get("explores", {})
-        logging.info("  Generating explores")
-        for explore_path in _generate_explores(
-            client, explore_dir, namespace, explores, view_dir, v1_name
-        ):
-            logging.info(f"    ...Generating {explore_path}")
+    if shard is not None:
+        _write_manifest(target, shard, names, selection)
+
+
+def _get_namespace_tasks(
+    client,
+    target: Path,
+    namespace: str,
+    lookml_objects: dict,
+    v1_name: Optional[str],
+    field_index: Optional[FieldIndex] = None,
+) -> List[Task]:
+    """Get tasks that generate the views and explores of a namespace."""
+    logging.info(f"\nGenerating namespace {namespace}")
+    view_dir = target / namespace / "views"
+    view_dir.mkdir(parents=True, exist_ok=True)
+    explore_dir = target / namespace / "explores"
+    explore_dir.mkdir(parents=True, exist_ok=True)
+
+    tasks = []
+    for view in _get_views_from_dict(lookml_objects.get("views", {}), namespace):
+        tasks.append(
+            Task(
+                (namespace, "views", view.name),
+                partial(_generate_view, client, view_dir, view, v1_name, field_index),
+            )
+        )
+    for explore_name, defn in lookml_objects.get("explores", {}).items():
+        explore = EXPLORE_TYPES[defn["type"]].from_dict(explore_name, defn, view_dir)
+        tasks.append(
+            Task(
+                (namespace, "explores", explore_name),
+                partial(_generate_explore, explore_dir, namespace, explore, v1_name),
+                # explores read the lookml of all of their views
+                [(namespace, "views", view) for view in explore.views.values()],
+            )
+        )
+    return tasks
+
+
+field_index_option = click.option(
+    "--field-index",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to write a SQLite full-text search index of the dimensions and "
+    "measures of generated views to. With --select or --shard, only generated "
+    "views are indexed",
+)
 
 
 @click.command(help=__doc__)
@@ -111,7 +295,8 @@ def _lookml(namespaces, glean_apps, target_dir):
 @click.option(
     "--app-listings-uri",
     default="https://probeinfo.telemetry.mozilla.org/v2/glean/app-listings",
-    help="URI for probeinfo service v2 glean app listings",
+    help="URI for probeinfo service v2 glean app listings, which are only fetched "
+    "if namespaces doesn't include the v1_name of Glean apps",
 )
 @click.option(
     "--target-dir",
@@ -119,7 +304,132 @@ def _lookml(namespaces, glean_apps, target_dir):
     type=click.Path(),
     help="Path to a directory where lookml will be written",
 )
-def lookml(namespaces, app_listings_uri, target_dir):
+@click.option(
+    "--shard",
+    type=SHARD,
+    default=None,
+    help="Only generate shard i of N, e.g. 2/4, of namespaces balanced by their "
+    "estimated cost. Shards are combined with merge-shards",
+)
+@click.option(
+    "--output-archive",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to write lookml to as a single .tar, .tar.gz, .tar.bz2, .tar.xz or "
+    ".zip archive instead of --target-dir. Files are generated in a temporary "
+    "directory first, so TMPDIR should be on a local filesystem",
+)
+@click.option(
+    "--workers",
+    default=DEFAULT_WORKERS,
+    type=click.IntRange(min=1),
+    help="Number of views and explores to generate concurrently",
+)
+@click.option(
+    "--disallowlist",
+    type=click.File(),
+    default=None,
+    help="Path to a namespace disallow list. Namespaces listed in it are skipped, "
+    "even if they are in namespaces",
+)
+@allowlist_option
+@field_index_option
+@select_option
+@trace_option
+@metrics_option
+@memory_report_option
+def lookml(
+    namespaces,
+    app_listings_uri,
+    target_dir,
+    shard,
+    output_archive,
+    workers,
+    disallowlist,
+    allowlist,
+    field_index,
+    selection,
+):
     """Generate lookml from namespaces."""
-    glean_apps = _get_glean_apps(app_listings_uri)
-    return _lookml(namespaces, glean_apps, target_dir)
+    if output_archive is not None:
+        # fail before generating anything if the format isn't supported
+        _get_format(Path(output_archive))
+    is_filtered = disallowlist is not None or allowlist is not None
+    # sharding needs every namespace to balance shards, and filtered namespaces
+    # are written out again in full
+    _namespaces, namespaces_content = _read_namespaces(
+        namespaces, selection if shard is None and not is_filtered else None
+    )
+    if is_filtered:
+        is_allowed = _get_namespace_filter(disallowlist, allowlist)
+        allowed = {name: defn for name, defn in _namespaces.items() if is_allowed(name)}
+        if len(allowed) < len(_namespaces):
+            # namespaces.yaml of the output, and of shards that are merged,
+            # only lists the namespaces that are generated
+            _namespaces = allowed
+            namespaces_content = dump_namespaces(_namespaces)[0]
+    glean_apps = []
+    if any(
+        defn.get("glean_app") and "v1_name" not in defn for defn in _namespaces.values()
+    ):
+        # namespaces.yaml is from before v1_name was added to Glean apps
+        glean_apps = _get_glean_apps(app_listings_uri)
+        checkpoint("get_glean_apps")
+    _write_lookml(
+        _namespaces,
+        namespaces_content,
+        glean_apps,
+        target_dir,
+        output_archive,
+        shard,
+        selection,
+        workers,
+        _get_catalog(namespaces, namespaces_content),
+        None if field_index is None else Path(field_index),
+    )
+
+
+def _get_catalog(namespaces, namespaces_content: str) -> Optional[Path]:
+    """Get the catalog next to a namespaces file, if it matches the file."""
+    path = getattr(namespaces, "name", None)
+    if path is None:
+        return None
+    catalog = Path(path).with_name(CATALOG_NAME)
+    if catalog_matches(catalog, namespaces_content):
+        return catalog
+    if catalog.exists():
+        logging.warning(f"Not copying {catalog}, which doesn't match {path}")
+    return None
+
+
+def _write_lookml(
+    _namespaces: dict,
+    namespaces_content: str,
+    glean_apps,
+    target_dir,
+    output_archive: Optional[str],
+    shard: Optional[Tuple[int, int]],
+    selection: Optional[Selection],
+    workers: int,
+    catalog: Optional[Path] = None,
+    field_index_path: Optional[Path] = None,
+):
+    """Generate lookml in target_dir, or in output_archive if it's set."""
+    generate = partial(
+        _generate_lookml,
+        _namespaces,
+        namespaces_content,
+        glean_apps,
+        shard=shard,
+        selection=selection,
+        workers=workers,
+        catalog=catalog,
+        field_index_path=field_index_path,
+    )
+    if output_archive is None:
+        return generate(target_dir=target_dir)
+
+    with tempfile.TemporaryDirectory() as staging_dir:
+        generate(target_dir=staging_dir)
+        with span("write_archive", "io", path=output_archive):
+            write_archive(Path(staging_dir), Path(output_archive))
@@ -0,0 +1,121 @@
+"""Report memory use at the boundaries between stages of generation.
+
+Stages are marked with `checkpoint`, which is a no-op unless a report is
+being recorded. At each checkpoint, the report has the memory allocated and
+peak resident set size so far, and the call sites that allocated the most
+memory since the previous checkpoint.
+"""
+import functools
+import json
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import click
+
+TOP_ALLOCATIONS = 10
+
+
+def _peak_rss() -> int:
+    """Get the peak resident set size of this process in bytes."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class MemoryReport:
+    """Collect tracemalloc snapshots at stage boundaries."""
+
+    def __init__(self, top: int = TOP_ALLOCATIONS):
+        """Start tracing allocations."""
+        self.top = top
+        self.stages: List[Dict[str, Any]] = []
+        tracemalloc.start()
+        self._previous = self._snapshot()
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+
+    def checkpoint(self, stage: str):
+        """Record memory use at the end of a stage."""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._snapshot()
+        allocations = snapshot.compare_to(self._previous, "lineno")[: self.top]
+        self._previous = snapshot
+        self.stages.append(
+            {
+                "stage": stage,
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "peak_rss_bytes": _peak_rss(),
+                "top_allocations": [
+                    {
+                        "site": str(stat.traceback),
+                        "size_diff_bytes": stat.size_diff,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in allocations
+                    if stat.size_diff > 0
+                ],
+            }
+        )
+        # peaks are reported per stage where supported, see bpo-40172
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()  # type: ignore
+
+    def stop(self):
+        """Stop tracing allocations."""
+        tracemalloc.stop()
+
+    def dump(self, path: Path):
+        """Write the report as JSON."""
+        path.write_text(json.dumps({"stages": self.stages}, indent=2))
+
+
+_report: Optional[MemoryReport] = None
+
+
+def checkpoint(stage: str):
+    """Mark the end of a stage, when reporting memory use."""
+    if _report is not None:
+        _report.checkpoint(stage)
+
+
+@contextmanager
+def recording(path: Path, name: str) -> Iterator[MemoryReport]:
+    """Report memory use within this context, then write the report to path."""
+    global _report
+    _report = MemoryReport()
+    try:
+        yield _report
+        _report.checkpoint(name)
+    finally:
+        report, _report = _report, None
+        report.stop()
+        report.dump(path)
+
+
+def memory_report_option(command):
+    """Add a --memory-report option to a command function."""
+
+    @click.option(
+        "--memory-report",
+        "memory_report_path",
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        help="Path to write a JSON report of memory use at each stage to",
+    )
+    @functools.wraps(command)
+    def wrapper(*args, memory_report_path=None, **kwargs):
+        if memory_report_path is None:
+            return command(*args, **kwargs)
+        with recording(Path(memory_report_path), command.__name__):
+            return command(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,201 @@
+"""Export metrics about a run in the Prometheus text format.
+
+Metrics are aggregated from tracing spans, and written to a file that can be
+picked up by the node exporter's textfile collector.
+"""
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+import click
+
+from . import tracing
+from .explores import explore
+from .views import lookml_utils
+
+PREFIX = "lookml_generator"
+
+# upper bounds in seconds of the buckets for API call latencies
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# functools.lru_cache wrapped functions whose hit ratios are reported
+CACHES: Dict[str, Any] = {
+    "title": lookml_utils._title,
+    "group_label": lookml_utils._group_label,
+    "view_lookml": explore._load_view_lookml,
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class RunMetrics:
+    """Aggregate spans from a run into counters, summaries and histograms."""
+
+    def __init__(self, command: str):
+        """Collect metrics for a run of command."""
+        self.command = command
+        self.start = time.time()
+        self.success = False
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = defaultdict(int)
+        # `all` both gets and generates each namespace, so namespaces are
+        # counted by name
+        self.namespaces: Set[str] = set()
+        # span name -> [count, total seconds]
+        self.stages: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        # span name -> [count per bucket, count, total seconds]
+        self.api_calls: Dict[str, List[Any]] = {}
+        self._cache_info = {name: func.cache_info() for name, func in CACHES.items()}
+
+    def observe(self, name: str, category: str, duration: float, attributes: dict):
+        """Add a span to the metrics."""
+        with self._lock:
+            if category == "network":
+                buckets, _, _ = self.api_calls.setdefault(
+                    name, [[0] * len(LATENCY_BUCKETS), 0, 0.0]
+                )
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if duration <= bound:
+                        buckets[i] += 1
+                self.api_calls[name][1] += 1
+                self.api_calls[name][2] += duration
+            else:
+                stage = self.stages[name]
+                stage[0] += 1
+                stage[1] += duration
+
+            if name in ("get_namespace", "generate_namespace"):
+                self.namespaces.add(attributes["namespace"])
+                self.counts["namespaces"] = len(self.namespaces)
+            if name == "write_lookml":
+                if "view" in attributes:
+                    self.counts["views"] += 1
+                elif "explore" in attributes:
+                    self.counts["explores"] += 1
+            if category == "io" and name.startswith("write_"):
+                self.counts["files_written"] += 1
+                self.counts["bytes_written"] += attributes.get("bytes", 0)
+
+    def _cache_stats(self) -> Dict[str, Tuple[int, int]]:
+        """Get hits and misses of each cache during this run."""
+        stats = {}
+        for name, func in CACHES.items():
+            info, start = func.cache_info(), self._cache_info[name]
+            stats[name] = (info.hits - start.hits, info.misses - start.misses)
+        return stats
+
+    def to_text(self) -> str:
+        """Format metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        command = (("command", self.command),)
+
+        def metric(name: str, metric_type: str, description: str):
+            lines.append(f"# HELP {PREFIX}_{name} {description}")
+            lines.append(f"# TYPE {PREFIX}_{name} {metric_type}")
+
+        def sample(name: str, value: float, labels: Labels = ()):
+            lines.append(
+                f"{PREFIX}_{name}{_format_labels(command + labels)} "
+                + _format_value(value)
+            )
+
+        metric("last_run_timestamp_seconds", "gauge", "When the last run started.")
+        sample("last_run_timestamp_seconds", self.start)
+        metric("last_run_success", "gauge", "Whether the last run succeeded.")
+        sample("last_run_success", int(self.success))
+        metric("duration_seconds", "gauge", "Duration of the last run.")
+        sample("duration_seconds", time.time() - self.start)
+
+        for name, description in (
+            ("namespaces", "Namespaces generated."),
+            ("views", "Views written."),
+            ("explores", "Explores written."),
+            ("files_written", "Files written."),
+            ("bytes_written", "Bytes of files written, where known."),
+        ):
+            metric(f"{name}_total", "counter", description)
+            sample(f"{name}_total", self.counts[name])
+
+        metric("stage_duration_seconds", "summary", "Time spent in each stage.")
+        for stage, (count, total) in sorted(self.stages.items()):
+            sample("stage_duration_seconds_sum", total, (("stage", stage),))
+            sample("stage_duration_seconds_count", count, (("stage", stage),))
+
+        metric("api_call_duration_seconds", "histogram", "Latency of API calls.")
+        for call, (buckets, count, total) in sorted(self.api_calls.items()):
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                labels = (("call", call), ("le", str(bound)))
+                sample("api_call_duration_seconds_bucket", bucket_count, labels)
+            labels = (("call", call), ("le", "+Inf"))
+            sample("api_call_duration_seconds_bucket", count, labels)
+            sample("api_call_duration_seconds_sum", total, (("call", call),))
+            sample("api_call_duration_seconds_count", count, (("call", call),))
+
+        cache_stats = self._cache_stats()
+        metric("cache_hits_total", "counter", "Cache lookups that were hits.")
+        for cache, (hits, _) in sorted(cache_stats.items()):
+            sample("cache_hits_total", hits, (("cache", cache),))
+        metric("cache_misses_total", "counter", "Cache lookups that were misses.")
+        for cache, (_, misses) in sorted(cache_stats.items()):
+            sample("cache_misses_total", misses, (("cache", cache),))
+        metric("cache_hit_ratio", "gauge", "Ratio of cache lookups that were hits.")
+        for cache, (hits, misses) in sorted(cache_stats.items()):
+            if hits + misses:
+                sample("cache_hit_ratio", hits / (hits + misses), (("cache", cache),))
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: Path):
+        """Atomically write metrics, so collectors never read a partial file."""
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.to_text())
+        tmp_path.replace(path)
+
+
+def metrics_option(command):
+    """Add a --metrics-textfile option to a command function."""
+
+    @click.option(
+        "--metrics-textfile",
+        "metrics_path",
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        help="Path to write Prometheus metrics about this run to, e.g. for the "
+        "node exporter's textfile collector",
+    )
+    @functools.wraps(command)
+    def wrapper(*args, metrics_path=None, **kwargs):
+        if metrics_path is None:
+            return command(*args, **kwargs)
+        ctx = click.get_current_context(silent=True)
+        run_metrics = RunMetrics(command.__name__ if ctx is None else ctx.info_name)
+        tracing.add_listener(run_metrics.observe)
+        try:
+            result = command(*args, **kwargs)
+            run_metrics.success = True
+            return result
+        finally:
+            tracing.remove_listener(run_metrics.observe)
+            run_metrics.dump(Path(metrics_path))
+
+    return wrapper
@@ -2,22 +2,27 @@
 import gzip
 import json
 import re
-import tarfile
-import urllib.request
 import warnings
-from collections import Mapping, defaultdict
+from collections import Mapping
 from datetime import datetime
-from io import BytesIO
+from functools import partial
 from itertools import groupby
 from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Union
 
 import click
-import yaml
 from google.cloud import storage
 
+from .catalog import CATALOG_NAME, write_catalog
 from .explores import EXPLORE_TYPES
+from .fetch import RetryPolicy, prefetch, retry_policy_option
+from .generated_sql import DEFAULT_INDEX, DbViews, parse_archive, scan_checkout
+from .memory import checkpoint, memory_report_option
+from .metrics import metrics_option
+from .namespaces_yaml import safe_load, write_namespaces
+from .selection import select_option
+from .tracing import span, trace_option
 from .views import VIEW_TYPES, View
 
 PROBE_INFO_BASE_URI = "https://probeinfo.telemetry.mozilla.org"
@@ -32,9 +37,10 @@ def _normalize_slug(name):
     return re.sub(r"[^a-zA-Z0-9_]", "_", name)
 
 
-def _download_json_file(project, bucket, filename):
-    blob = bucket.get_blob(filename)
-    return json.loads(blob.download_as_string()), blob.updated
+def _download_json_file(project, bucket, filename, timeout=None):
+    blob = bucket.get_blob(filename, timeout=timeout, retry=None)
+    content = blob.download_as_string(timeout=timeout, retry=None)
+    return json.loads(content), blob.updated
 
 
 def _get_first(tuple_):
@@ -58,23 +64,38 @@ def _merge_namespaces(dct, merge_dct):
                 dct[k] = merge_dct[k]
 
 
-def _get_db_views(uri):
-    with urllib.request.urlopen(uri) as f:
-        tarbytes = BytesIO(f.read())
-    views = defaultdict(dict)
-    with tarfile.open(fileobj=tarbytes, mode="r:gz") as tar:
-        for tarinfo in tar:
-            if tarinfo.name.endswith("/metadata.yaml"):
-                metadata = yaml.safe_load(tar.extractfile(tarinfo.name))
-                references = metadata.get("references", {})
-                if "view.sql" not in references:
-                    continue
-                *_, project, dataset_id, view_id, _ = tarinfo.name.split("/")
-                if project == "moz-fx-data-shared-prod":
-                    views[dataset_id][view_id] = [
-                        ref.split(".") for ref in references["view.sql"]
-                    ]
-    return views
+def _read_namespace_list(file) -> Set[str]:
+    """Read a yaml list of namespaces, or a scalar of whitespace separated ones."""
+    names = safe_load(file.read()) or []
+    if isinstance(names, str):
+        names = names.split()
+    return set(names)
+
+
+def _get_namespace_filter(disallowlist, allowlist=None) -> Callable[[str], bool]:
+    """Get a function that checks whether a namespace should be generated.
+
+    Namespaces in disallowlist are never generated, and if there is an
+    allowlist only namespaces in it are generated.
+    """
+    disallowed = _read_namespace_list(disallowlist) if disallowlist else set()
+    allowed = None if allowlist is None else _read_namespace_list(allowlist)
+
+    def is_allowed(namespace: str) -> bool:
+        return namespace not in disallowed and (allowed is None or namespace in allowed)
+
+    return is_allowed
+
+
+def _fetch_generated_sql(uri, retry_policy: Optional[RetryPolicy] = None) -> bytes:
+    with span("fetch_generated_sql", "network", uri=uri) as attrs:
+        content = (retry_policy or RetryPolicy()).read_uri(uri)
+        attrs["bytes"] = len(content)
+    return content
+
+
+def _get_db_views(uri, retry_policy: Optional[RetryPolicy] = None) -> DbViews:
+    return parse_archive(_fetch_generated_sql(uri, retry_policy))
 
 
 def _append_view_and_explore_for_data_type(
@@ -97,20 +118,35 @@ def _append_view_and_explore_for_data_type(
     }
 
 
-def _get_opmon_views_and_explores():
+def _get_opmon_views_and_explores(retry_policy: Optional[RetryPolicy] = None):
+    policy = retry_policy or RetryPolicy()
     client = storage.Client(PROD_PROJECT)
-    bucket = client.get_bucket(OPMON_BUCKET_NAME)
-    om_views_and_explores = {"views": {}, "explores": {}}
+    # retries are left to the policy, so that all inputs are retried alike
+    bucket = policy.call(
+        lambda timeout: client.get_bucket(
+            OPMON_BUCKET_NAME, timeout=timeout, retry=None
+        ),
+        OPMON_BUCKET_NAME,
+    )
+    om_views_and_explores: Dict[str, Dict[str, Any]] = {"views": {}, "explores": {}}
 
     # Iterating over all defined operational monitoring projects
-    for blob in bucket.list_blobs(prefix=PROJECTS_FOLDER):
+    blobs = policy.call(
+        lambda timeout: list(
+            bucket.list_blobs(prefix=PROJECTS_FOLDER, timeout=timeout, retry=None)
+        ),
+        f"{OPMON_BUCKET_NAME}/{PROJECTS_FOLDER}",
+    )
+    for blob in blobs:
         # The folder itself is not a project file
         if blob.name == PROJECTS_FOLDER:
             continue
 
-        om_project, project_last_modified = _download_json_file(
-            PROD_PROJECT, bucket, blob.name
-        )
+        with span("fetch_opmon_project", "network", blob=blob.name):
+            om_project, project_last_modified = policy.call(
+                partial(_download_json_file, PROD_PROJECT, bucket, blob.name),
+                blob.name,
+            )
         table_prefix = _normalize_slug(om_project["slug"])
         project_name = om_project["name"].lower()
         branches = om_project.get("branches", ["enabled", "disabled"])
@@ -125,6 +161,7 @@ def _get_opmon_views_and_explores():
 
 def _get_glean_apps(
     app_listings_uri: str,
+    retry_policy: Optional[RetryPolicy] = None,
 ) -> List[Dict[str, Union[str, List[Dict[str, str]]]]]:
     # define key function and reuse it for sorted and groupby
     if app_listings_uri.startswith(PROBE_INFO_BASE_URI):
@@ -132,9 +169,11 @@ def _get_glean_apps(
         app_listings_uri += f"?t={datetime.utcnow().isoformat()}"
 
     get_app_name = itemgetter("app_name")
-    with urllib.request.urlopen(app_listings_uri) as f:
-        # groupby requires input be sorted by key to produce one result per key
-        app_listings = sorted(json.loads(gzip.decompress(f.read())), key=get_app_name)
+    with span("fetch_app_listings", "network", uri=app_listings_uri) as attrs:
+        content = (retry_policy or RetryPolicy()).read_uri(app_listings_uri)
+        attrs["bytes"] = len(content)
+    # groupby requires input be sorted by key to produce one result per key
+    app_listings = sorted(json.loads(gzip.decompress(content)), key=get_app_name)
 
     apps = []
     for app_name, group in groupby(app_listings, get_app_name):
@@ -192,7 +231,7 @@ def _get_glean_apps(
 
 def _get_looker_views(
     app: Dict[str, Union[str, List[Dict[str, str]]]],
-    db_views: Dict[str, Dict[str, List[List[str]]]],
+    db_views: DbViews,
 ) -> List[View]:
     views, view_names = [], []
 
@@ -222,6 +261,55 @@ def _get_explores(views: List[View]) -> dict:
     return explores
 
 
+index_option = click.option(
+    "--index",
+    is_flag=True,
+    default=False,
+    help="Also write namespaces.yaml.index with the byte range of each namespace, "
+    "so that lookml --select only parses the selected namespaces",
+)
+
+compact_option = click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Write equal tables of views in a namespace once, and refer to them with "
+    "yaml aliases",
+)
+
+generated_sql_dir_option = click.option(
+    "--generated-sql-dir",
+    type=click.Path(exists=True, file_okay=False),
+    default=None,
+    help="Path to a local checkout of the bigquery-etl generated-sql branch, which "
+    "is used instead of --generated-sql-uri",
+)
+
+generated_sql_index_option = click.option(
+    "--generated-sql-index",
+    type=click.Path(dir_okay=False, writable=True),
+    default=DEFAULT_INDEX,
+    help="Path to an index of the metadata files of --generated-sql-dir, so that "
+    "only files that changed since the previous run are parsed",
+)
+
+allowlist_option = click.option(
+    "--allowlist",
+    type=click.File(),
+    default=None,
+    help="Path to a namespace allow list. If set, only namespaces listed in it "
+    "are generated",
+)
+
+catalog_option = click.option(
+    "--catalog",
+    is_flag=True,
+    default=False,
+    help=f"Also write {CATALOG_NAME}, a SQLite catalog of namespaces, views, "
+    "explores, tables and owners, which lookml copies to its output",
+)
+
+
 @click.command(help=__doc__)
 @click.option(
     "--custom-namespaces",
@@ -235,6 +323,8 @@ def _get_explores(views: List[View]) -> dict:
     help="URI of a tar archive of the bigquery-etl generated-sql branch, which is "
     "used to list views and determine whether they reference stable tables",
 )
+@generated_sql_dir_option
+@generated_sql_index_option
 @click.option(
     "--app-listings-uri",
     default="https://probeinfo.telemetry.mozilla.org/v2/glean/app-listings",
@@ -246,17 +336,130 @@ def _get_explores(views: List[View]) -> dict:
     default="namespaces-disallowlist.yaml",
     help="Path to namespace disallow list",
 )
-def namespaces(custom_namespaces, generated_sql_uri, app_listings_uri, disallowlist):
+@allowlist_option
+@index_option
+@compact_option
+@catalog_option
+@select_option
+@retry_policy_option
+@trace_option
+@metrics_option
+@memory_report_option
+def namespaces(
+    custom_namespaces,
+    generated_sql_uri,
+    generated_sql_dir,
+    generated_sql_index,
+    app_listings_uri,
+    disallowlist,
+    allowlist,
+    index,
+    compact,
+    catalog,
+    selection,
+    retry_policy,
+):
     """Generate namespaces.yaml."""
+    _namespaces = _get_namespaces(
+        custom_namespaces,
+        generated_sql_uri,
+        app_listings_uri,
+        disallowlist,
+        selection,
+        allowlist,
+        retry_policy,
+        generated_sql_dir,
+        generated_sql_index,
+    )
+    _write_namespaces(_namespaces, index, compact, catalog)
+
+
+def _get_namespaces(
+    custom_namespaces,
+    generated_sql_uri,
+    app_listings_uri,
+    disallowlist,
+    selection,
+    allowlist=None,
+    retry_policy: Optional[RetryPolicy] = None,
+    generated_sql_dir: Optional[str] = None,
+    generated_sql_index: Optional[str] = DEFAULT_INDEX,
+) -> dict:
+    """Get namespaces from Glean apps and custom namespaces, except disallowed ones.
+
+    Namespaces that are disallowed or not in the allowlist are dropped before
+    their views and explores are generated, as are Glean apps that a custom
+    namespace replaces with glean_app: false.
+
+    If there is a selection, only selected namespaces, views and explores are
+    generated, and are merged into those in the existing namespaces.yaml.
+
+    Remote inputs are fetched concurrently, with retry_policy. Views are read
+    from generated_sql_dir instead of generated_sql_uri if it's set.
+    """
     warnings.filterwarnings("ignore", module="google.auth._default")
-    glean_apps = _get_glean_apps(app_listings_uri)
-    db_views = _get_db_views(generated_sql_uri)
+    is_allowed = _get_namespace_filter(disallowlist, allowlist)
+
+    def is_generated(namespace: str) -> bool:
+        return is_allowed(namespace) and (
+            selection is None or selection.includes_namespace(namespace)
+        )
+
+    replaced = set()
+    if custom_namespaces is not None:
+        custom_namespaces = {
+            name: defn
+            for name, defn in (safe_load(custom_namespaces.read()) or {}).items()
+            if is_generated(name)
+        }
+        # Glean views and explores of these would be discarded by _merge_namespaces
+        replaced = {
+            name
+            for name, defn in custom_namespaces.items()
+            if isinstance(defn, Mapping) and defn.get("glean_app") is False
+        }
+
+    # these are independent, so fetching takes as long as the slowest of them
+    fetches: Dict[str, Callable[[], Any]] = {
+        "glean_apps": partial(_get_glean_apps, app_listings_uri, retry_policy)
+    }
+    if generated_sql_dir is None:
+        fetches["generated_sql"] = partial(
+            _fetch_generated_sql, generated_sql_uri, retry_policy
+        )
+    else:
+        # scanning a checkout is cheap once it's indexed, so it isn't skipped
+        # when no Glean app is generated
+        fetches["db_views"] = partial(
+            scan_checkout,
+            Path(generated_sql_dir),
+            None if generated_sql_index is None else Path(generated_sql_index),
+        )
+    if custom_namespaces is not None and "operational_monitoring" in custom_namespaces:
+        fetches["opmon"] = partial(_get_opmon_views_and_explores, retry_policy)
+    with prefetch(fetches) as fetched:
+        glean_apps = [
+            app
+            for app in fetched["glean_apps"].result()
+            if is_generated(str(app["name"])) and app["name"] not in replaced
+        ]
+        checkpoint("get_glean_apps")
+        # views of Glean apps are found in generated-sql, which isn't parsed
+        # when only custom namespaces are generated
+        if generated_sql_dir is None:
+            generated_sql = fetched.pop("generated_sql").result()
+            db_views = parse_archive(generated_sql) if glean_apps else {}
+        else:
+            db_views = fetched.pop("db_views").result()
+        checkpoint("get_db_views")
+        opmon = fetched["opmon"].result() if "opmon" in fetches else None
 
     namespaces = {}
     for app in glean_apps:
-        looker_views = _get_looker_views(app, db_views)
-        explores = _get_explores(looker_views)
-        views_as_dict = {view.name: view.as_dict() for view in looker_views}
+        with span("get_namespace", namespace=app["name"]):
+            looker_views = _get_looker_views(app, db_views)
+            explores = _get_explores(looker_views)
+            views_as_dict = {view.name: view.as_dict() for view in looker_views}
 
         namespaces[app["name"]] = {
             "owners": app["owners"],
@@ -264,23 +467,39 @@ def namespaces(custom_namespaces, generated_sql_uri, app_listings_uri, disallowl
             "views": views_as_dict,
             "explores": explores,
             "glean_app": True,
+            # so lookml doesn't need to fetch app listings again
+            "v1_name": app["v1_name"],
         }
+    checkpoint("get_namespaces")
 
     if custom_namespaces is not None:
-        custom_namespaces = yaml.safe_load(custom_namespaces.read()) or {}
-        views_and_explores = _get_opmon_views_and_explores()
-        custom_namespaces["operational_monitoring"].update(views_and_explores)
+        if opmon is not None:
+            custom_namespaces["operational_monitoring"].update(opmon)
         _merge_namespaces(namespaces, custom_namespaces)
 
-    disallowed_namespaces = yaml.safe_load(disallowlist.read()) or {}
-
-    updated_namespaces = {}
-    for namespace, _ in namespaces.items():
-        if namespace not in disallowed_namespaces:
-            if "spoke" not in namespaces[namespace]:
-                namespaces[namespace]["spoke"] = DEFAULT_SPOKE
-            if "glean_app" not in namespaces[namespace]:
-                namespaces[namespace]["glean_app"] = False
-            updated_namespaces[namespace] = namespaces[namespace]
-
-    Path("namespaces.yaml").write_text(yaml.safe_dump(updated_namespaces))
+    for defn in namespaces.values():
+        if "spoke" not in defn:
+            defn["spoke"] = DEFAULT_SPOKE
+        if "glean_app" not in defn:
+            defn["glean_app"] = False
+
+    if selection is not None:
+        # merge selected namespaces into those generated previously
+        path = Path("namespaces.yaml")
+        existing = safe_load(path.read_text()) if path.exists() else None
+        namespaces = selection.merge(existing or {}, namespaces)
+
+    return namespaces
+
+
+def _write_namespaces(
+    namespaces: dict, index: bool = False, compact: bool = False, catalog: bool = False
+) -> str:
+    """Write namespaces.yaml, and optionally its catalog, and get its content."""
+    with span("write_namespaces", "io") as attrs:
+        content = write_namespaces(Path("namespaces.yaml"), namespaces, index, compact)
+        attrs["bytes"] = len(content)
+    if catalog:
+        with span("write_catalog", "io"):
+            write_catalog(Path(CATALOG_NAME), namespaces, content)
+    return content
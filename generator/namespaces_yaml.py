@@ -0,0 +1,186 @@
+"""Read and write namespaces.yaml.
+
+The libyaml loader and emitter are used when PyYAML was built with them, which
+is several times faster than the pure Python implementation for large files.
+
+namespaces.yaml may have a sidecar index with the byte range of each
+namespace, so that commands that only need some namespaces can parse only
+their sections of the file.
+
+In the optional compact encoding, views of a namespace with the same tables
+refer to a single list with a yaml anchor and aliases. Aliases are resolved
+by any yaml parser, so readers see the same namespaces as without it.
+"""
+import hashlib
+import json
+import logging
+import re
+from itertools import count
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import yaml
+
+# fall back to the pure Python implementations if libyaml isn't available
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+INDEX_SUFFIX = ".index"
+
+# only tables lists are written with anchors, and scalars that look like
+# anchors are quoted
+ANCHOR_RE = re.compile(r"^( *tables: )([&*])(id\d+)$", re.MULTILINE)
+
+# namespace -> (byte offset, byte length)
+Index = Dict[str, Tuple[int, int]]
+
+
+def safe_load(stream) -> Any:
+    """Parse yaml like yaml.safe_load."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def safe_dump(data, stream=None, Dumper=SafeDumper, **kwargs):
+    """Serialize yaml like yaml.safe_dump."""
+    return yaml.dump(data, stream, Dumper=Dumper, **kwargs)
+
+
+class _ExpandedDumper(SafeDumper):  # type: ignore
+    """Serialize objects that are referenced more than once in full, not as aliases."""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+class _SharedTables(list):
+    """A tables list that views of a namespace share."""
+
+
+class _CompactDumper(SafeDumper):  # type: ignore
+    """Serialize shared tables lists with aliases, and other objects in full.
+
+    Other objects may be referenced by several namespaces, and their anchors
+    wouldn't be unique between sections.
+    """
+
+    def ignore_aliases(self, data):
+        return not isinstance(data, _SharedTables)
+
+
+_CompactDumper.add_representer(_SharedTables, _CompactDumper.represent_list)
+
+
+def share_tables(namespaces: dict) -> dict:
+    """Get namespaces where views of a namespace with equal tables share a list."""
+    shared = {}
+    for name, defn in namespaces.items():
+        tables_lists: Dict[str, Any] = {}
+        views = {}
+        for view_name, view in defn.get("views", {}).items():
+            # empty lists are written in flow style, and aren't worth sharing
+            if view.get("tables"):
+                key = json.dumps(view["tables"], sort_keys=True, default=str)
+                if key not in tables_lists:
+                    tables_lists[key] = _SharedTables(view["tables"])
+                view = {**view, "tables": tables_lists[key]}
+            views[view_name] = view
+        shared[name] = {**defn, "views": views} if "views" in defn else defn
+    return shared
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def dump_namespaces(namespaces: dict, compact: bool = False) -> Tuple[str, Index]:
+    """Serialize namespaces, and get the byte range of each namespace.
+
+    Namespaces are serialized one at a time so that each can be parsed on its
+    own. Since top-level keys are sorted and written in block style, the result
+    is the same as serializing all namespaces at once.
+    """
+    if not namespaces:
+        return safe_dump(namespaces), {}
+    if compact:
+        namespaces = share_tables(namespaces)
+    dumper = _CompactDumper if compact else _ExpandedDumper
+    anchor_ids = count(1)
+    sections, index, offset = [], {}, 0
+    for name in sorted(namespaces):
+        section = safe_dump({name: namespaces[name]}, Dumper=dumper)
+        if compact:
+            section = _rename_anchors(section, anchor_ids)
+        size = len(section.encode())
+        sections.append(section)
+        index[name] = (offset, size)
+        offset += size
+    return "".join(sections), index
+
+
+def _rename_anchors(section: str, anchor_ids: Iterator[int]) -> str:
+    """Give the anchors of a section names that are unique between sections.
+
+    Anchor names restart for each section, but may not be repeated in a file.
+    """
+    names: Dict[str, str] = {}
+
+    def rename(match):
+        prefix, indicator, anchor = match.groups()
+        if indicator == "&":
+            names[anchor] = f"tables{next(anchor_ids):03d}"
+        return f"{prefix}{indicator}{names[anchor]}"
+
+    return ANCHOR_RE.sub(rename, section)
+
+
+def write_namespaces(
+    path: Path, namespaces: dict, index: bool = False, compact: bool = False
+) -> str:
+    """Write namespaces to path, and optionally an index of it, and get its content.
+
+    An existing index is removed if no index is written, so it can't go stale.
+    """
+    content, offsets = dump_namespaces(namespaces, compact)
+    path.write_text(content)
+    index_path = _index_path(path)
+    if index:
+        index_path.write_text(
+            json.dumps({"sha256": _content_hash(content), "namespaces": offsets})
+        )
+    elif index_path.exists():
+        index_path.unlink()
+    return content
+
+
+def read_index(path: Path, content: str) -> Optional[Index]:
+    """Get the index of the namespaces.yaml at path, if it has one for content."""
+    index_path = _index_path(path)
+    if not index_path.exists():
+        return None
+    index = json.loads(index_path.read_text())
+    if index.get("sha256") != _content_hash(content):
+        logging.warning(f"Ignoring {index_path}, which doesn't match {path}")
+        return None
+    return {name: (start, size) for name, (start, size) in index["namespaces"].items()}
+
+
+def load_namespaces(
+    content: str, index: Optional[Index] = None, names: Optional[Iterable[str]] = None
+) -> dict:
+    """Parse namespaces, or only those in names if there is an index."""
+    if index is None or names is None:
+        return safe_load(content)
+    data = content.encode()
+    namespaces = {}
+    for name in names:
+        start, size = index[name]
+        section = safe_load(data[start : start + size])
+        if not isinstance(section, dict) or list(section) != [name]:
+            logging.warning("Index doesn't match namespaces, parsing all of them")
+            return safe_load(content)
+        namespaces.update(section)
+    return namespaces
@@ -0,0 +1,131 @@
+"""Generate namespaces.yaml and lookml in a single process.
+
+This is equivalent to running `namespaces` and then `lookml`, except that
+namespaces are passed to lookml generation in memory, so namespaces.yaml is
+not parsed again and Glean app listings are only fetched once.
+"""
+from pathlib import Path
+
+import click
+
+from .archive import _get_format
+from .catalog import CATALOG_NAME
+from .fetch import retry_policy_option
+from .lookml import DEFAULT_WORKERS, _write_lookml, field_index_option
+from .memory import memory_report_option
+from .metrics import metrics_option
+from .namespaces import (
+    _get_namespaces,
+    _write_namespaces,
+    allowlist_option,
+    catalog_option,
+    compact_option,
+    generated_sql_dir_option,
+    generated_sql_index_option,
+    index_option,
+)
+from .selection import select_option
+from .tracing import trace_option
+
+
+@click.command(help=__doc__)
+@click.option(
+    "--custom-namespaces",
+    default="custom-namespaces.yaml",
+    type=click.File(),
+    help="Path to a custom namespaces file",
+)
+@click.option(
+    "--generated-sql-uri",
+    default="https://github.com/mozilla/bigquery-etl/archive/generated-sql.tar.gz",
+    help="URI of a tar archive of the bigquery-etl generated-sql branch, which is "
+    "used to list views and determine whether they reference stable tables",
+)
+@generated_sql_dir_option
+@generated_sql_index_option
+@click.option(
+    "--app-listings-uri",
+    default="https://probeinfo.telemetry.mozilla.org/v2/glean/app-listings",
+    help="URI for probeinfo service v2 glean app listings",
+)
+@click.option(
+    "--disallowlist",
+    type=click.File(),
+    default="namespaces-disallowlist.yaml",
+    help="Path to namespace disallow list",
+)
+@allowlist_option
+@click.option(
+    "--target-dir",
+    default="looker-hub/",
+    type=click.Path(),
+    help="Path to a directory where lookml will be written",
+)
+@click.option(
+    "--output-archive",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Path to write lookml to as a single archive instead of --target-dir",
+)
+@click.option(
+    "--workers",
+    default=DEFAULT_WORKERS,
+    type=click.IntRange(min=1),
+    help="Number of views and explores to generate concurrently",
+)
+@field_index_option
+@index_option
+@compact_option
+@catalog_option
+@select_option
+@retry_policy_option
+@trace_option
+@metrics_option
+@memory_report_option
+def all_command(
+    custom_namespaces,
+    generated_sql_uri,
+    generated_sql_dir,
+    generated_sql_index,
+    app_listings_uri,
+    disallowlist,
+    allowlist,
+    target_dir,
+    output_archive,
+    workers,
+    field_index,
+    index,
+    compact,
+    catalog,
+    selection,
+    retry_policy,
+):
+    """Generate namespaces.yaml and lookml."""
+    if output_archive is not None:
+        # fail before generating anything if the format isn't supported
+        _get_format(Path(output_archive))
+    namespaces = _get_namespaces(
+        custom_namespaces,
+        generated_sql_uri,
+        app_listings_uri,
+        disallowlist,
+        selection,
+        allowlist,
+        retry_policy,
+        generated_sql_dir,
+        generated_sql_index,
+    )
+    # namespaces.yaml is still written for update-spoke and content
+    namespaces_content = _write_namespaces(namespaces, index, compact, catalog)
+    _write_lookml(
+        namespaces,
+        namespaces_content,
+        [],
+        target_dir,
+        output_archive,
+        None,
+        selection,
+        workers,
+        Path(CATALOG_NAME) if catalog else None,
+        None if field_index is None else Path(field_index),
+    )
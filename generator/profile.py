@@ -0,0 +1,178 @@
+"""Run another lookml-generator command under a profiler.
+
+For example, `lookml-generator profile lookml --namespaces namespaces.yaml`.
+"""
+import cProfile
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import List, Optional
+
+import click
+
+from .metrics import metrics_option
+from .tracing import trace_option
+
+GENERATOR_DIR = str(Path(__file__).parent)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Periodically sample the stacks of threads, in a background thread.
+
+    Samples are counted by stack, and can be written in the collapsed stack
+    format read by flamegraph.pl and https://speedscope.app
+    """
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None):
+        """Sample the stack of thread_id, or of all other threads, every interval."""
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._thread.ident or (
+                    self.thread_id is not None and thread_id != self.thread_id
+                ):
+                    continue
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if labels:
+                    self.stacks[";".join(reversed(labels))] += 1
+
+    def __enter__(self):
+        """Start sampling."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop sampling."""
+        self._stopped.set()
+        self._thread.join()
+
+    def dump(self, path: Path):
+        """Write samples as collapsed stacks, one line per distinct stack."""
+        with path.open("w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ThreadProfiler:
+    """Profile the calling thread, and threads started while profiling.
+
+    cProfile only profiles the thread that enables it, so each new thread
+    enables a profiler of its own, and their stats are combined.
+    """
+
+    def __init__(self):
+        """Create a profiler of the calling thread."""
+        self.profiles = [cProfile.Profile()]
+        self._lock = threading.Lock()
+
+    def _profile_thread(self, *args):
+        """Start profiling a new thread, replacing this hook for it."""
+        thread_profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(thread_profile)
+        thread_profile.enable()
+
+    def __enter__(self):
+        """Start profiling."""
+        threading.setprofile(self._profile_thread)
+        self.profiles[0].enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop profiling, including threads started since, which have stopped."""
+        self.profiles[0].disable()
+        threading.setprofile(None)  # type: ignore
+
+    def stats(self) -> pstats.Stats:
+        """Get the stats of all profiled threads."""
+        with self._lock:
+            profiles = list(self.profiles)
+        stats = pstats.Stats(profiles[0])
+        for thread_profile in profiles[1:]:
+            stats.add(thread_profile)  # type: ignore
+        return stats
+
+
+def _print_summary(stats: pstats.Stats, top: int):
+    """Print the functions within generator with the highest own time."""
+    rows = [
+        (func, calls, tottime, cumtime)
+        for func, (_, calls, tottime, cumtime, _) in stats.stats.items()  # type: ignore
+        if func[0].startswith(GENERATOR_DIR)
+    ]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    click.echo(f"{'ncalls':>10} {'tottime':>10} {'cumtime':>10}  function", err=True)
+    for (filename, line, name), calls, tottime, cumtime in rows[:top]:
+        location = Path(filename).relative_to(Path(GENERATOR_DIR).parent)
+        click.echo(
+            f"{calls:>10} {tottime:>10.3f} {cumtime:>10.3f}  {location}:{line}({name})",
+            err=True,
+        )
+
+
+@click.command(
+    help=__doc__,
+    context_settings={"ignore_unknown_options": True, "allow_interspersed_args": False},
+)
+@click.option(
+    "--output-dir",
+    default="profile",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="Directory to write <command>.pstats and <command>.collapsed to",
+)
+@click.option(
+    "--top",
+    default=25,
+    type=int,
+    help="Number of functions within generator to summarize",
+)
+@click.option(
+    "--interval",
+    default=0.005,
+    type=float,
+    help="Seconds between stack samples",
+)
+@click.argument("command")
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
+@trace_option
+@metrics_option
+@click.pass_context
+def profile(ctx, output_dir, top, interval, command, args):
+    """Profile a command."""
+    group = ctx.parent.command
+    subcommand = group.get_command(ctx.parent, command)
+    if subcommand is None or subcommand is ctx.command:
+        raise click.BadParameter(f"no command to profile named {command!r}")
+
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    profiler = ThreadProfiler()
+    sampler = StackSampler(interval)
+    try:
+        with sampler, profiler:
+            subcommand.main(list(args), prog_name=command, standalone_mode=False)
+    finally:
+        pstats_path = out_dir / f"{command}.pstats"
+        collapsed_path = out_dir / f"{command}.collapsed"
+        stats = profiler.stats()
+        stats.dump_stats(pstats_path)
+        sampler.dump(collapsed_path)
+        _print_summary(stats, top)
+        click.echo(f"Wrote {pstats_path} and {collapsed_path}", err=True)
@@ -0,0 +1,211 @@
+"""Publish generated LookML as a commit on a branch of a local repository.
+
+The published tree is the tree of the source branch, plus the generated
+files. Objects are written with `git fast-import`, so no working tree is
+checked out or modified, and files that are unchanged reuse their existing
+blobs.
+"""
+import hashlib
+import logging
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import click
+
+from .archive import iter_archive
+from .metrics import metrics_option
+from .tracing import span, trace_option
+
+FILE_MODE = "100644"
+
+# path -> (mode, object id)
+Tree = Dict[str, Tuple[str, str]]
+
+
+def _git(repo: Path, *args: str, input: Optional[bytes] = None) -> bytes:
+    """Run a git command in repo and get its output."""
+    result = subprocess.run(
+        ["git", "-C", str(repo), *args],
+        input=input,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise click.ClickException(
+            f"git {' '.join(args)} failed: {result.stderr.decode().strip()}"
+        )
+    return result.stdout
+
+
+def _resolve(repo: Path, rev: str) -> Optional[str]:
+    """Get the id of the commit rev refers to, if it exists."""
+    try:
+        output = _git(repo, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}")
+    except click.ClickException:
+        return None
+    return output.decode().strip()
+
+
+def _ls_tree(repo: Path, commit: str) -> Tree:
+    """List every file in a commit."""
+    tree: Tree = {}
+    for entry in _git(repo, "ls-tree", "-r", "-z", commit).split(b"\0"):
+        if not entry:
+            continue
+        info, path = entry.split(b"\t", 1)
+        mode, _, object_id = info.decode().split(" ")
+        tree[path.decode()] = (mode, object_id)
+    return tree
+
+
+def _blob_id(content: bytes) -> str:
+    """Get the id git gives a blob with this content."""
+    header = f"blob {len(content)}\0".encode()
+    return hashlib.sha1(header + content).hexdigest()
+
+
+def _quote_path(path: str) -> str:
+    """Quote a path for a fast-import command, if it needs to be."""
+    if path.startswith('"') or "\n" in path:
+        return (
+            '"'
+            + path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            + '"'
+        )
+    return path
+
+
+def _iter_dir(source_dir: Path) -> Iterator[Tuple[str, bytes]]:
+    """Get the name and content of each file in a directory, except .git."""
+    for path in sorted(source_dir.rglob("*")):
+        name = path.relative_to(source_dir)
+        if path.is_file() and ".git" not in name.parts:
+            yield name.as_posix(), path.read_bytes()
+
+
+def publish(
+    repo: Path,
+    files: Mapping[str, bytes],
+    source_branch: str,
+    publish_branch: str,
+    message: str,
+) -> Optional[str]:
+    """Commit the source branch's tree with generated files onto publish_branch.
+
+    The publish branch is created from the source branch if it doesn't exist.
+    Raise ClickException if a generated file would modify a file of the source
+    branch. Return the id of the new commit, or None if nothing changed.
+    """
+    source = _resolve(repo, source_branch)
+    if source is None:
+        raise click.ClickException(f"source branch {source_branch} doesn't exist")
+    publish_ref = f"refs/heads/{publish_branch}"
+    publish_head = _resolve(repo, publish_ref)
+    parent = publish_head or source
+
+    with span("read_trees", "io"):
+        source_tree = _ls_tree(repo, source)
+        parent_tree = source_tree if parent == source else _ls_tree(repo, parent)
+    known_blobs = {object_id for _, object_id in parent_tree.values()}
+    known_blobs.update(object_id for _, object_id in source_tree.values())
+
+    tree = dict(source_tree)
+    modified = []
+    new_blobs: Dict[str, bytes] = {}
+    for path, content in files.items():
+        blob_id = _blob_id(content)
+        if path in source_tree and source_tree[path][1] != blob_id:
+            modified.append(path)
+        tree[path] = (FILE_MODE, blob_id)
+        if blob_id not in known_blobs:
+            new_blobs[blob_id] = content
+    if modified:
+        raise click.ClickException(
+            f"lookml-generator modified files of {source_branch}: {sorted(modified)}"
+        )
+
+    # only differences from the parent are sent, and only new blobs are written
+    commands: List[bytes] = []
+    for path, (mode, blob_id) in sorted(tree.items()):
+        if parent_tree.get(path) == (mode, blob_id):
+            continue
+        if blob_id in new_blobs:
+            content = new_blobs[blob_id]
+            commands.append(f"M {mode} inline {_quote_path(path)}\n".encode())
+            commands.append(f"data {len(content)}\n".encode() + content + b"\n")
+        else:
+            commands.append(f"M {mode} {blob_id} {_quote_path(path)}\n".encode())
+    for path in sorted(set(parent_tree) - set(tree)):
+        commands.append(f"D {_quote_path(path)}\n".encode())
+    if not commands:
+        if publish_head is None:
+            _git(repo, "update-ref", publish_ref, source)
+        logging.info(f"Nothing to publish to {publish_branch}")
+        return None
+
+    committer = _git(repo, "var", "GIT_COMMITTER_IDENT").decode().strip()
+    encoded_message = message.encode()
+    stream = b"".join(
+        [
+            f"commit {publish_ref}\n".encode(),
+            f"committer {committer}\n".encode(),
+            f"data {len(encoded_message)}\n".encode() + encoded_message + b"\n",
+            f"from {parent}\n".encode(),
+            *commands,
+            b"\n",
+        ]
+    )
+    with span("fast_import", "io", blobs=len(new_blobs), bytes=len(stream)):
+        _git(repo, "fast-import", "--quiet", input=stream)
+    commit = _resolve(repo, publish_ref)
+    logging.info(f"Published {commit} to {publish_branch} with {len(new_blobs)} blobs")
+    return commit
+
+
+@click.command(help=__doc__)
+@click.option(
+    "--repo",
+    default="looker-hub",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    help="Path to the local repository to publish to, which may be bare",
+)
+@click.option(
+    "--target-dir",
+    default=None,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    help="Path to a directory of generated lookml",
+)
+@click.option(
+    "--archive",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Path to an archive of generated lookml, from lookml --output-archive",
+)
+@click.option(
+    "--source-branch",
+    default="base",
+    help="Branch with files that are published alongside generated files",
+)
+@click.option(
+    "--publish-branch",
+    default="main-nonprod",
+    help="Branch to commit to, which is created from the source branch if needed",
+)
+@click.option(
+    "--message",
+    default="Auto-push from LookML generation",
+    help="Commit message",
+)
+@trace_option
+@metrics_option
+def publish_command(repo, target_dir, archive, source_branch, publish_branch, message):
+    """Publish generated lookml to a branch."""
+    if (target_dir is None) == (archive is None):
+        raise click.UsageError("Exactly one of --target-dir or --archive is required")
+    if archive is not None:
+        files = dict(iter_archive(Path(archive)))
+    else:
+        files = dict(_iter_dir(Path(target_dir)))
+    commit = publish(Path(repo), files, source_branch, publish_branch, message)
+    click.echo(commit or "Nothing to commit")
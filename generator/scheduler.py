@@ -0,0 +1,83 @@
+"""Run a graph of dependent tasks on a pool of worker threads."""
+import heapq
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+
+@dataclass
+class Task:
+    """A unit of work that may only start once its dependencies are done."""
+
+    key: Hashable
+    run: Callable[[], Any]
+    dependencies: Sequence[Hashable] = field(default_factory=list)
+
+
+def run_tasks(
+    tasks: Sequence[Task],
+    workers: int,
+    on_done: Optional[Callable[[Task, Any], None]] = None,
+) -> Dict[Hashable, Any]:
+    """Run tasks as soon as their dependencies are done, and get their results.
+
+    Dependencies that aren't keys of tasks are assumed to be done already.
+    Tasks that are ready at the same time are started in the order they are
+    given, and on_done is called from the calling thread in the order tasks
+    finish. If any tasks fail, no more tasks are started, and the error of
+    the first failed task in the given order is raised once running tasks
+    are done. With a single worker, tasks run in the calling thread.
+    """
+    order = {task.key: i for i, task in enumerate(tasks)}
+    if len(order) != len(tasks):
+        raise ValueError("task keys must be unique")
+    waiting_on = {
+        task.key: {key for key in task.dependencies if key in order} for task in tasks
+    }
+    dependents: Dict[Hashable, List[Hashable]] = {task.key: [] for task in tasks}
+    for key, dependencies in waiting_on.items():
+        for dependency in dependencies:
+            dependents[dependency].append(key)
+
+    ready = [order[key] for key, dependencies in waiting_on.items() if not dependencies]
+    heapq.heapify(ready)
+    results: Dict[Hashable, Any] = {}
+    errors: Dict[int, BaseException] = {}
+    running: Dict[Future, Task] = {}
+
+    def finish(task: Task, result: Any):
+        results[task.key] = result
+        if on_done is not None:
+            on_done(task, result)
+        for dependent in dependents[task.key]:
+            waiting_on[dependent].discard(task.key)
+            if not waiting_on[dependent]:
+                heapq.heappush(ready, order[dependent])
+
+    if workers == 1:
+        # run in the calling thread, which profilers of the command sample
+        while ready:
+            task = tasks[heapq.heappop(ready)]
+            finish(task, task.run())
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while ready or running:
+                while ready and not errors and len(running) < workers:
+                    task = tasks[heapq.heappop(ready)]
+                    running[executor.submit(task.run)] = task
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: order[running[f].key]):
+                    task = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        errors[order[task.key]] = error
+                        continue
+                    finish(task, future.result())
+
+    if errors:
+        raise errors[min(errors)]
+    if len(results) != len(tasks):
+        raise ValueError("tasks have circular dependencies")
+    return results
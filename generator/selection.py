@@ -0,0 +1,117 @@
+"""Select a subset of namespaces, views and explores to generate.
+
+Selectors have the form `namespace[/kind[/name]]`, where kind is `views` or
+`explores`, and each part is a glob, e.g. `fenix*` or
+`firefox_desktop/views/metrics`. The parts of selectors prefixed with `re:`
+are regular expressions instead, e.g. `re:fenix|focus_android/explores`.
+Missing parts match everything.
+"""
+import re
+from fnmatch import translate
+from typing import Dict, List, Optional, Pattern, Sequence
+
+import click
+
+KINDS = ("views", "explores")
+
+
+class Selection:
+    """Namespaces, views and explores matched by any of a list of selectors."""
+
+    def __init__(self, selectors: Sequence[str]):
+        """Parse selectors."""
+        # as given, so that the selection can be recorded and parsed again
+        self.raw_selectors = list(selectors)
+        self.selectors: List[List[Pattern]] = []
+        for selector in selectors:
+            is_regex = selector.startswith("re:")
+            parts = (
+                selector[len("re:") :].split("/") if is_regex else selector.split("/")
+            )
+            if len(parts) > 3 or not all(parts):
+                raise click.BadParameter(
+                    f"{selector!r} is not of the form namespace[/kind[/name]]"
+                )
+            self.selectors.append(
+                [re.compile(part if is_regex else translate(part)) for part in parts]
+            )
+
+    @classmethod
+    def from_option(cls, selectors: Sequence[str]) -> Optional["Selection"]:
+        """Get the selection for a --select option, or None to select everything."""
+        if not selectors:
+            return None
+        return cls(selectors)
+
+    def includes_namespace(self, namespace: str) -> bool:
+        """Check whether anything in a namespace is selected."""
+        return any(parts[0].fullmatch(namespace) for parts in self.selectors)
+
+    def includes_all(self, namespace: str) -> bool:
+        """Check whether a namespace is selected as a whole."""
+        return any(
+            len(parts) == 1 and parts[0].fullmatch(namespace)
+            for parts in self.selectors
+        )
+
+    def includes(self, namespace: str, kind: str, name: str) -> bool:
+        """Check whether a view or explore is selected."""
+        path = (namespace, kind, name)
+        return any(
+            all(pattern.fullmatch(value) for pattern, value in zip(parts, path))
+            for parts in self.selectors
+        )
+
+    def filter(self, namespace: str, kind: str, objects: Dict[str, dict]) -> dict:
+        """Get the selected views or explores of a namespace."""
+        return {
+            name: defn
+            for name, defn in objects.items()
+            if self.includes(namespace, kind, name)
+        }
+
+    def merge(self, existing: Dict[str, dict], selected: Dict[str, dict]) -> dict:
+        """Replace what is selected in existing namespaces with selected ones.
+
+        Namespaces selected as a whole, or new namespaces, are replaced, or
+        removed if they are no longer generated. Otherwise only the selected
+        views and explores are.
+        """
+        merged = dict(existing)
+        for namespace in set(existing) | set(selected):
+            if not self.includes_namespace(namespace):
+                continue
+            if self.includes_all(namespace) or namespace not in existing:
+                if namespace in selected:
+                    merged[namespace] = selected[namespace]
+                else:
+                    merged.pop(namespace, None)
+                continue
+            if namespace not in selected:
+                continue
+
+            defn = dict(existing[namespace])
+            for kind in KINDS:
+                defn[kind] = {
+                    name: obj
+                    for name, obj in existing[namespace].get(kind, {}).items()
+                    if not self.includes(namespace, kind, name)
+                }
+                defn[kind].update(
+                    self.filter(namespace, kind, selected[namespace].get(kind, {}))
+                )
+            merged[namespace] = defn
+        return merged
+
+
+def select_option(command):
+    """Add a --select option to a command function, parsed into a Selection."""
+    return click.option(
+        "--select",
+        "selection",
+        multiple=True,
+        callback=lambda ctx, param, value: Selection.from_option(value),
+        help="Only generate namespaces, views or explores matching a selector of "
+        "the form namespace[/kind[/name]] with glob or re: prefixed regex parts, "
+        "merging them into existing output. May be given multiple times",
+    )(command)
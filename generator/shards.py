@@ -0,0 +1,191 @@
+"""Merge LookML generated in shards into a single tree.
+
+Each shard is generated with `lookml --shard i/N`, and writes the namespaces
+it was assigned, plus a manifest listing them. Merging checks that every
+shard is present and that every namespace was generated exactly once. Shards
+generated with --select are merged into the existing output of target-dir.
+"""
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+
+from .metrics import metrics_option
+from .namespaces_yaml import safe_dump, safe_load
+from .selection import Selection
+from .tracing import span, trace_option
+
+MANIFEST = "shard.yaml"
+
+# relative cost of generating each view type, glean ping views are the most
+# expensive because they fetch probes and generate a dimension per metric
+VIEW_TYPE_COSTS = {
+    "glean_ping_view": 10,
+    "ping_view": 2,
+}
+DEFAULT_VIEW_COST = 1
+
+
+class ShardParamType(click.ParamType):
+    """A shard of a run, given as i/N, where i is from 1 to N."""
+
+    name = "shard"
+
+    def convert(self, value, param, ctx):
+        """Parse a shard into a tuple of (i, N)."""
+        if isinstance(value, tuple):
+            return value
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            self.fail(f"{value!r} is not of the form i/N", param, ctx)
+        if not 1 <= index <= count:
+            self.fail(
+                f"{value!r} is not a shard from 1/{count} to {count}/{count}",
+                param,
+                ctx,
+            )
+        return index, count
+
+
+SHARD = ShardParamType()
+
+
+def _namespace_cost(defn: dict) -> int:
+    """Estimate the cost of generating a namespace from its definition."""
+    cost = 0
+    for view in defn.get("views", {}).values():
+        type_cost = VIEW_TYPE_COSTS.get(view.get("type"), DEFAULT_VIEW_COST)
+        cost += type_cost * max(len(view.get("tables", [])), 1)
+    return cost + len(defn.get("explores", {}))
+
+
+def _partition(namespaces: Dict[str, dict], count: int) -> List[List[str]]:
+    """Deterministically partition namespaces into count shards of similar cost.
+
+    Namespaces are assigned from most to least costly, each to the shard with
+    the least total cost so far.
+    """
+    shards: List[List[str]] = [[] for _ in range(count)]
+    costs = [0] * count
+    by_cost: List[Tuple[int, str]] = sorted(
+        (-_namespace_cost(defn), name) for name, defn in namespaces.items()
+    )
+    for negative_cost, name in by_cost:
+        i = min(range(count), key=lambda i: (costs[i], i))
+        shards[i].append(name)
+        costs[i] -= negative_cost
+    return [sorted(shard) for shard in shards]
+
+
+def _get_shard(namespaces: Dict[str, dict], shard: Tuple[int, int]) -> List[str]:
+    """Get the names of the namespaces in a shard."""
+    index, count = shard
+    return _partition(namespaces, count)[index - 1]
+
+
+def _write_manifest(
+    target: Path,
+    shard: Tuple[int, int],
+    names: List[str],
+    selection: Optional[Selection] = None,
+):
+    """Record the namespaces and files generated by a shard, and its selection."""
+    manifest: Dict[str, Any] = {
+        "shard": "/".join(map(str, shard)),
+        "select": None if selection is None else selection.raw_selectors,
+        "namespaces": {
+            name: sorted(
+                str(path.relative_to(target))
+                for path in (target / name).rglob("*")
+                if path.is_file()
+            )
+            for name in names
+        },
+    }
+    (target / MANIFEST).write_text(safe_dump(manifest))
+
+
+def _merge_shards(shard_dirs: List[Path], target: Path):
+    """Verify that shards are complete, and copy them into target."""
+    manifests = {}
+    selections = set()
+    namespaces_contents = set()
+    for shard_dir in shard_dirs:
+        manifest_path = shard_dir / MANIFEST
+        if not manifest_path.exists():
+            raise click.ClickException(f"{shard_dir} is missing {MANIFEST}")
+        manifest = safe_load(manifest_path.read_text())
+        index, count = SHARD.convert(manifest["shard"], None, None)
+        if index in manifests:
+            raise click.ClickException(f"shard {index}/{count} is given twice")
+        manifests[index] = (shard_dir, count, manifest["namespaces"])
+        selections.add(tuple(manifest.get("select") or ()))
+        namespaces_contents.add((shard_dir / "namespaces.yaml").read_text())
+
+    counts = {count for _, count, _ in manifests.values()}
+    if len(counts) != 1:
+        raise click.ClickException(f"shards are from different runs: {counts}")
+    if len(selections) != 1:
+        raise click.ClickException("shards were generated with different selections")
+    [selectors] = selections
+    selection = Selection.from_option(selectors)
+    [count] = counts
+    missing_shards = set(range(1, count + 1)) - set(manifests)
+    if missing_shards:
+        raise click.ClickException(f"missing shards {sorted(missing_shards)}")
+    if len(namespaces_contents) != 1:
+        raise click.ClickException("shards were generated from different namespaces")
+    [namespaces_content] = namespaces_contents
+
+    # shards declare the namespaces they were generated from in namespaces.yaml,
+    # which doesn't list namespaces that lookml was told to skip, and only
+    # selected ones are generated
+    expected = {
+        name
+        for name in safe_load(namespaces_content) or {}
+        if selection is None or selection.includes_namespace(name)
+    }
+    generated: Dict[str, Path] = {}
+    for shard_dir, _, namespaces in manifests.values():
+        for name, files in namespaces.items():
+            if name in generated:
+                raise click.ClickException(f"{name} was generated by multiple shards")
+            missing_files = [f for f in files if not (shard_dir / f).is_file()]
+            if missing_files:
+                raise click.ClickException(
+                    f"{shard_dir} is missing files for {name}: {missing_files}"
+                )
+            generated[name] = shard_dir
+    missing_namespaces = expected - set(generated)
+    if missing_namespaces:
+        raise click.ClickException(
+            f"namespaces were not generated: {sorted(missing_namespaces)}"
+        )
+
+    target.mkdir(parents=True, exist_ok=True)
+    with span("copy_shards", "io", namespaces=len(generated)):
+        for name, shard_dir in sorted(generated.items()):
+            shutil.copytree(shard_dir / name, target / name, dirs_exist_ok=True)
+        (target / "namespaces.yaml").write_text(namespaces_content)
+
+
+@click.command(help=__doc__)
+@click.option(
+    "--target-dir",
+    default="looker-hub/",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="Path to a directory where merged lookml will be written",
+)
+@click.argument(
+    "shard_dirs",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+)
+@trace_option
+@metrics_option
+def merge_shards(target_dir, shard_dirs):
+    """Merge lookml generated in shards."""
+    _merge_shards([Path(shard_dir) for shard_dir in shard_dirs], Path(target_dir))
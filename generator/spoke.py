@@ -6,12 +6,14 @@ from pathlib import Path
 from typing import Dict, List, TypedDict
 
 import click
-import lkml
 import looker_sdk
-import yaml
 
+from . import lkml_update
 from .content import setup_env_with_looker_creds
 from .lookml import ViewDict
+from .metrics import metrics_option
+from .namespaces_yaml import safe_load
+from .tracing import span, trace_option
 
 MODEL_SETS_BY_INSTANCE: Dict[str, List[str]] = {
     "https://mozilladev.cloud.looker.com": ["mozilla_confidential"],
@@ -67,7 +69,8 @@ def generate_model(
     }
 
     path = spoke_path / name / f"{name}.model.lkml"
-    path.write_text(lkml.dump(model_defn))
+    with span("write_lookml", "io", path=str(path)), path.open("w") as f:
+        lkml_update.dump(model_defn, f)
 
     return path
 
@@ -136,9 +139,10 @@ def generate_directories(
 
         if sdk_setup:
             spoke_project = spoke.lstrip("looker-")
-            sdk = looker_sdk.init31()
-            logging.info("Looker SDK 3.1 initialized successfully.")
-            configure_model(sdk, namespace, db_connection, spoke_project)
+            with span("looker_configure_model", "network", namespace=namespace):
+                sdk = looker_sdk.init31()
+                logging.info("Looker SDK 3.1 initialized successfully.")
+                configure_model(sdk, namespace, db_connection, spoke_project)
 
 
 @click.command(help=__doc__)
@@ -154,8 +158,10 @@ def generate_directories(
     type=click.Path(file_okay=False, dir_okay=True, writable=True),
     help="Directory containing the Looker spoke.",
 )
+@trace_option
+@metrics_option
 def update_spoke(namespaces, spoke_dir):
     """Generate updates to spoke project."""
-    _namespaces = yaml.safe_load(namespaces)
+    _namespaces = safe_load(namespaces)
     sdk_setup = setup_env_with_looker_creds()
     generate_directories(_namespaces, Path(spoke_dir), sdk_setup)
@@ -0,0 +1,132 @@
+"""Record where time goes during generation, as Chrome trace events.
+
+Traces can be loaded into Perfetto (https://ui.perfetto.dev) or speedscope.
+See https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU
+for the trace event format.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import click
+
+
+class Tracer:
+    """Collect spans as complete ("X") trace events."""
+
+    def __init__(self):
+        """Start a trace."""
+        self.events: List[Dict[str, Any]] = []
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+
+    def timestamp(self) -> float:
+        """Get microseconds since the trace started."""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def add(self, name: str, category: str, start: float, attributes: Dict[str, Any]):
+        """Add a span that started at `start` and ends now."""
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": self.timestamp() - start,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": attributes,
+            }
+        )
+
+    def dump(self, path: Path):
+        """Write the trace as JSON."""
+        path.write_text(
+            json.dumps({"traceEvents": self.events, "displayTimeUnit": "ms"})
+        )
+
+
+_tracer: Optional[Tracer] = None
+
+# Called with the name, category, duration in seconds, and attributes of
+# every span that ends, e.g. to aggregate spans into metrics.
+SpanListener = Callable[[str, str, float, Dict[str, Any]], None]
+_listeners: List[SpanListener] = []
+
+
+def add_listener(listener: SpanListener):
+    """Call listener at the end of every span."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener: SpanListener):
+    """Stop calling listener at the end of spans."""
+    _listeners.remove(listener)
+
+
+@contextmanager
+def span(name: str, category: str = "generator", **attributes) -> Iterator[dict]:
+    """Record a span of work, when tracing or listening for spans.
+
+    Yields the span's attributes, so values only known at the end of the
+    span (like a number of bytes) can be added to them.
+    """
+    tracer = _tracer
+    if tracer is None and not _listeners:
+        yield attributes
+        return
+
+    start = time.perf_counter()
+    trace_start = tracer.timestamp() if tracer is not None else 0.0
+    try:
+        yield attributes
+    finally:
+        if tracer is not None:
+            tracer.add(name, category, trace_start, attributes)
+        duration = time.perf_counter() - start
+        for listener in list(_listeners):
+            listener(name, category, duration, attributes)
+
+
+@contextmanager
+def recording(path: Path, name: str) -> Iterator[Tracer]:
+    """Trace everything within this context, then write the trace to path.
+
+    Recordings within a recording, e.g. of a profiled command, add to the
+    trace of the outer one.
+    """
+    global _tracer
+    outer = _tracer
+    tracer = _tracer = outer or Tracer()
+    try:
+        with span(name, "command"):
+            yield tracer
+    finally:
+        if outer is None:
+            _tracer = None
+        tracer.dump(path)
+
+
+def trace_option(command):
+    """Add a --trace option to a command function."""
+
+    @click.option(
+        "--trace",
+        "trace_path",
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        help="Path to write a Chrome trace-event file of this run to",
+    )
+    @functools.wraps(command)
+    def wrapper(*args, trace_path=None, **kwargs):
+        if trace_path is None:
+            return command(*args, **kwargs)
+        with recording(Path(trace_path), command.__name__):
+            return command(*args, **kwargs)
+
+    return wrapper
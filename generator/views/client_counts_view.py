@@ -1,9 +1,9 @@
 """Class to describe a Client Counts View."""
 from __future__ import annotations
 
-from copy import deepcopy
-from typing import Any, Dict, Iterator, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
 
+from . import lookml_utils
 from .view import View, ViewDict
 
 
@@ -12,26 +12,29 @@ class ClientCountsView(View):
 
     type: str = "client_counts_view"
 
-    default_dimension_groups: List[Dict[str, Union[str, List[str]]]] = [
-        {
-            "name": "since_first_seen",
-            "type": "duration",
-            "description": "Amount of time that has passed since the client was first seen.",
-            "sql_start": "CAST(${TABLE}.first_seen_date AS TIMESTAMP)",
-            "sql_end": "CAST(${TABLE}.submission_date AS TIMESTAMP)",
-            "intervals": ["day", "week", "month", "year"],
-        }
-    ]
-
-    default_dimensions: List[Dict[str, str]] = [
-        {
-            "name": "have_completed_period",
-            "type": "yesno",
-            "description": "Only for use with cohort analysis."
-            "Filter on true to remove the tail of incomplete data from cohorts."
-            "Indicates whether the cohort for this row have all had a chance to complete this interval."
-            "For example, new clients from yesterday have not all had a chance to send a ping for today.",
-            "sql": """
+    default_dimension_groups: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "name": "since_first_seen",
+                "type": "duration",
+                "description": "Amount of time that has passed since the client was first seen.",
+                "sql_start": "CAST(${TABLE}.first_seen_date AS TIMESTAMP)",
+                "sql_end": "CAST(${TABLE}.submission_date AS TIMESTAMP)",
+                "intervals": ["day", "week", "month", "year"],
+            }
+        ]
+    )
+
+    default_dimensions: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "name": "have_completed_period",
+                "type": "yesno",
+                "description": "Only for use with cohort analysis."
+                "Filter on true to remove the tail of incomplete data from cohorts."
+                "Indicates whether the cohort for this row have all had a chance to complete this interval."
+                "For example, new clients from yesterday have not all had a chance to send a ping for today.",
+                "sql": """
               DATE_ADD(
                 {% if client_counts.first_seen_date._is_selected %}
                   DATE_ADD(DATE(${client_counts.first_seen_date}), INTERVAL 1 DAY)
@@ -54,16 +57,18 @@ class ClientCountsView(View):
                 {% endif %}
               ) < current_date
               """,
-        }
-    ]
-
-    default_measures: List[Dict[str, Union[str, List[Dict[str, str]]]]] = [
-        {
-            "name": "client_count",
-            "type": "number",
-            "description": "The number of clients, "
-            "determined by whether they sent a baseline ping on the day in question.",
-            "sql": """
+            }
+        ]
+    )
+
+    default_measures: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "name": "client_count",
+                "type": "number",
+                "description": "The number of clients, "
+                "determined by whether they sent a baseline ping on the day in question.",
+                "sql": """
               {% if client_counts.submission_date._is_selected or client_counts.days_since_first_seen._is_selected %}
                 -- This query is grouping on a dimension known to have 1 row per-client
                 COUNT(*)
@@ -72,8 +77,9 @@ class ClientCountsView(View):
                 COUNT(DISTINCT client_id)
               {% endif %}
             """,
-        }
-    ]
+            }
+        ]
+    )
 
     def __init__(self, namespace: str, tables: List[Dict[str, str]]):
         """Get an instance of a ClientCountsView."""
@@ -123,10 +129,8 @@ class ClientCountsView(View):
         }
 
         # add dimensions and dimension groups
-        view_defn["dimensions"] = deepcopy(ClientCountsView.default_dimensions)
-        view_defn["dimension_groups"] = deepcopy(
-            ClientCountsView.default_dimension_groups
-        )
+        view_defn["dimensions"] = list(ClientCountsView.default_dimensions)
+        view_defn["dimension_groups"] = list(ClientCountsView.default_dimension_groups)
 
         # add measures
         view_defn["measures"] = self.get_measures()
@@ -136,6 +140,6 @@ class ClientCountsView(View):
             "views": [view_defn],
         }
 
-    def get_measures(self) -> List[Dict[str, Union[str, List[Dict[str, str]]]]]:
+    def get_measures(self) -> List[Mapping[str, Any]]:
         """Generate measures for the Growth Accounting Framework."""
-        return deepcopy(ClientCountsView.default_measures)
+        return list(ClientCountsView.default_measures)
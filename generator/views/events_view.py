@@ -1,8 +1,7 @@
 """Class to describe an Events view."""
 from __future__ import annotations
 
-from copy import deepcopy
-from typing import Any, Dict, Iterator, List, Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
 
 from . import lookml_utils
 from .view import View, ViewDict
@@ -13,13 +12,15 @@ class EventsView(View):
 
     type: str = "events_view"
 
-    default_measures: List[Dict[str, str]] = [
-        {
-            "name": "event_count",
-            "type": "count",
-            "description": ("The number of times the event(s) occurred."),
-        },
-    ]
+    default_measures: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "name": "event_count",
+                "type": "count",
+                "description": ("The number of times the event(s) occurred."),
+            },
+        ]
+    )
 
     def __init__(self, namespace: str, tables: List[Dict[str, str]]):
         """Get an instance of an EventsView."""
@@ -77,9 +78,9 @@ class EventsView(View):
             "views": [view_defn],
         }
 
-    def get_measures(self, dimensions) -> List[Dict[str, str]]:
+    def get_measures(self, dimensions) -> List[Mapping[str, Any]]:
         """Generate measures for Events Views."""
-        measures = deepcopy(EventsView.default_measures)
+        measures = list(EventsView.default_measures)
         client_id_field = self.get_client_id(dimensions, "events")
         if client_id_field is not None:
             measures.append(
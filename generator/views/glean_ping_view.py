@@ -1,13 +1,16 @@
 """Class to describe a Glean Ping View."""
 import logging
-from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
 from textwrap import dedent
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import click
-from mozilla_schema_generator.glean_ping import GleanPing
 from mozilla_schema_generator.probes import GleanProbe
 
+from .. import glean_probes
+from ..tracing import span
+from . import lookml_utils
 from .ping_view import PingView
 
 DISTRIBUTION_TYPES = {
@@ -34,12 +37,41 @@ ALLOWED_TYPES = DISTRIBUTION_TYPES | {
 DISALLOWED_PINGS = {"events"}
 
 
+@dataclass
+class GleanViewContext:
+    """State shared by every step of generating LookML for a Glean view.
+
+    The schema, the probes and the derived dimensions are expensive to fetch
+    and compute, so they are built once per view and table.
+    """
+
+    bq_client: Any
+    table: str
+    v1_name: Optional[str]
+    metrics: List[GleanProbe]
+    dimensions: List[Dict[str, Any]]
+    client_id_field: Optional[str]
+
+    def matches(self, bq_client, table: str, v1_name: Optional[str]) -> bool:
+        """Check whether this context was built for these inputs."""
+        return (
+            self.bq_client is bq_client
+            and self.table == table
+            and self.v1_name == v1_name
+        )
+
+
 class GleanPingView(PingView):
     """A view on a ping table for an application using the Glean SDK."""
 
     type: str = "glean_ping_view"
     allow_glean: bool = True
 
+    def __init__(self, namespace: str, name: str, tables: List[Dict[str, str]]):
+        """Create instance of a GleanPingView."""
+        super().__init__(namespace, name, tables)
+        self._context: Optional[GleanViewContext] = None
+
     @classmethod
     def from_db_views(klass, *args, **kwargs):
         """Generate GleanPingViews from db views."""
@@ -47,121 +79,127 @@ class GleanPingView(PingView):
             if view.name not in DISALLOWED_PINGS:
                 yield view
 
-    def to_lookml(self, bq_client, v1_name: Optional[str]) -> Dict[str, Any]:
+    def iter_lookml(self, bq_client, v1_name: Optional[str]) -> Dict[str, Any]:
         """Generate LookML for this view.
 
         The Glean views include a labeled metrics, which need to be joined
         against the view in the explore.
         """
-        lookml = super().to_lookml(bq_client, v1_name)
-
-        # iterate over all of the glean metrics and generate views for unnested
-        # fields as necessary. Append them to the list of existing view
-        # definitions.
         table = next(
             (table for table in self.tables if table.get("channel") == "release"),
             self.tables[0],
         )["table"]
-        dimensions = self.get_dimensions(bq_client, table, v1_name)
+        context = self._get_context(bq_client, table, v1_name)
 
-        client_id_field = self.get_client_id(dimensions, table)
+        lookml = super().iter_lookml(bq_client, v1_name)
+        lookml["views"] = chain(lookml["views"], self._get_labeled_views(context))
+        return lookml
 
-        view_definitions = []
-        metrics = self._get_glean_metrics(v1_name)
-        for metric in metrics:
-            if metric.type == "labeled_counter":
-                looker_name = self._to_looker_name(metric)
-                view_name = f"{self.name}__{looker_name}"
-                suggest_name = f"suggest__{view_name}"
-
-                category, name = [
-                    v.replace("_", " ").title()
-                    for v in self._get_category_and_name(metric)
-                ]
-                view_label = f"{category} - {name}"
-                metric_hidden = "no" if metric.is_in_source() else "yes"
-
-                join_view = {
-                    "name": view_name,
-                    "label": view_label,
-                    "dimensions": [
-                        {
-                            "name": "document_id",
-                            "type": "string",
-                            "sql": f"${{{self.name}.document_id}}",
-                            "hidden": "yes",
-                        },
-                        # labeled counters need a primary key that incorporates
-                        # their labels, otherwise we get jumbled results:
-                        # https://github.com/mozilla/lookml-generator/issues/171
-                        {
-                            "name": "document_label_id",
-                            "type": "string",
-                            "sql": f"${{{self.name}.document_id}}-${{label}}",
-                            "primary_key": "yes",
-                            "hidden": "yes",
-                        },
-                        {
-                            "name": "label",
-                            "type": "string",
-                            "sql": "${TABLE}.key",
-                            "suggest_explore": suggest_name,
-                            "suggest_dimension": f"{suggest_name}.key",
-                            "hidden": metric_hidden,
-                        },
-                        {
-                            "name": "value",
-                            "type": "number",
-                            "sql": "${TABLE}.value",
-                            "hidden": "yes",
-                        },
-                    ],
-                    "measures": [
-                        {
-                            "name": "count",
-                            "type": "sum",
-                            "sql": "${value}",
-                            "hidden": metric_hidden,
-                        },
-                        {
-                            "name": "client_count",
-                            "type": "count_distinct",
-                            "sql": f"case when ${{value}} > 0 then ${{{self.name}.{client_id_field}}} end",
-                            "hidden": metric_hidden,
-                        },
-                    ],
-                }
-                suggest_view = {
-                    "name": suggest_name,
-                    "derived_table": {
-                        "sql": dedent(
-                            f"""
-                            select
-                                m.key,
-                                count(*) as n
-                            from {table} as t,
-                            unnest(metrics.{metric.type}.{metric.id.replace(".", "_")}) as m
-                            where date(submission_timestamp) > date_sub(current_date, interval 30 day)
-                                and sample_id = 0
-                            group by key
-                            order by n desc
-                            """
-                        )
-                    },
-                    "dimensions": [
-                        {"name": "key", "type": "string", "sql": "${TABLE}.key"}
-                    ],
-                }
-                view_definitions += [join_view, suggest_view]
-        # deduplicate view definitions, because somehow a few entries make it in
+    def _get_labeled_views(self, context: GleanViewContext) -> Iterator[Dict[str, Any]]:
+        """Generate views for unnested labeled counters, sorted by name."""
+        # deduplicate metrics, because somehow a few entries make it in
         # twice e.g. metrics__metrics__labeled_counter__media_audio_init_failure
-        view_definitions = sorted(
-            {v["name"]: v for v in view_definitions}.values(), key=lambda x: x["name"]  # type: ignore
+        labeled_counters = {
+            f"{self.name}__{self._to_looker_name(metric)}": metric
+            for metric in context.metrics
+            if metric.type == "labeled_counter"
+        }
+        # only names are sorted, views are built as they are written
+        view_names = sorted(
+            [(view_name, False) for view_name in labeled_counters]
+            + [(f"suggest__{view_name}", True) for view_name in labeled_counters]
         )
+        for view_name, is_suggest in view_names:
+            if is_suggest:
+                metric = labeled_counters[view_name[len("suggest__") :]]
+                yield self._get_suggest_view(view_name, metric, context.table)
+            else:
+                metric = labeled_counters[view_name]
+                yield self._get_join_view(view_name, metric, context.client_id_field)
+
+    def _get_join_view(
+        self, view_name: str, metric: GleanProbe, client_id_field: Optional[str]
+    ) -> Dict[str, Any]:
+        suggest_name = f"suggest__{view_name}"
+        category, name = [
+            v.replace("_", " ").title() for v in self._get_category_and_name(metric)
+        ]
+        view_label = f"{category} - {name}"
+        metric_hidden = "no" if metric.is_in_source() else "yes"
 
-        lookml["views"] += view_definitions
+        return {
+            "name": view_name,
+            "label": view_label,
+            "dimensions": [
+                {
+                    "name": "document_id",
+                    "type": "string",
+                    "sql": f"${{{self.name}.document_id}}",
+                    "hidden": "yes",
+                },
+                # labeled counters need a primary key that incorporates
+                # their labels, otherwise we get jumbled results:
+                # https://github.com/mozilla/lookml-generator/issues/171
+                {
+                    "name": "document_label_id",
+                    "type": "string",
+                    "sql": f"${{{self.name}.document_id}}-${{label}}",
+                    "primary_key": "yes",
+                    "hidden": "yes",
+                },
+                {
+                    "name": "label",
+                    "type": "string",
+                    "sql": "${TABLE}.key",
+                    "suggest_explore": suggest_name,
+                    "suggest_dimension": f"{suggest_name}.key",
+                    "hidden": metric_hidden,
+                },
+                {
+                    "name": "value",
+                    "type": "number",
+                    "sql": "${TABLE}.value",
+                    "hidden": "yes",
+                },
+            ],
+            "measures": [
+                {
+                    "name": "count",
+                    "type": "sum",
+                    "sql": "${value}",
+                    "hidden": metric_hidden,
+                },
+                {
+                    "name": "client_count",
+                    "type": "count_distinct",
+                    "sql": f"case when ${{value}} > 0 then ${{{self.name}.{client_id_field}}} end",
+                    "hidden": metric_hidden,
+                },
+            ],
+        }
 
-        return lookml
+    def _get_suggest_view(
+        self, suggest_name: str, metric: GleanProbe, table: str
+    ) -> Dict[str, Any]:
+        return {
+            "name": suggest_name,
+            "derived_table": {
+                "sql": dedent(
+                    f"""
+                    select
+                        m.key,
+                        count(*) as n
+                    from {table} as t,
+                    unnest(metrics.{metric.type}.{metric.id.replace(".", "_")}) as m
+                    where date(submission_timestamp) > date_sub(current_date, interval 30 day)
+                        and sample_id = 0
+                    group by key
+                    order by n desc
+                    """
+                )
+            },
+            "dimensions": [{"name": "key", "type": "string", "sql": "${TABLE}.key"}],
+        }
 
     def _get_links(self, dimension: dict) -> List[Dict[str, str]]:
         """Get a link annotation given a metric name."""
@@ -194,12 +232,12 @@ class GleanPingView(PingView):
             )
             return []
 
-        repo = next((r for r in GleanPing.get_repos() if r["name"] == v1_name))
-        glean_app = GleanPing(repo)
+        with span("fetch_probes", "network", namespace=self.namespace, view=self.name):
+            probes = glean_probes.get_probes(v1_name)
 
         ping_probes = []
         probe_ids = set()
-        for probe in glean_app.get_probes():
+        for probe in probes:
             send_in_pings_snakecase = [
                 ping.replace("-", "_") for ping in probe.definition["send_in_pings"]
             ]
@@ -302,13 +340,12 @@ class GleanPingView(PingView):
             yield self._make_dimension(metric, "", sql_map)
 
     def _get_glean_metric_dimensions(
-        self, all_fields: List[dict], v1_name: Optional[str]
+        self, all_fields: List[dict], metrics: List[GleanProbe]
     ):
         sql_map = {
             f["name"]: {"sql": f["sql"], "type": f.get("type", "string")}
             for f in all_fields
         }
-        metrics = self._get_glean_metrics(v1_name)
         return [
             dimension
             for metric in metrics
@@ -325,32 +362,79 @@ class GleanPingView(PingView):
 
         return dict(dimension, **annotations)
 
-    def get_dimensions(
-        self, bq_client, table, v1_name: Optional[str]
-    ) -> List[Dict[str, Any]]:
-        """Get the set of dimensions for this view."""
-        all_fields = super().get_dimensions(bq_client, table, v1_name)
-        fields = self._get_glean_metric_dimensions(all_fields, v1_name) + [
+    def _get_context(
+        self, bq_client, table: str, v1_name: Optional[str]
+    ) -> GleanViewContext:
+        """Get the generation context for a table, building it at most once."""
+        if self._context is not None and self._context.matches(
+            bq_client, table, v1_name
+        ):
+            return self._context
+
+        metrics = self._get_glean_metrics(v1_name)
+        all_fields = lookml_utils._generate_dimensions(bq_client, table)
+        fields = self._get_glean_metric_dimensions(all_fields, metrics) + [
             self._add_link(d)
             for d in all_fields
             if not d["name"].startswith("metrics__")
         ]
         # later entries will override earlier entries, if there are duplicates
         field_dict = {f["name"]: f for f in fields}
-        return list(field_dict.values())
+        dimensions = list(field_dict.values())
+
+        self._context = GleanViewContext(
+            bq_client=bq_client,
+            table=table,
+            v1_name=v1_name,
+            metrics=metrics,
+            dimensions=dimensions,
+            client_id_field=super().get_client_id(dimensions, table),
+        )
+        return self._context
+
+    def get_dimensions(
+        self, bq_client, table, v1_name: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Get the set of dimensions for this view."""
+        return self._get_context(bq_client, table, v1_name).dimensions
+
+    def get_client_id(self, dimensions: Iterable[dict], table: str) -> Optional[str]:
+        """Return the first field that looks like a client identifier."""
+        context = self._context
+        if (
+            context is not None
+            and context.table == table
+            and context.dimensions is dimensions
+        ):
+            return context.client_id_field
+        return super().get_client_id(dimensions, table)
 
     def get_measures(
-        self, dimensions: List[dict], table: str, v1_name: Optional[str]
-    ) -> List[Dict[str, Union[str, List[Dict[str, str]]]]]:
-        """Generate measures from a list of dimensions.
+        self, dimensions: Iterable[dict], table: str, v1_name: Optional[str]
+    ) -> Iterator[Dict[str, Union[str, List[Dict[str, str]]]]]:
+        """Generate measures from dimensions, as they are consumed.
 
         When no dimension-specific measures are found, return a single "count" measure.
 
         Raise ClickException if dimensions result in duplicate measures.
         """
-        measures = super().get_measures(dimensions, table, v1_name)
         client_id_field = self.get_client_id(dimensions, table)
-
+        names = set()
+        for measure in chain(
+            super().get_measures(dimensions, table, v1_name),
+            self._get_counter_measures(dimensions, client_id_field),
+        ):
+            # only names are kept to check for duplicates
+            if measure["name"] in names:
+                raise click.ClickException(
+                    f"duplicate measures {[measure['name']]!r} for table {table!r}"
+                )
+            names.add(measure["name"])
+            yield measure
+
+    def _get_counter_measures(
+        self, dimensions: Iterable[dict], client_id_field: Optional[str]
+    ) -> Iterator[Dict[str, Union[str, List[Dict[str, str]]]]]:
         for dimension in dimensions:
             if (
                 self._is_metric(dimension)
@@ -359,28 +443,16 @@ class GleanPingView(PingView):
                 # handle the counters in the metric ping
                 name = self._get_name(dimension)
                 dimension_name = dimension["name"]
-                measures += [
-                    {
-                        "name": name,
-                        "type": "sum",
-                        "sql": f"${{{dimension_name}}}",
-                        "links": self._get_links(dimension),
-                    },
-                    {
-                        "name": f"{name}_client_count",
-                        "type": "count_distinct",
-                        "filters": [{dimension_name: ">0"}],
-                        "sql": f"${{{client_id_field}}}",
-                        "links": self._get_links(dimension),
-                    },
-                ]
-
-        # check if there are any duplicate values
-        names = [measure["name"] for measure in measures]
-        duplicates = [k for k, v in Counter(names).items() if v > 1]
-        if duplicates:
-            raise click.ClickException(
-                f"duplicate measures {duplicates!r} for table {table!r}"
-            )
-
-        return measures
+                yield {
+                    "name": name,
+                    "type": "sum",
+                    "sql": f"${{{dimension_name}}}",
+                    "links": self._get_links(dimension),
+                }
+                yield {
+                    "name": f"{name}_client_count",
+                    "type": "count_distinct",
+                    "filters": [{dimension_name: ">0"}],
+                    "sql": f"${{{client_id_field}}}",
+                    "links": self._get_links(dimension),
+                }
@@ -1,9 +1,8 @@
 """Class to describe a Growth Accounting View."""
 from __future__ import annotations
 
-from copy import deepcopy
 from itertools import filterfalse
-from typing import Any, Dict, Iterator, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
 
 from . import lookml_utils
 from .view import View, ViewDict
@@ -13,204 +12,210 @@ class GrowthAccountingView(View):
     """A view for growth accounting measures."""
 
     type: str = "growth_accounting_view"
-    other_dimensions: List[Dict[str, str]] = [
-        {
-            "name": "first",
-            "sql": "{TABLE}.first",
-            "type": "yesno",
-            "hidden": "yes",
-        }
-    ]
+    other_dimensions: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "name": "first",
+                "sql": "{TABLE}.first",
+                "type": "yesno",
+                "hidden": "yes",
+            }
+        ]
+    )
 
-    default_dimensions: List[Dict[str, str]] = [
-        {
-            "name": "active_this_week",
-            "sql": "mozfun.bits28.active_in_range(days_seen_bits, -6, 7)",
-            "type": "yesno",
-            "hidden": "yes",
-        },
-        {
-            "name": "active_last_week",
-            "sql": "mozfun.bits28.active_in_range(days_seen_bits, -13, 7)",
-            "type": "yesno",
-            "hidden": "yes",
-        },
-        {
-            "name": "new_this_week",
-            "sql": "DATE_DIFF(${submission_date}, first_run_date, DAY) BETWEEN 0 AND 6",
-            "type": "yesno",
-            "hidden": "yes",
-        },
-        {
-            "name": "new_last_week",
-            "sql": "DATE_DIFF(${submission_date}, first_run_date, DAY) BETWEEN 7 AND 13",
-            "type": "yesno",
-            "hidden": "yes",
-        },
-        {
-            "name": "client_id_day",
-            "sql": "CONCAT(CAST(${TABLE}.submission_date AS STRING), client_id)",
-            "type": "string",
-            "hidden": "yes",
-            "primary_key": "yes",
-        },
-    ]
+    default_dimensions: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "name": "active_this_week",
+                "sql": "mozfun.bits28.active_in_range(days_seen_bits, -6, 7)",
+                "type": "yesno",
+                "hidden": "yes",
+            },
+            {
+                "name": "active_last_week",
+                "sql": "mozfun.bits28.active_in_range(days_seen_bits, -13, 7)",
+                "type": "yesno",
+                "hidden": "yes",
+            },
+            {
+                "name": "new_this_week",
+                "sql": "DATE_DIFF(${submission_date}, first_run_date, DAY) BETWEEN 0 AND 6",
+                "type": "yesno",
+                "hidden": "yes",
+            },
+            {
+                "name": "new_last_week",
+                "sql": "DATE_DIFF(${submission_date}, first_run_date, DAY) BETWEEN 7 AND 13",
+                "type": "yesno",
+                "hidden": "yes",
+            },
+            {
+                "name": "client_id_day",
+                "sql": "CONCAT(CAST(${TABLE}.submission_date AS STRING), client_id)",
+                "type": "string",
+                "hidden": "yes",
+                "primary_key": "yes",
+            },
+        ]
+    )
 
-    default_measures: List[Dict[str, Union[str, List[Dict[str, str]]]]] = [
-        {
-            "name": "overall_active_previous",
-            "type": "count",
-            "filters": [{"active_last_week": "yes"}],
-        },
-        {
-            "name": "overall_active_current",
-            "type": "count",
-            "filters": [{"active_this_week": "yes"}],
-        },
-        {
-            "name": "overall_resurrected",
-            "type": "count",
-            "filters": [
-                {"new_last_week": "no"},
-                {"new_this_week": "no"},
-                {"active_last_week": "no"},
-                {"active_this_week": "yes"},
-            ],
-        },
-        {
-            "name": "new_users",
-            "type": "count",
-            "filters": [{"new_this_week": "yes"}, {"active_this_week": "yes"}],
-        },
-        {
-            "name": "established_users_returning",
-            "type": "count",
-            "filters": [
-                {"new_last_week": "no"},
-                {"new_this_week": "no"},
-                {"active_last_week": "yes"},
-                {"active_this_week": "yes"},
-            ],
-        },
-        {
-            "name": "new_users_returning",
-            "type": "count",
-            "filters": [
-                {"new_last_week": "yes"},
-                {"active_last_week": "yes"},
-                {"active_this_week": "yes"},
-            ],
-        },
-        {
-            "name": "new_users_churned_count",
-            "type": "count",
-            "filters": [
-                {"new_last_week": "yes"},
-                {"active_last_week": "yes"},
-                {"active_this_week": "no"},
-            ],
-        },
-        {
-            "name": "established_users_churned_count",
-            "type": "count",
-            "filters": [
-                {"new_last_week": "no"},
-                {"new_this_week": "no"},
-                {"active_last_week": "yes"},
-                {"active_this_week": "no"},
-            ],
-        },
-        {
-            "name": "new_users_churned",
-            "type": "number",
-            "sql": "-1 * ${new_users_churned_count}",
-        },
-        {
-            "name": "established_users_churned",
-            "type": "number",
-            "sql": "-1 * ${established_users_churned_count}",
-        },
-        {
-            "name": "overall_churned",
-            "type": "number",
-            "sql": "${new_users_churned} + ${established_users_churned}",
-        },
-        {
-            "name": "overall_retention_rate",
-            "type": "number",
-            "sql": (
-                "SAFE_DIVIDE("
-                "(${established_users_returning} + ${new_users_returning}),"
-                "${overall_active_previous}"
-                ")"
-            ),
-        },
-        {
-            "name": "established_user_retention_rate",
-            "type": "number",
-            "sql": (
-                "SAFE_DIVIDE("
-                "${established_users_returning},"
-                "(${established_users_returning} + ${established_users_churned_count})"
-                ")"
-            ),
-        },
-        {
-            "name": "new_user_retention_rate",
-            "type": "number",
-            "sql": (
-                "SAFE_DIVIDE("
-                "${new_users_returning},"
-                "(${new_users_returning} + ${new_users_churned_count})"
-                ")"
-            ),
-        },
-        {
-            "name": "overall_churn_rate",
-            "type": "number",
-            "sql": (
-                "SAFE_DIVIDE("
-                "(${established_users_churned_count} + ${new_users_churned_count}),"
-                "${overall_active_previous}"
-                ")"
-            ),
-        },
-        {
-            "name": "fraction_of_active_resurrected",
-            "type": "number",
-            "sql": "SAFE_DIVIDE(${overall_resurrected}, ${overall_active_current})",
-        },
-        {
-            "name": "fraction_of_active_new",
-            "type": "number",
-            "sql": "SAFE_DIVIDE(${new_users}, ${overall_active_current})",
-        },
-        {
-            "name": "fraction_of_active_established_returning",
-            "type": "number",
-            "sql": (
-                "SAFE_DIVIDE("
-                "${established_users_returning},"
-                "${overall_active_current}"
-                ")"
-            ),
-        },
-        {
-            "name": "fraction_of_active_new_returning",
-            "type": "number",
-            "sql": "SAFE_DIVIDE(${new_users_returning}, ${overall_active_current})",
-        },
-        {
-            "name": "quick_ratio",
-            "type": "number",
-            "sql": (
-                "SAFE_DIVIDE("
-                "${new_users} + ${overall_resurrected},"
-                "${established_users_churned_count} + ${new_users_churned_count}"
-                ")"
-            ),
-        },
-    ]
+    default_measures: Tuple[Mapping[str, Any], ...] = lookml_utils._freeze(
+        [
+            {
+                "name": "overall_active_previous",
+                "type": "count",
+                "filters": [{"active_last_week": "yes"}],
+            },
+            {
+                "name": "overall_active_current",
+                "type": "count",
+                "filters": [{"active_this_week": "yes"}],
+            },
+            {
+                "name": "overall_resurrected",
+                "type": "count",
+                "filters": [
+                    {"new_last_week": "no"},
+                    {"new_this_week": "no"},
+                    {"active_last_week": "no"},
+                    {"active_this_week": "yes"},
+                ],
+            },
+            {
+                "name": "new_users",
+                "type": "count",
+                "filters": [{"new_this_week": "yes"}, {"active_this_week": "yes"}],
+            },
+            {
+                "name": "established_users_returning",
+                "type": "count",
+                "filters": [
+                    {"new_last_week": "no"},
+                    {"new_this_week": "no"},
+                    {"active_last_week": "yes"},
+                    {"active_this_week": "yes"},
+                ],
+            },
+            {
+                "name": "new_users_returning",
+                "type": "count",
+                "filters": [
+                    {"new_last_week": "yes"},
+                    {"active_last_week": "yes"},
+                    {"active_this_week": "yes"},
+                ],
+            },
+            {
+                "name": "new_users_churned_count",
+                "type": "count",
+                "filters": [
+                    {"new_last_week": "yes"},
+                    {"active_last_week": "yes"},
+                    {"active_this_week": "no"},
+                ],
+            },
+            {
+                "name": "established_users_churned_count",
+                "type": "count",
+                "filters": [
+                    {"new_last_week": "no"},
+                    {"new_this_week": "no"},
+                    {"active_last_week": "yes"},
+                    {"active_this_week": "no"},
+                ],
+            },
+            {
+                "name": "new_users_churned",
+                "type": "number",
+                "sql": "-1 * ${new_users_churned_count}",
+            },
+            {
+                "name": "established_users_churned",
+                "type": "number",
+                "sql": "-1 * ${established_users_churned_count}",
+            },
+            {
+                "name": "overall_churned",
+                "type": "number",
+                "sql": "${new_users_churned} + ${established_users_churned}",
+            },
+            {
+                "name": "overall_retention_rate",
+                "type": "number",
+                "sql": (
+                    "SAFE_DIVIDE("
+                    "(${established_users_returning} + ${new_users_returning}),"
+                    "${overall_active_previous}"
+                    ")"
+                ),
+            },
+            {
+                "name": "established_user_retention_rate",
+                "type": "number",
+                "sql": (
+                    "SAFE_DIVIDE("
+                    "${established_users_returning},"
+                    "(${established_users_returning} + ${established_users_churned_count})"
+                    ")"
+                ),
+            },
+            {
+                "name": "new_user_retention_rate",
+                "type": "number",
+                "sql": (
+                    "SAFE_DIVIDE("
+                    "${new_users_returning},"
+                    "(${new_users_returning} + ${new_users_churned_count})"
+                    ")"
+                ),
+            },
+            {
+                "name": "overall_churn_rate",
+                "type": "number",
+                "sql": (
+                    "SAFE_DIVIDE("
+                    "(${established_users_churned_count} + ${new_users_churned_count}),"
+                    "${overall_active_previous}"
+                    ")"
+                ),
+            },
+            {
+                "name": "fraction_of_active_resurrected",
+                "type": "number",
+                "sql": "SAFE_DIVIDE(${overall_resurrected}, ${overall_active_current})",
+            },
+            {
+                "name": "fraction_of_active_new",
+                "type": "number",
+                "sql": "SAFE_DIVIDE(${new_users}, ${overall_active_current})",
+            },
+            {
+                "name": "fraction_of_active_established_returning",
+                "type": "number",
+                "sql": (
+                    "SAFE_DIVIDE("
+                    "${established_users_returning},"
+                    "${overall_active_current}"
+                    ")"
+                ),
+            },
+            {
+                "name": "fraction_of_active_new_returning",
+                "type": "number",
+                "sql": "SAFE_DIVIDE(${new_users_returning}, ${overall_active_current})",
+            },
+            {
+                "name": "quick_ratio",
+                "type": "number",
+                "sql": (
+                    "SAFE_DIVIDE("
+                    "${new_users} + ${overall_resurrected},"
+                    "${established_users_churned_count} + ${new_users_churned_count}"
+                    ")"
+                ),
+            },
+        ]
+    )
 
     def __init__(self, namespace: str, tables: List[Dict[str, str]]):
         """Get an instance of a GrowthAccountingView."""
@@ -251,9 +256,10 @@ class GrowthAccountingView(View):
         table = self.tables[0]["table"]
 
         # add dimensions and dimension groups
-        dimensions = lookml_utils._generate_dimensions(bq_client, table) + deepcopy(
-            GrowthAccountingView.default_dimensions
-        )
+        dimensions = [
+            *lookml_utils._generate_dimensions(bq_client, table),
+            *GrowthAccountingView.default_dimensions,
+        ]
 
         view_defn["dimensions"] = list(
             filterfalse(lookml_utils._is_dimension_group, dimensions)
@@ -270,6 +276,6 @@ class GrowthAccountingView(View):
 
         return {"views": [view_defn]}
 
-    def get_measures(self) -> List[Dict[str, Union[str, List[Dict[str, str]]]]]:
+    def get_measures(self) -> List[Mapping[str, Any]]:
         """Generate measures for the Growth Accounting Framework."""
-        return deepcopy(GrowthAccountingView.default_measures)
+        return list(GrowthAccountingView.default_measures)
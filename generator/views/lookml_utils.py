@@ -1,10 +1,15 @@
 """Utils for generating lookml."""
 import re
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 import click
 from google.cloud import bigquery
 
+from ..tracing import span
+
 BIGQUERY_TYPE_TO_DIMENSION_TYPE = {
     "BIGNUMERIC": "string",
     "BOOLEAN": "yesno",
@@ -33,99 +38,216 @@ MAP_LAYER_NAMES = {
 }
 
 
-def _get_dimension(
-    path: Tuple[str, ...], field_type: str, mode: str, description: Optional[str]
-) -> Dict[str, Any]:
-    result: Dict[str, Any] = {}
-    result["sql"] = "${TABLE}." + ".".join(path)
-    name = path
-    if (
-        mode == "REPEATED"
-        or path in HIDDEN_DIMENSIONS
-        or field_type not in BIGQUERY_TYPE_TO_DIMENSION_TYPE
-    ):
-        result["hidden"] = "yes"
-    else:
-        result["type"] = BIGQUERY_TYPE_TO_DIMENSION_TYPE[field_type]
-
-        group_label, group_item_label = None, None
-        if len(path) > 1:
-            group_label = " ".join(path[:-1]).replace("_", " ").title()
-            group_item_label = path[-1].replace("_", " ").title()
-        if result["type"] == "time":
-            # Remove _{type} suffix from the last path element for dimension group
-            # names For example submission_date and submission_timestamp become
-            # submission, and metadata.header.parsed_date becomes
-            # metadata__header__parsed. This is because the timeframe will add a _{type}
-            # suffix to the individual dimension names.
-            name = *path[:-1], re.sub("_(date|time(stamp)?)$", "", path[-1])
-            result["timeframes"] = [
-                "raw",
-                "time",
-                "date",
-                "week",
-                "month",
-                "quarter",
-                "year",
-            ]
-            if field_type == "DATE":
-                result["timeframes"].remove("time")
-                result["convert_tz"] = "no"
-                result["datatype"] = "date"
-            if group_label and group_item_label:
-                # Dimension groups should not be nested, see issue #82
-                result["label"] = f"{group_label}: {group_item_label}"
-        elif len(path) > 1:
-            result["group_label"] = group_label
-            result["group_item_label"] = group_item_label
-        if path in MAP_LAYER_NAMES:
-            result["map_layer_name"] = MAP_LAYER_NAMES[path]
-    result["name"] = "__".join(name)
-
-    if description:
-        result["description"] = description
-
-    return result
+TIMEFRAMES = ["raw", "time", "date", "week", "month", "quarter", "year"]
+DATE_TIMEFRAMES = [timeframe for timeframe in TIMEFRAMES if timeframe != "time"]
+
+TIME_TYPES = {
+    field_type
+    for field_type, dimension_type in BIGQUERY_TYPE_TO_DIMENSION_TYPE.items()
+    if dimension_type == "time"
+}
+TIME_SUFFIX_RE = re.compile("_(date|time(stamp)?)$")
+
+
+@lru_cache(maxsize=None)
+def _title(segment: str) -> str:
+    """Title-case a snake_case path segment, e.g. for use in labels."""
+    return segment.replace("_", " ").title()
+
+
+@lru_cache(maxsize=None)
+def _group_label(prefix: Tuple[str, ...]) -> str:
+    """Get the label for all fields nested under a path prefix."""
+    return " ".join(_title(segment) for segment in prefix)
+
+
+class SchemaColumns:
+    """A flattened table schema, stored as one column per field attribute.
+
+    Fields are ordered by path. Attributes that every dimension needs
+    (names, hidden flags, dimension types) are computed a column at a time,
+    and dimension dicts are only built for the fields that are used.
+    """
+
+    __slots__ = ("paths", "types", "modes", "descriptions", "hidden", "names")
+
+    def __init__(self, schema: List[bigquery.SchemaField]):
+        """Flatten a schema into columns."""
+        self.paths: List[Tuple[str, ...]] = []
+        self.types: List[str] = []
+        self.modes: List[str] = []
+        self.descriptions: List[Optional[str]] = []
+
+        # nested records are walked with an explicit stack rather than
+        # recursion, which keeps very wide and deep schemas cheap
+        by_name = attrgetter("name")
+        stack: List[Tuple[Tuple[str, ...], Iterator[bigquery.SchemaField]]] = [
+            ((), iter(sorted(schema, key=by_name)))
+        ]
+        while stack:
+            prefix, fields = stack[-1]
+            field = next(fields, None)
+            if field is None:
+                stack.pop()
+            elif field.field_type == "RECORD" and not field.mode == "REPEATED":
+                stack.append(
+                    ((*prefix, field.name), iter(sorted(field.fields, key=by_name)))
+                )
+            else:
+                self.paths.append((*prefix, field.name))
+                self.types.append(field.field_type)
+                self.modes.append(field.mode)
+                self.descriptions.append(field.description)
+
+        self.hidden: List[bool] = [
+            mode == "REPEATED"
+            or path in HIDDEN_DIMENSIONS
+            or field_type not in BIGQUERY_TYPE_TO_DIMENSION_TYPE
+            for path, field_type, mode in zip(self.paths, self.types, self.modes)
+        ]
+        # Remove _{type} suffix from the last path element for dimension group
+        # names For example submission_date and submission_timestamp become
+        # submission, and metadata.header.parsed_date becomes
+        # metadata__header__parsed. This is because the timeframe will add a _{type}
+        # suffix to the individual dimension names.
+        self.names: List[str] = [
+            "__".join((*path[:-1], TIME_SUFFIX_RE.sub("", path[-1])))
+            if not hidden and field_type in TIME_TYPES
+            else "__".join(path)
+            for path, field_type, hidden in zip(self.paths, self.types, self.hidden)
+        ]
+
+    def __len__(self) -> int:
+        """Get the number of fields."""
+        return len(self.paths)
+
+    def dimension(self, i: int) -> Dict[str, Any]:
+        """Build the dimension for the field at index i."""
+        path, field_type = self.paths[i], self.types[i]
+        result: Dict[str, Any] = {"sql": "${TABLE}." + ".".join(path)}
+        if self.hidden[i]:
+            result["hidden"] = "yes"
+        else:
+            dimension_type = BIGQUERY_TYPE_TO_DIMENSION_TYPE[field_type]
+            result["type"] = dimension_type
+            if dimension_type == "time":
+                if field_type == "DATE":
+                    result["timeframes"] = DATE_TIMEFRAMES
+                    result["convert_tz"] = "no"
+                    result["datatype"] = "date"
+                else:
+                    result["timeframes"] = TIMEFRAMES
+                if len(path) > 1:
+                    # Dimension groups should not be nested, see issue #82
+                    group_label = _group_label(path[:-1])
+                    result["label"] = f"{group_label}: {_title(path[-1])}"
+            elif len(path) > 1:
+                result["group_label"] = _group_label(path[:-1])
+                result["group_item_label"] = _title(path[-1])
+            if path in MAP_LAYER_NAMES:
+                result["map_layer_name"] = MAP_LAYER_NAMES[path]
+        result["name"] = self.names[i]
+
+        description = self.descriptions[i]
+        if description:
+            result["description"] = description
+
+        return result
+
+    def dimensions(self) -> Iterator[Dict[str, Any]]:
+        """Build dimensions for all fields."""
+        return map(self.dimension, range(len(self)))
 
 
 def _generate_dimensions_helper(
-    schema: List[bigquery.SchemaField], *prefix: str
+    schema: List[bigquery.SchemaField],
 ) -> Iterable[dict]:
-    for field in sorted(schema, key=lambda f: f.name):
-        if field.field_type == "RECORD" and not field.mode == "REPEATED":
-            yield from _generate_dimensions_helper(field.fields, *prefix, field.name)
-        else:
-            yield _get_dimension(
-                (*prefix, field.name), field.field_type, field.mode, field.description
-            )
+    """Flatten a schema into dimensions, ordered by field path."""
+    return SchemaColumns(schema).dimensions()
 
 
-def _generate_dimensions(client: bigquery.Client, table: str) -> List[Dict[str, Any]]:
-    """Generate dimensions and dimension groups from a bigquery table.
+class Dimensions:
+    """The dimensions of a table, built from its schema columns when iterated.
+
+    Dimensions can be iterated any number of times, and only one dimension
+    dict is alive at a time, so memory doesn't grow with the schema's width.
+    """
+
+    __slots__ = ("columns", "indexes")
+
+    def __init__(self, columns: SchemaColumns, indexes: List[int]):
+        """Get the dimensions of the fields of columns at indexes."""
+        self.columns = columns
+        self.indexes = indexes
+
+    def __len__(self) -> int:
+        """Get the number of dimensions."""
+        return len(self.indexes)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Build each dimension."""
+        return map(self.columns.dimension, self.indexes)
+
+
+def _get_dimensions(client: bigquery.Client, table: str) -> Dimensions:
+    """Get dimensions and dimension groups of a bigquery table, built lazily.
 
     When schema contains both submission_timestamp and submission_date, only produce
     a dimension group for submission_timestamp.
 
     Raise ClickException if schema results in duplicate dimensions.
     """
-    dimensions = {}
-    for dimension in _generate_dimensions_helper(client.get_table(table).schema):
-        name = dimension["name"]
+    with span("get_table", "network", table=table):
+        schema = client.get_table(table).schema
+    columns = SchemaColumns(schema)
+    # duplicates are resolved on names alone, before any dimension is built
+    indexes: Dict[str, int] = {}
+    for i, name in enumerate(columns.names):
         # overwrite duplicate "submission" dimension group, thus picking the
         # last value sorted by field name, which is submission_timestamp
-        if name in dimensions and name != "submission":
+        if name in indexes and name != "submission":
             raise click.ClickException(
                 f"duplicate dimension {name!r} for table {table!r}"
             )
-        dimensions[name] = dimension
-    return list(dimensions.values())
+        indexes[name] = i
+    return Dimensions(columns, list(indexes.values()))
 
 
-def _is_dimension_group(dimension: dict):
+def _generate_dimensions(client: bigquery.Client, table: str) -> List[Dict[str, Any]]:
+    """Generate dimensions and dimension groups from a bigquery table.
+
+    See _get_dimensions.
+    """
+    return list(_get_dimensions(client, table))
+
+
+def _is_dimension_group(dimension: Mapping[str, Any]):
     """Determine if a dimension is actually a dimension group."""
     return "timeframes" in dimension or "intervals" in dimension
 
 
+def _freeze(lookml: Any) -> Any:
+    """Get a read-only copy of LookML, so it can be shared between views.
+
+    Dicts become mapping proxies and lists become tuples, so changing shared
+    LookML in place raises a TypeError instead of changing other views.
+    """
+    if isinstance(lookml, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in lookml.items()})
+    if isinstance(lookml, list):
+        return tuple(_freeze(value) for value in lookml)
+    return lookml
+
+
+def _materialize(lookml: Any) -> Any:
+    """Replace lazily generated and read-only entries in LookML with lists and dicts."""
+    if isinstance(lookml, Mapping):
+        return {key: _materialize(value) for key, value in lookml.items()}
+    if isinstance(lookml, (list, tuple, Iterator)):
+        return [_materialize(value) for value in lookml]
+    return lookml
+
+
 def escape_filter_expr(expr: str) -> str:
     """Escape filter expression for special Looker chars."""
     return re.sub(r'((?:^-)|["_%,^])', r"^\1", expr, count=0)
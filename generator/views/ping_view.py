@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import Any, Dict, Iterator, List, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
 from . import lookml_utils
 from .view import OMIT_VIEWS, View, ViewDict
@@ -60,6 +60,10 @@ class PingView(View):
 
     def to_lookml(self, bq_client, v1_name: Optional[str]) -> Dict[str, Any]:
         """Generate LookML for this view."""
+        return lookml_utils._materialize(self.iter_lookml(bq_client, v1_name))
+
+    def iter_lookml(self, bq_client, v1_name: Optional[str]) -> Dict[str, Any]:
+        """Generate LookML for this view, with lazily generated entries."""
         view_defn: Dict[str, Any] = {"name": self.name}
 
         # use schema for the table where channel=="release" or the first one
@@ -71,14 +75,14 @@ class PingView(View):
         dimensions = self.get_dimensions(bq_client, table, v1_name)
 
         # set document id field as a primary key for joins
-        view_defn["dimensions"] = [
+        view_defn["dimensions"] = (
             d if d["name"] != "document_id" else dict(**d, primary_key="yes")
             for d in dimensions
             if not lookml_utils._is_dimension_group(d)
-        ]
-        view_defn["dimension_groups"] = [
-            d for d in dimensions if lookml_utils._is_dimension_group(d)
-        ]
+        )
+        view_defn["dimension_groups"] = filter(
+            lookml_utils._is_dimension_group, dimensions
+        )
 
         # add measures
         view_defn["measures"] = self.get_measures(dimensions, table, v1_name)
@@ -103,42 +107,39 @@ class PingView(View):
         else:
             view_defn["sql_table_name"] = f"`{table}`"
 
-        return {"views": [view_defn]}
+        return {"views": iter([view_defn])}
 
     def get_dimensions(
         self, bq_client, table, v1_name: Optional[str]
-    ) -> List[Dict[str, Any]]:
-        """Get the set of dimensions for this view."""
+    ) -> Iterable[Dict[str, Any]]:
+        """Get the set of dimensions for this view.
+
+        Dimensions may be built lazily, each time they are iterated.
+        """
         # add dimensions and dimension groups
-        return lookml_utils._generate_dimensions(bq_client, table)
+        return lookml_utils._get_dimensions(bq_client, table)
 
     def get_measures(
-        self, dimensions: List[dict], table: str, v1_name: Optional[str]
-    ) -> List[Dict[str, Union[str, List[Dict[str, str]]]]]:
-        """Generate measures from a list of dimensions.
+        self, dimensions: Iterable[dict], table: str, v1_name: Optional[str]
+    ) -> Iterator[Dict[str, Union[str, List[Dict[str, str]]]]]:
+        """Generate measures from dimensions, as they are consumed.
 
         When no dimension-specific measures are found, return a single "count" measure.
 
         Raise ClickException if dimensions result in duplicate measures.
         """
-        # Iterate through each of the dimensions and accumulate any measures
-        # that we want to include in the view. We pull out the client id first
+        # Iterate through each of the dimensions and yield any measures that
+        # we want to include in the view. We pull out the client id first
         # since we'll use it to calculate per-measure client counts.
-        measures: List[Dict[str, Union[str, List[Dict[str, str]]]]] = []
-
         client_id_field = self.get_client_id(dimensions, table)
         if client_id_field is not None:
-            measures.append(
-                {
-                    "name": "clients",
-                    "type": "count_distinct",
-                    "sql": f"${{{client_id_field}}}",
-                }
-            )
+            yield {
+                "name": "clients",
+                "type": "count_distinct",
+                "sql": f"${{{client_id_field}}}",
+            }
 
         for dimension in dimensions:
             dimension_name = dimension["name"]
             if dimension_name == "document_id":
-                measures += [{"name": "ping_count", "type": "count"}]
-
-        return measures
+                yield {"name": "ping_count", "type": "count"}
@@ -52,6 +52,10 @@ class TableView(View):
 
     def to_lookml(self, bq_client, v1_name: Optional[str]) -> Dict[str, Any]:
         """Generate LookML for this view."""
+        return lookml_utils._materialize(self.iter_lookml(bq_client, v1_name))
+
+    def iter_lookml(self, bq_client, v1_name: Optional[str]) -> Dict[str, Any]:
+        """Generate LookML for this view, with lazily generated entries."""
         view_defn: Dict[str, Any] = {"name": self.name}
 
         # use schema for the table where channel=="release" or the first one
@@ -61,12 +65,12 @@ class TableView(View):
         )["table"]
 
         # add dimensions and dimension groups
-        dimensions = lookml_utils._generate_dimensions(bq_client, table)
-        view_defn["dimensions"] = list(
-            filterfalse(lookml_utils._is_dimension_group, dimensions)
+        dimensions = lookml_utils._get_dimensions(bq_client, table)
+        view_defn["dimensions"] = filterfalse(
+            lookml_utils._is_dimension_group, dimensions
         )
-        view_defn["dimension_groups"] = list(
-            filter(lookml_utils._is_dimension_group, dimensions)
+        view_defn["dimension_groups"] = filter(
+            lookml_utils._is_dimension_group, dimensions
         )
 
         # Table views have no measures
@@ -1,7 +1,7 @@
 """Generic class to describe Looker views."""
 from __future__ import annotations
 
-from typing import Any, Dict, Iterator, List, Optional, TypedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypedDict
 
 from click import ClickException
 
@@ -85,7 +85,7 @@ class View(object):
 
     def get_dimensions(
         self, bq_client, table, v1_name: Optional[str]
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterable[Dict[str, Any]]:
         """Get the set of dimensions for this view."""
         raise NotImplementedError("Only implemented in subclass.")
 
@@ -96,10 +96,23 @@ class View(object):
         View instances can generate more than one Looker view,
         for e.g. nested fields and joins, so this returns
         a list.
+
+        Default fields are shared between views instead of copied,
+        and are read-only so they can't be changed for every view at once.
         """
         raise NotImplementedError("Only implemented in subclass.")
 
-    def get_client_id(self, dimensions: List[dict], table: str) -> Optional[str]:
+    def iter_lookml(self, bq_client, v1_name: Optional[str]) -> Dict[str, Any]:
+        """
+        Generate Lookml for this view, with lazily generated entries.
+
+        Repeated entries such as views or dimensions may be iterators,
+        which are consumed as the LookML is written, so wide views don't
+        have to be held in memory all at once.
+        """
+        return self.to_lookml(bq_client, v1_name)
+
+    def get_client_id(self, dimensions: Iterable[dict], table: str) -> Optional[str]:
         """Return the first field that looks like a client identifier."""
         client_id_fields = [
             d["name"]
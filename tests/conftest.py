@@ -5,19 +5,43 @@ import json
 
 import pytest
 
+from generator import glean_probes
+
+
+def pytest_addoption(parser):
+    """Add options for the scale and baseline of benchmarks."""
+    group = parser.getgroup("benchmark")
+    group.addoption("--bench-apps", type=int, default=2, help="Synthetic Glean apps")
+    group.addoption("--bench-pings", type=int, default=2, help="Pings per app")
+    group.addoption(
+        "--bench-fields", type=int, default=500, help="Fields per ping schema"
+    )
+    group.addoption("--bench-probes", type=int, default=100, help="Probes per app")
+    group.addoption("--bench-results", help="Path to write benchmark results to")
+    group.addoption("--bench-baseline", help="Path to baseline benchmark results")
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=1.25,
+        help="Fail when a stage is slower than the baseline by this factor",
+    )
+
 
 def pytest_collection_modifyitems(config, items):
-    """Skip integration tests unless a keyword or marker filter is specified."""
+    """Skip integration and benchmark tests unless a filter is specified."""
     keywordexpr = config.option.keyword
     markexpr = config.option.markexpr
     if keywordexpr or markexpr:
         return
 
     skip_integration = pytest.mark.skip(reason="integration marker not selected")
+    skip_benchmark = pytest.mark.skip(reason="benchmark marker not selected")
 
     for item in items:
         if "integration" in item.keywords:
             item.add_marker(skip_integration)
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
 
 
 @pytest.fixture
@@ -102,3 +126,10 @@ def glean_apps():
             "v1_name": "glean-app-release",
         }
     ]
+
+
+@pytest.fixture(autouse=True)
+def forget_glean_probes():
+    """Don't share probes that tests mock between tests."""
+    yield
+    glean_probes.forget()
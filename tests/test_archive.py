@@ -0,0 +1,137 @@
+import gzip
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import yaml
+from click.testing import CliRunner
+from google.cloud.bigquery.schema import SchemaField
+
+from generator.archive import extract, iter_archive, write_archive
+from generator.lookml import lookml
+
+from .utils import get_mock_bq_client
+
+
+def tree(root: Path):
+    return {
+        p.relative_to(root).as_posix(): p.read_bytes()
+        for p in root.rglob("*")
+        if p.is_file()
+    }
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    source_dir = tmp_path / "source"
+    for name, content in {
+        "namespaces.yaml": "a: {}\n",
+        "a/views/b.view.lkml": "view: b {}\n",
+        "a/explores/b.explore.lkml": "explore: b {}\n",
+    }.items():
+        (source_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (source_dir / name).write_text(content)
+    return source_dir
+
+
+@pytest.mark.parametrize("suffix", [".tar", ".tar.gz", ".tgz", ".tar.xz", ".zip"])
+def test_archive_round_trip(source_dir, tmp_path, suffix):
+    archive = tmp_path / f"lookml{suffix}"
+    write_archive(source_dir, archive)
+    assert [name for name, _ in iter_archive(archive)] == sorted(tree(source_dir))
+
+    target = tmp_path / "target"
+    result = CliRunner().invoke(extract, ["--target-dir", str(target), str(archive)])
+    assert result.exit_code == 0, result.output
+    assert tree(target) == tree(source_dir)
+
+
+def test_extract_trace(source_dir, tmp_path):
+    archive = tmp_path / "lookml.tar.gz"
+    write_archive(source_dir, archive)
+    path = tmp_path / "trace.json"
+    target = tmp_path / "target"
+    result = CliRunner().invoke(
+        extract, ["--target-dir", str(target), "--trace", str(path), str(archive)]
+    )
+    assert result.exit_code == 0, result.output
+    events = {e["name"]: e for e in json.loads(path.read_text())["traceEvents"]}
+    assert events["extract_archive"]["args"]["files"] == 3
+
+
+def test_unsupported_format(tmp_path):
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path):
+        Path("namespaces.yaml").write_text("")
+        result = runner.invoke(lookml, ["--output-archive", "lookml.tar.zst"])
+    assert result.exit_code == 1
+    assert "lookml.tar.zst is not an archive" in result.output
+
+
+@pytest.mark.parametrize("name", ["../escape.lkml", "/etc/escape.lkml"])
+def test_unsafe_paths(tmp_path, name):
+    tar_path = tmp_path / "unsafe.tar"
+    with tarfile.open(tar_path, "w") as tar:
+        info = tarfile.TarInfo(name)
+        info.size = 1
+        tar.addfile(info, io.BytesIO(b"x"))
+    zip_path = tmp_path / "unsafe.zip"
+    with zipfile.ZipFile(zip_path, "w") as zip_file:
+        zip_file.writestr(name, "x")
+
+    for archive in (tar_path, zip_path):
+        result = CliRunner().invoke(
+            extract, ["--target-dir", str(tmp_path / "target"), str(archive)]
+        )
+        assert result.exit_code == 1
+        assert "refusing to extract unsafe path" in result.output
+    assert not (tmp_path / "escape.lkml").exists()
+
+
+def test_lookml_output_archive(tmp_path):
+    app_listings = tmp_path / "app-listings"
+    app_listings.write_bytes(gzip.compress(b"[]"))
+    namespaces = tmp_path / "namespaces.yaml"
+    namespaces.write_text(
+        yaml.safe_dump(
+            {
+                "custom": {
+                    "pretty_name": "Custom",
+                    "glean_app": False,
+                    "views": {
+                        "baseline": {
+                            "type": "table_view",
+                            "tables": [{"table": "mozdata.custom.baseline"}],
+                        }
+                    },
+                }
+            }
+        )
+    )
+    archive = tmp_path / "lookml.tar.gz"
+    mock_bq_client = get_mock_bq_client([SchemaField("country", "STRING")])
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path), patch(
+        "google.cloud.bigquery.Client", return_value=mock_bq_client
+    ):
+        result = runner.invoke(
+            lookml,
+            [
+                "--namespaces",
+                str(namespaces),
+                "--app-listings-uri",
+                app_listings.as_uri(),
+                "--output-archive",
+                str(archive),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert not Path("looker-hub").exists()
+
+    files = dict(iter_archive(archive))
+    assert sorted(files) == ["custom/views/baseline.view.lkml", "namespaces.yaml"]
+    assert b"view: baseline" in files["custom/views/baseline.view.lkml"]
@@ -0,0 +1,284 @@
+"""End-to-end benchmarks of the generator on synthetic namespaces.
+
+Run with `pytest -m benchmark`. The scale of the synthetic inputs is set
+with `--bench-apps`, `--bench-pings`, `--bench-fields` and `--bench-probes`.
+Timings are written to `--bench-results`, and compared against the timings
+in `--bench-baseline` when it exists.
+"""
+import gzip
+import importlib
+import json
+import tarfile
+import time
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import Mock, patch
+
+import pytest
+import yaml
+from click.testing import CliRunner
+from google.cloud.bigquery.schema import SchemaField
+from mozilla_schema_generator.probes import GleanProbe
+
+from generator.lookml import _lookml
+from generator.namespaces import _get_glean_apps, namespaces
+from generator.spoke import generate_directories
+
+from .utils import get_mock_bq_client
+
+METRIC_TYPES = ["boolean", "counter", "labeled_counter", "quantity", "string"]
+BQ_TYPES = {
+    "boolean": "BOOLEAN",
+    "counter": "INTEGER",
+    "quantity": "INTEGER",
+    "string": "STRING",
+}
+
+
+@pytest.fixture
+def scale(request) -> Dict[str, int]:
+    """Get the scale of the synthetic inputs."""
+    return {
+        "apps": request.config.getoption("bench_apps"),
+        "pings": request.config.getoption("bench_pings"),
+        "fields": request.config.getoption("bench_fields"),
+        "probes": request.config.getoption("bench_probes"),
+    }
+
+
+def app_name(i: int) -> str:
+    """Get the name of a synthetic app."""
+    return f"app-{i}"
+
+
+def ping_name(i: int) -> str:
+    """Get the name of a synthetic ping."""
+    return f"ping_{i}"
+
+
+def synthetic_app_listings(dest: Path, n_apps: int) -> str:
+    """Write app listings for apps with a release and a beta channel."""
+    listings = []
+    for i in range(n_apps):
+        name = app_name(i)
+        family = name.replace("-", "_")
+        for channel in ("release", "beta"):
+            listings.append(
+                {
+                    "app_name": name,
+                    "app_channel": channel,
+                    "canonical_app_name": f"App {i}",
+                    "bq_dataset_family": f"{family}_{channel}",
+                    "notification_emails": [f"{name}-owner@allizom.com"],
+                    "v1_name": f"{name}-{channel}",
+                }
+            )
+    dest.write_bytes(gzip.compress(json.dumps(listings).encode()))
+    return dest.absolute().as_uri()
+
+
+def synthetic_generated_sql(dest: Path, n_apps: int, n_pings: int) -> str:
+    """Write a generated-sql archive with ping and clients views for every app."""
+    with tarfile.open(dest, "w:gz") as tar:
+        for i in range(n_apps):
+            family = app_name(i).replace("-", "_")
+            for dataset, source_dataset in (
+                (family, f"{family}_release"),
+                (f"{family}_beta", f"{family}_beta_stable"),
+            ):
+                references = {
+                    ping_name(j): f"{source_dataset}.{ping_name(j)}_v1"
+                    for j in range(n_pings)
+                }
+                references[
+                    "baseline_clients_daily"
+                ] = f"{dataset}_derived.baseline_clients_daily_v1"
+                references[
+                    "baseline_clients_last_seen"
+                ] = f"{dataset}_derived.baseline_clients_last_seen_v1"
+                for view, reference in references.items():
+                    content = yaml.safe_dump(
+                        {
+                            "references": {
+                                "view.sql": [f"moz-fx-data-shared-prod.{reference}"]
+                            }
+                        }
+                    ).encode()
+                    info = tarfile.TarInfo(
+                        f"sql/moz-fx-data-shared-prod/{dataset}/{view}/metadata.yaml"
+                    )
+                    info.size = len(content)
+                    tar.addfile(info, BytesIO(content))
+    return dest.absolute().as_uri()
+
+
+def synthetic_probes(n_probes: int, n_pings: int) -> List[GleanProbe]:
+    """Get probes of assorted types, sent in every ping."""
+    history = [
+        {
+            "send_in_pings": [ping_name(j) for j in range(n_pings)],
+            "dates": {"first": "2020-01-01 00:00:00", "last": "2020-01-02 00:00:00"},
+            "description": "A synthetic metric",
+        }
+    ]
+    return [
+        GleanProbe(
+            f"category_{i % 10}.metric_{i}",
+            {
+                "type": METRIC_TYPES[i % len(METRIC_TYPES)],
+                "history": history,
+                "name": f"category_{i % 10}.metric_{i}",
+                "in-source": True,
+            },
+        )
+        for i in range(n_probes)
+    ]
+
+
+def synthetic_schema(n_fields: int, probes: List[GleanProbe]) -> List[SchemaField]:
+    """Get a ping schema with the probes' metrics and other filler fields."""
+    metrics: Dict[str, List[SchemaField]] = {t: [] for t in METRIC_TYPES}
+    for probe in probes:
+        name = probe.id.replace(".", "_")
+        if probe.type == "labeled_counter":
+            metrics[probe.type].append(
+                SchemaField(
+                    name,
+                    "RECORD",
+                    mode="REPEATED",
+                    fields=[
+                        SchemaField("key", "STRING"),
+                        SchemaField("value", "INTEGER"),
+                    ],
+                )
+            )
+        else:
+            metrics[probe.type].append(SchemaField(name, BQ_TYPES[probe.type]))
+
+    n_filler = max(n_fields - len(probes), 0)
+    return [
+        SchemaField(
+            "client_info", "RECORD", fields=[SchemaField("client_id", "STRING")]
+        ),
+        SchemaField("document_id", "STRING"),
+        SchemaField("submission_timestamp", "TIMESTAMP"),
+        SchemaField("submission_date", "DATE"),
+        SchemaField(
+            "metrics",
+            "RECORD",
+            fields=[
+                SchemaField(metric_type, "RECORD", fields=fields)
+                for metric_type, fields in metrics.items()
+                if fields
+            ],
+        ),
+        SchemaField(
+            "extra",
+            "RECORD",
+            fields=[
+                SchemaField(f"field_{i}", "STRING" if i % 2 else "FLOAT")
+                for i in range(n_filler)
+            ],
+        ),
+    ]
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str):
+    """Record the wall time of a stage."""
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+
+
+@pytest.mark.benchmark
+def test_pipeline_benchmark(request, scale, tmp_path):
+    app_listings_uri = synthetic_app_listings(tmp_path / "app-listings", scale["apps"])
+    generated_sql_uri = synthetic_generated_sql(
+        tmp_path / "generated-sql.tar.gz", scale["apps"], scale["pings"]
+    )
+    custom_namespaces = tmp_path / "custom-namespaces.yaml"
+    custom_namespaces.write_text(
+        yaml.safe_dump({"operational_monitoring": {"pretty_name": "OpMon"}})
+    )
+    disallowlist = tmp_path / "namespaces-disallowlist.yaml"
+    disallowlist.write_text("")
+
+    probes = synthetic_probes(scale["probes"], scale["pings"])
+    glean_app = Mock()
+    glean_app.get_probes.return_value = probes
+    glean_app.get_ping_descriptions.return_value = {
+        ping_name(j): "A synthetic ping." for j in range(scale["pings"])
+    }
+    repos = [
+        {"name": f"{app_name(i)}-{channel}"}
+        for i in range(scale["apps"])
+        for channel in ("release", "beta")
+    ]
+    mock_bq_client = get_mock_bq_client(synthetic_schema(scale["fields"], probes))
+
+    timings: Dict[str, float] = {}
+    runner = CliRunner()
+    # generator.namespaces is shadowed by the command of the same name
+    namespaces_module = importlib.import_module("generator.namespaces")
+    with runner.isolated_filesystem(temp_dir=tmp_path), patch.object(
+        namespaces_module,
+        "_get_opmon_views_and_explores",
+        return_value={"views": {}, "explores": {}},
+    ), patch("google.cloud.bigquery.Client", return_value=mock_bq_client), patch(
+        "generator.glean_probes.GleanPing"
+    ) as glean_ping:
+        glean_ping.get_repos.return_value = repos
+        glean_ping.return_value = glean_app
+
+        with timed(timings, "namespaces"):
+            result = runner.invoke(
+                namespaces,
+                [
+                    "--custom-namespaces",
+                    str(custom_namespaces),
+                    "--generated-sql-uri",
+                    generated_sql_uri,
+                    "--app-listings-uri",
+                    app_listings_uri,
+                    "--disallowlist",
+                    str(disallowlist),
+                ],
+            )
+        if result.exit_code != 0:
+            raise result.exception
+
+        with timed(timings, "lookml"):
+            glean_apps = _get_glean_apps(app_listings_uri)
+            with open("namespaces.yaml") as f:
+                _lookml(f, glean_apps, "looker-hub/")
+
+        with timed(timings, "update-spoke"):
+            with open("namespaces.yaml") as f:
+                generate_directories(yaml.safe_load(f), Path("spokes"))
+
+        n_views = len(list(Path("looker-hub").glob("*/views/*.view.lkml")))
+        assert n_views >= scale["apps"] * scale["pings"]
+
+    results = {"scale": scale, "stages": timings}
+    results_path = request.config.getoption("bench_results")
+    if results_path:
+        Path(results_path).write_text(json.dumps(results, indent=2))
+
+    baseline_path = request.config.getoption("bench_baseline")
+    if not baseline_path or not Path(baseline_path).exists():
+        return
+    baseline = json.loads(Path(baseline_path).read_text())
+    if baseline["scale"] != scale:
+        pytest.skip("baseline was recorded at a different scale")
+
+    threshold = request.config.getoption("bench_threshold")
+    regressions = {
+        stage: f"{duration:.3f}s vs {baseline['stages'][stage]:.3f}s"
+        for stage, duration in timings.items()
+        if stage in baseline["stages"]
+        and duration > baseline["stages"][stage] * threshold
+    }
+    assert not regressions, f"stages regressed beyond {threshold}x: {regressions}"
@@ -0,0 +1,144 @@
+import importlib
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from generator.catalog import catalog_matches, write_catalog
+from generator.lookml import lookml
+
+lookml_module = importlib.import_module("generator.lookml")
+
+
+@pytest.fixture
+def namespaces():
+    return {
+        "glean-app": {
+            "pretty_name": "Glean App",
+            "glean_app": True,
+            "v1_name": "glean-app-release",
+            "owners": ["owner@allizom.com", "other@allizom.com"],
+            "spoke": "looker-spoke-default",
+            "views": {
+                "baseline": {
+                    "type": "glean_ping_view",
+                    "tables": [
+                        {"channel": "release", "table": "mozdata.glean_app.baseline"},
+                        {"channel": "beta", "table": "mozdata.glean_app_beta.baseline"},
+                    ],
+                },
+                "funnel_analysis": {
+                    "type": "funnel_analysis_view",
+                    "tables": [
+                        {
+                            "funnel_analysis": "events_daily_table",
+                            "event_types": "`mozdata.glean_app.event_types`",
+                        }
+                    ],
+                },
+            },
+            "explores": {
+                "baseline": {
+                    "type": "glean_ping_explore",
+                    "views": {"base_view": "baseline"},
+                },
+            },
+        },
+        "custom": {
+            "pretty_name": "Custom",
+            "glean_app": False,
+            "connection": "bigquery-oauth",
+            "owners": ["owner@allizom.com"],
+            "views": {
+                "baseline": {
+                    "type": "ping_view",
+                    "tables": [{"table": "mozdata.glean_app.baseline"}],
+                }
+            },
+        },
+    }
+
+
+def test_write_catalog(namespaces, tmp_path):
+    path = tmp_path / "namespaces.sqlite"
+    content = yaml.safe_dump(namespaces)
+    write_catalog(path, namespaces, content)
+    assert catalog_matches(path, content)
+    assert not catalog_matches(path, content + "\n")
+    assert list(tmp_path.iterdir()) == [path]
+
+    connection = sqlite3.connect(str(path))
+    assert (
+        connection.execute(
+            "SELECT namespace, view, channel FROM tables WHERE table_name = ? "
+            "ORDER BY namespace",
+            ("mozdata.glean_app.baseline",),
+        ).fetchall()
+        == [("custom", "baseline", None), ("glean-app", "baseline", "release")]
+    )
+    assert connection.execute(
+        "SELECT role, table_name FROM tables WHERE view = 'funnel_analysis'"
+    ).fetchall() == [
+        ("funnel_analysis", "events_daily_table"),
+        ("event_types", "`mozdata.glean_app.event_types`"),
+    ]
+    assert connection.execute(
+        "SELECT namespace FROM owners WHERE email = 'other@allizom.com'"
+    ).fetchall() == [("glean-app",)]
+    assert connection.execute(
+        "SELECT name, glean_app, spoke, connection, v1_name FROM namespaces "
+        "ORDER BY name"
+    ).fetchall() == [
+        ("custom", 0, None, "bigquery-oauth", None),
+        ("glean-app", 1, "looker-spoke-default", None, "glean-app-release"),
+    ]
+    assert (
+        connection.execute(
+            "SELECT explore, role FROM explore_views WHERE namespace = ? AND view = ?",
+            ("glean-app", "baseline"),
+        ).fetchall()
+        == [("baseline", "base_view")]
+    )
+    # lookups by table use an index
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM tables WHERE table_name = 'a'"
+    ).fetchall()
+    assert "tables_table_name" in str(plan)
+
+
+def test_write_catalog_error(namespaces, tmp_path):
+    path = tmp_path / "namespaces.sqlite"
+    write_catalog(path, {}, "{}\n")
+    del namespaces["custom"]["views"]["baseline"]["type"]
+    with pytest.raises(KeyError):
+        write_catalog(path, namespaces, yaml.safe_dump(namespaces))
+    # the previous catalog is left in place
+    assert list(tmp_path.iterdir()) == [path]
+    assert catalog_matches(path, "{}\n")
+
+
+def test_lookml_copies_catalog(namespaces, tmp_path):
+    del namespaces["glean-app"]
+    namespaces_path = tmp_path / "namespaces.yaml"
+    content = yaml.safe_dump(namespaces)
+    namespaces_path.write_text(content)
+    write_catalog(tmp_path / "namespaces.sqlite", namespaces, content)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path), patch(
+        "google.cloud.bigquery.Client"
+    ), patch.object(lookml_module, "_get_namespace_tasks", return_value=[]):
+        result = runner.invoke(lookml, ["--namespaces", str(namespaces_path)])
+        assert result.exit_code == 0, result.output
+        assert catalog_matches(Path("looker-hub/namespaces.sqlite"), content)
+
+        # stale catalogs aren't copied
+        namespaces_path.write_text(content + "\n")
+        result = runner.invoke(
+            lookml, ["--namespaces", str(namespaces_path), "--target-dir", "other"]
+        )
+        assert result.exit_code == 0, result.output
+        assert not Path("other/namespaces.sqlite").exists()
@@ -1,11 +1,11 @@
-from copy import deepcopy
-
 import lkml
 import pytest
 from google.cloud.bigquery.schema import SchemaField
 
+from generator import lkml_update
 from generator.explores import EventsExplore
 from generator.views import EventsView
+from generator.views.lookml_utils import _materialize
 
 from .utils import get_mock_bq_client, print_and_test
 
@@ -178,9 +178,23 @@ def test_explore_lookml(events_explore):
                 ]
             },
             "sql_always_where": "${events.submission_date} >= '2010-01-01'",
-            "queries": deepcopy(EventsExplore.queries),
+            "queries": _materialize(EventsExplore.queries),
         },
     ]
 
     actual = events_explore.to_lookml(None)
-    print_and_test(expected=expected, actual=actual)
+    print_and_test(expected=expected, actual=_materialize(actual))
+
+
+def test_explore_lookml_shares_default_queries(events_explore):
+    actual = events_explore.to_lookml(None)
+    lkml_update.dump({"explores": actual})
+
+    query = actual[0]["queries"][0]
+    assert query is EventsExplore.queries[0]
+    # shared defaults can't be changed for every explore at once
+    with pytest.raises(TypeError):
+        query["name"] = "changed"
+    with pytest.raises(TypeError):
+        query["filters"][0]["submission_date"] = "7 days"
+    assert query["filters"] == ({"submission_date": "14 days"},)
@@ -0,0 +1,95 @@
+import socket
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import Mock, patch
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from generator.fetch import RetryPolicy, prefetch, retry_policy_option
+
+
+def http_error(code):
+    return urllib.error.HTTPError("https://example.com", code, "error", {}, None)
+
+
+def test_retry_transient_errors():
+    fetch = Mock(side_effect=[socket.timeout(), http_error(503), b"content"])
+    policy = RetryPolicy(timeout=5, retries=2, backoff=0)
+    assert policy.call(fetch, "example") == b"content"
+    assert [call.args for call in fetch.call_args_list] == [(5,)] * 3
+
+
+def test_retries_exhausted():
+    fetch = Mock(side_effect=ConnectionResetError())
+    with pytest.raises(ConnectionResetError):
+        RetryPolicy(retries=2, backoff=0).call(fetch, "example")
+    assert fetch.call_count == 3
+
+
+def test_permanent_errors_are_not_retried():
+    fetch = Mock(side_effect=http_error(404))
+    with pytest.raises(urllib.error.HTTPError):
+        RetryPolicy(backoff=0).call(fetch, "example")
+    assert fetch.call_count == 1
+
+
+def test_read_uri(tmp_path):
+    path = tmp_path / "content"
+    path.write_bytes(b"content")
+    assert RetryPolicy().read_uri(path.as_uri()) == b"content"
+
+
+@pytest.mark.parametrize(
+    "reason,transient",
+    [
+        (socket.timeout(), True),
+        (ConnectionRefusedError(), True),
+        (FileNotFoundError(), False),
+        ("unknown url type: 'gs'", False),
+    ],
+)
+def test_url_errors(reason, transient):
+    fetch = Mock(side_effect=[urllib.error.URLError(reason), b"content"])
+    policy = RetryPolicy(backoff=0)
+    if transient:
+        assert policy.call(fetch, "example") == b"content"
+    else:
+        with pytest.raises(urllib.error.URLError):
+            policy.call(fetch, "example")
+        assert fetch.call_count == 1
+
+
+def test_read_missing_file_is_not_retried(tmp_path):
+    with patch.object(urllib.request, "urlopen", wraps=urllib.request.urlopen) as f:
+        with pytest.raises(urllib.error.URLError):
+            RetryPolicy(backoff=0).read_uri((tmp_path / "missing").as_uri())
+    assert f.call_count == 1
+
+
+def test_prefetch_is_concurrent():
+    # each fetch waits for the other to start, which fails if they run in turn
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fetch(value):
+        barrier.wait()
+        return value
+
+    with prefetch({"a": lambda: fetch(1), "b": lambda: fetch(2)}) as fetched:
+        assert fetched["a"].result() == 1
+        assert fetched["b"].result() == 2
+
+
+def test_retry_policy_option():
+    @click.command()
+    @retry_policy_option
+    def command(retry_policy):
+        click.echo(repr(retry_policy))
+
+    runner = CliRunner()
+    result = runner.invoke(command, ["--fetch-timeout", "2.5", "--fetch-retries", "0"])
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == repr(RetryPolicy(2.5, 0))
+    assert runner.invoke(command, ["--fetch-timeout", "0"]).exit_code != 0
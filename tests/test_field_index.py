@@ -0,0 +1,127 @@
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import yaml
+from click.testing import CliRunner
+from google.cloud.bigquery.schema import SchemaField
+
+from generator import lkml_update
+from generator.field_index import FieldIndex
+from generator.lookml import lookml
+
+from .utils import get_mock_bq_client
+
+
+def search(path: Path, query: str):
+    connection = sqlite3.connect(str(path))
+    try:
+        return connection.execute(
+            "SELECT namespace, file, view, kind, name FROM fields "
+            "WHERE fields MATCH ? ORDER BY rank",
+            (query,),
+        ).fetchall()
+    finally:
+        connection.close()
+
+
+def test_field_index(tmp_path):
+    counter = {
+        "name": "metrics__counter__foo",
+        "type": "number",
+        "group_label": "Counter",
+        "group_item_label": "Foo",
+        "description": "Number of foos",
+        "links": [
+            {
+                "label": "Glean Dictionary reference for Foo",
+                "url": "https://dictionary.telemetry.mozilla.org/apps/fenix/metrics/foo",
+            }
+        ],
+    }
+    lookml_obj = {
+        "views": iter(
+            [
+                {
+                    "name": "metrics",
+                    "dimensions": iter([counter, {"name": "client_id"}]),
+                    "dimension_groups": [{"name": "submission", "type": "time"}],
+                    "measures": iter([{"name": "clients", "type": "count"}]),
+                },
+                {"name": "metrics__labeled", "dimensions": [{"name": "key"}]},
+            ]
+        )
+    }
+    path = tmp_path / "fields.sqlite"
+    with FieldIndex(path) as field_index:
+        with field_index.indexing("fenix", "metrics", lookml_obj) as tracked:
+            content = lkml_update.dump(tracked)
+    assert "metrics__counter__foo" in content
+    assert list(tmp_path.iterdir()) == [path]
+
+    assert search(path, '"metrics__counter__foo"') == [
+        ("fenix", "metrics", "metrics", "dimension", "metrics__counter__foo")
+    ]
+    assert search(path, "foo")[0][-1] == "metrics__counter__foo"
+    assert search(path, "links:dictionary") == search(path, '"metrics__counter__foo"')
+    assert search(path, "view:metrics__labeled") == [
+        ("fenix", "metrics", "metrics__labeled", "dimension", "key")
+    ]
+    assert search(path, "name:clients") == [
+        ("fenix", "metrics", "metrics", "measure", "clients")
+    ]
+    assert search(path, "submission")[0][3] == "dimension_group"
+
+
+def test_field_index_error(tmp_path):
+    path = tmp_path / "fields.sqlite"
+    with pytest.raises(ValueError):
+        with FieldIndex(path) as field_index:
+            with field_index.indexing("fenix", "metrics", {"views": []}):
+                raise ValueError()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_lookml_field_index(tmp_path):
+    namespaces = tmp_path / "namespaces.yaml"
+    namespaces.write_text(
+        yaml.safe_dump(
+            {
+                "custom": {
+                    "pretty_name": "Custom",
+                    "glean_app": False,
+                    "views": {
+                        "baseline": {
+                            "type": "ping_view",
+                            "tables": [{"table": "mozdata.custom.baseline"}],
+                        }
+                    },
+                }
+            }
+        )
+    )
+    mock_bq_client = get_mock_bq_client(
+        [SchemaField("client_id", "STRING"), SchemaField("country", "STRING")]
+    )
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path), patch(
+        "google.cloud.bigquery.Client", return_value=mock_bq_client
+    ):
+        args = ["--namespaces", str(namespaces)]
+        result = runner.invoke(
+            lookml, [*args, "--field-index", "fields.sqlite", "--target-dir", "a"]
+        )
+        assert result.exit_code == 0, result.output
+        result = runner.invoke(lookml, [*args, "--target-dir", "b"])
+        assert result.exit_code == 0, result.output
+
+        # indexing doesn't change the generated lookml
+        view = "custom/views/baseline.view.lkml"
+        assert Path("a", view).read_text() == Path("b", view).read_text()
+        assert search(Path("fields.sqlite"), "country") == [
+            ("custom", "baseline", "baseline", "dimension", "country")
+        ]
+        assert search(Path("fields.sqlite"), "clients") == [
+            ("custom", "baseline", "baseline", "measure", "clients")
+        ]
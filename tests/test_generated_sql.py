@@ -0,0 +1,157 @@
+import importlib
+import json
+import os
+import tarfile
+from pathlib import Path
+from textwrap import dedent
+from typing import Any, Dict
+from unittest.mock import patch
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from generator import generated_sql
+from generator.generated_sql import parse_archive, scan_checkout
+from generator.namespaces import namespaces
+
+namespaces_module = importlib.import_module("generator.namespaces")
+
+PROJECT_DIR = "sql/moz-fx-data-shared-prod"
+
+
+def write_metadata(root: Path, view: str, references=None):
+    path = root / PROJECT_DIR / view / "metadata.yaml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    metadata: Dict[str, Any] = {"friendly_name": view}
+    if references is not None:
+        metadata["references"] = {"view.sql": references}
+    path.write_text(yaml.safe_dump(metadata))
+    return path
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    root = tmp_path / "generated-sql"
+    write_metadata(
+        root,
+        "glean_app/baseline",
+        ["moz-fx-data-shared-prod.glean_app_release.baseline_v1"],
+    )
+    write_metadata(
+        root,
+        "glean_app_beta/baseline",
+        ["moz-fx-data-shared-prod.glean_app_beta_stable.baseline_v1"],
+    )
+    # tables aren't views
+    write_metadata(root, "glean_app_derived/baseline_clients_daily_v1")
+    other = root / "sql/other-project/glean_app/other/metadata.yaml"
+    other.parent.mkdir(parents=True)
+    other.write_text("references: {view.sql: [a.b.c]}\n")
+    return root
+
+
+def test_scan_checkout_matches_archive(checkout, tmp_path):
+    archive = tmp_path / "generated-sql.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(checkout, "bigquery-etl-generated-sql")
+
+    db_views = scan_checkout(checkout)
+    assert db_views == parse_archive(archive.read_bytes())
+    assert db_views == {
+        "glean_app": {
+            "baseline": (
+                ("moz-fx-data-shared-prod", "glean_app_release", "baseline_v1"),
+            )
+        },
+        "glean_app_beta": {
+            "baseline": (
+                ("moz-fx-data-shared-prod", "glean_app_beta_stable", "baseline_v1"),
+            )
+        },
+    }
+
+
+def test_scan_checkout_incrementally(checkout, tmp_path):
+    index = tmp_path / "index.json"
+    with patch.object(
+        generated_sql, "safe_load", wraps=generated_sql.safe_load
+    ) as load:
+        first = scan_checkout(checkout, index)
+        assert load.call_count == 3
+
+        # unchanged files aren't parsed again
+        load.reset_mock()
+        assert scan_checkout(checkout, index) == first
+        assert load.call_count == 0
+
+        # changed, added and removed files are
+        path = write_metadata(checkout, "glean_app/baseline", ["p.glean_app.new_v1"])
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        write_metadata(checkout, "glean_app/events", ["p.glean_app.events_v1"])
+        (checkout / PROJECT_DIR / "glean_app_beta/baseline/metadata.yaml").unlink()
+        db_views = scan_checkout(checkout, index)
+        assert load.call_count == 2
+        assert db_views == {
+            "glean_app": {
+                "baseline": (("p", "glean_app", "new_v1"),),
+                "events": (("p", "glean_app", "events_v1"),),
+            }
+        }
+
+        # the index of another checkout isn't used
+        load.reset_mock()
+        other = tmp_path / "other"
+        other.mkdir()
+        (checkout / "sql").rename(other / "sql")
+        assert scan_checkout(other, index) == db_views
+        assert load.call_count == 3
+
+    assert json.loads(index.read_text())["root"] == str(other.resolve())
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "generated-sql",
+        "index.json",
+        "other",
+    ]
+
+
+def test_namespaces_generated_sql_dir(checkout, tmp_path, app_listings_uri):
+    custom_namespaces = tmp_path / "custom-namespaces.yaml"
+    custom_namespaces.write_text("{}\n")
+    disallowlist = tmp_path / "namespaces-disallowlist.yaml"
+    disallowlist.write_text("")
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path), patch.object(
+        namespaces_module, "_fetch_generated_sql", side_effect=AssertionError
+    ):
+        result = runner.invoke(
+            namespaces,
+            [
+                "--custom-namespaces",
+                str(custom_namespaces),
+                "--app-listings-uri",
+                app_listings_uri,
+                "--disallowlist",
+                str(disallowlist),
+                "--generated-sql-dir",
+                str(checkout),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        actual = yaml.safe_load(Path("namespaces.yaml").read_text())
+        assert Path(".generated-sql-index.json").is_file()
+
+    baseline = actual["glean-app"]["views"]["baseline"]
+    assert baseline == yaml.safe_load(
+        dedent(
+            """
+            type: glean_ping_view
+            tables:
+            - channel: release
+              table: mozdata.glean_app.baseline
+            - channel: beta
+              table: mozdata.glean_app_beta.baseline
+            """
+        )
+    )
@@ -34,7 +34,7 @@ class MockClient:
         raise ValueError(f"Table not found: {table_ref}")
 
 
-@patch("generator.views.glean_ping_view.GleanPing")
+@patch("generator.glean_probes.GleanPing")
 def test_kebab_case(mock_glean_ping):
     """
     Tests that we handle metrics from kebab-case pings
@@ -73,3 +73,42 @@ def test_kebab_case(mock_glean_ping):
         lookml["views"][0]["dimensions"][0]["name"]
         == "metrics__string__fun_string_metric"
     )
+
+
+@patch("generator.glean_probes.GleanPing")
+def test_schema_and_probes_fetched_once(mock_glean_ping):
+    """
+    Tests that generating a view reads the schema and probes only once
+    """
+    mock_glean_ping.get_repos.return_value = [{"name": "glean-app"}]
+    glean_app = Mock()
+    glean_app.get_probes.return_value = [
+        GleanProbe(
+            "fun.string_metric",
+            {
+                "type": "string",
+                "history": [
+                    {
+                        "send_in_pings": ["dash-name"],
+                        "dates": {
+                            "first": "2020-01-01 00:00:00",
+                            "last": "2020-01-02 00:00:00",
+                        },
+                    }
+                ],
+                "name": "string_metric",
+            },
+        ),
+    ]
+    mock_glean_ping.return_value = glean_app
+    mock_bq_client = Mock(wraps=MockClient())
+    view = GleanPingView(
+        "glean_app",
+        "dash_name",
+        [{"channel": "release", "table": "mozdata.glean_app.dash_name"}],
+    )
+    view.to_lookml(mock_bq_client, "glean-app")
+
+    mock_bq_client.get_table.assert_called_once_with("mozdata.glean_app.dash_name")
+    mock_glean_ping.get_repos.assert_called_once()
+    glean_app.get_probes.assert_called_once()
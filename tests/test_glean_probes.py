@@ -0,0 +1,29 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from generator import glean_probes
+
+
+@patch("generator.glean_probes.GleanPing")
+def test_fetched_once_by_concurrent_views(mock_glean_ping):
+    mock_glean_ping.get_repos.return_value = [{"name": "glean-app-release"}]
+    glean_app = Mock()
+    # a slow download, which other threads must wait for instead of repeating
+    glean_app.get_probes.side_effect = lambda: time.sleep(0.05) or ["probe"]
+    mock_glean_ping.return_value = glean_app
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(
+                lambda _: glean_probes.get_probes("glean-app-release"), range(8)
+            )
+        )
+    assert results == [["probe"]] * 8
+    mock_glean_ping.get_repos.assert_called_once()
+    glean_app.get_probes.assert_called_once()
+
+    glean_probes.forget("glean-app-release")
+    glean_probes.get_probes("glean-app-release")
+    assert glean_app.get_probes.call_count == 2
+    mock_glean_ping.get_repos.assert_called_once()
@@ -0,0 +1,198 @@
+from copy import deepcopy
+from io import StringIO
+from textwrap import dedent
+
+import lkml
+import pytest
+
+from generator.lkml_update import dump
+
+CORPUS = [
+    {"includes": ["/looker-hub/a/views/a.view.lkml"]},
+    {
+        "includes": [
+            "/looker-hub/a/views/a.view.lkml",
+            "/looker-hub/a/views/b.view.lkml",
+        ],
+        "views": [
+            {
+                "name": "a",
+                "sql_table_name": "`mozdata.a.a`",
+                "dimensions": [
+                    {
+                        "name": "client_id",
+                        "sql": "${TABLE}.client_id",
+                        "hidden": "yes",
+                    },
+                    {
+                        "name": "country",
+                        "type": "string",
+                        "sql": "${TABLE}.country",
+                        "map_layer_name": "countries",
+                        "description": 'The "country"',
+                        "links": [
+                            {
+                                "label": "Dictionary",
+                                "url": "https://example.com",
+                                "icon_url": "https://example.com/favicon.png",
+                            }
+                        ],
+                    },
+                ],
+                "dimension_groups": [
+                    {
+                        "name": "submission",
+                        "type": "time",
+                        "sql": "${TABLE}.submission_timestamp",
+                        "timeframes": [
+                            "raw",
+                            "time",
+                            "date",
+                            "week",
+                            "month",
+                            "quarter",
+                            "year",
+                        ],
+                    }
+                ],
+                "measures": [
+                    {"name": "clients", "type": "count_distinct", "sql": "${x}"},
+                    {
+                        "name": "counter_client_count",
+                        "type": "count_distinct",
+                        "filters": [{"metrics__counter__x": ">0"}],
+                        "sql": "${client_id}",
+                    },
+                ],
+                "parameters": [
+                    {
+                        "name": "channel",
+                        "type": "unquoted",
+                        "default_value": "mozdata.a.a",
+                        "allowed_values": [
+                            {"label": "Release", "value": "mozdata.a.a"},
+                            {"label": "Beta", "value": "mozdata.a_beta.a"},
+                        ],
+                    }
+                ],
+            },
+            {
+                "name": "suggest__a",
+                "derived_table": {"sql": "\n    select 1\n"},
+                "dimensions": [],
+                "measures": [],
+            },
+            {"name": "empty", "extends": ["a"]},
+        ],
+    },
+    {
+        "explores": [
+            {
+                "name": "a",
+                "view_name": "a",
+                "always_filter": {"filters": [{"channel": "release"}]},
+                "joins": [
+                    {"name": "b", "relationship": "one_to_many", "sql": "x"},
+                ],
+            },
+            {"name": "b", "hidden": "yes"},
+        ]
+    },
+    {
+        "views": [
+            {
+                "name": "c",
+                "filters": [{"name": "f", "type": "string"}],
+                "dimensions": [{"name": "d", "suggestions": ["a", "b"]}],
+            },
+            {
+                "name": "d",
+                "measures": [
+                    {
+                        "name": "m",
+                        "filters": [{"field": "d", "value": "yes"}],
+                    }
+                ],
+            },
+        ]
+    },
+]
+
+
+@pytest.mark.parametrize("obj", CORPUS)
+def test_matches_lkml(obj):
+    assert dump(obj) == lkml.dump(deepcopy(obj))
+
+
+@pytest.mark.parametrize("obj", CORPUS)
+def test_does_not_mutate(obj):
+    expected = deepcopy(obj)
+    dump(obj)
+    assert obj == expected
+
+
+def test_dump_to_file():
+    out = StringIO()
+    assert dump(CORPUS[1], out) is None
+    assert out.getvalue() == dump(CORPUS[1])
+
+
+def test_queries_are_not_expanded():
+    obj = {
+        "explores": [
+            {
+                "name": "client_counts",
+                "queries": [
+                    {
+                        "description": "Client Counts.",
+                        "dimensions": ["days_since_first_seen", "first_seen_week"],
+                        "measures": ["client_count"],
+                        "filters": [{"submission_date": "8 weeks"}],
+                        "name": "cohort_analysis",
+                    }
+                ],
+            }
+        ]
+    }
+    expected = dedent(
+        """\
+        explore: client_counts {
+          query: cohort_analysis {
+            description: "Client Counts."
+            dimensions: [days_since_first_seen, first_seen_week]
+            measures: [client_count]
+            filters: [
+              submission_date: "8 weeks",
+            ]
+          }
+        }"""
+    )
+    assert dump(obj) == expected
+
+
+def test_invalid_type():
+    with pytest.raises(TypeError):
+        dump({"views": [{"name": "a", "hidden": True}]})
+
+
+def test_iterators_are_written_incrementally():
+    out = StringIO()
+
+    def dimensions():
+        for i in range(3):
+            # everything generated so far has already been written
+            assert out.getvalue().count("dimension:") == i
+            yield {"name": f"d{i}", "sql": f"${{TABLE}}.d{i}"}
+
+    dump({"views": iter([{"name": "a", "dimensions": dimensions()}])}, out)
+    expected = {
+        "views": [
+            {
+                "name": "a",
+                "dimensions": [
+                    {"name": f"d{i}", "sql": f"${{TABLE}}.d{i}"} for i in range(3)
+                ],
+            }
+        ]
+    }
+    assert out.getvalue() == lkml.dump(expected)
@@ -12,8 +12,9 @@ from google.cloud.bigquery.schema import SchemaField
 from mozilla_schema_generator.probes import GleanProbe
 
 from generator.explores import ClientCountsExplore
-from generator.lookml import _lookml
+from generator.lookml import _generate_view, _lookml, lookml
 from generator.views import ClientCountsView, GrowthAccountingView
+from generator.views.lookml_utils import _materialize
 
 from .utils import print_and_test
 
@@ -635,8 +636,7 @@ def msg_glean_probes():
 
 @contextlib.contextmanager
 def _prepare_lookml_actual_test(
-    mock_glean_ping_view,
-    mock_glean_ping_explore,
+    mock_glean_ping,
     runner,
     glean_apps,
     tmp_path,
@@ -702,14 +702,13 @@ def _prepare_lookml_actual_test(
             """
     )
     namespaces.write_text(namespaces_text)
-    for mock in [mock_glean_ping_view, mock_glean_ping_explore]:
-        mock.get_repos.return_value = [{"name": "glean-app-release"}]
-        glean_app = Mock()
-        glean_app.get_probes.return_value = msg_glean_probes
-        glean_app.get_ping_descriptions.return_value = {
-            "baseline": "The baseline ping\n    is foo."
-        }
-        mock.return_value = glean_app
+    mock_glean_ping.get_repos.return_value = [{"name": "glean-app-release"}]
+    glean_app = Mock()
+    glean_app.get_probes.return_value = msg_glean_probes
+    glean_app.get_ping_descriptions.return_value = {
+        "baseline": "The baseline ping\n    is foo."
+    }
+    mock_glean_ping.return_value = glean_app
 
     with runner.isolated_filesystem():
         with patch("google.cloud.bigquery.Client", MockClient):
@@ -717,19 +716,16 @@ def _prepare_lookml_actual_test(
             yield namespaces_text
 
 
-@patch("generator.views.glean_ping_view.GleanPing")
-@patch("generator.explores.glean_ping_explore.GleanPing")
+@patch("generator.glean_probes.GleanPing")
 def test_lookml_actual_baseline_view(
-    mock_glean_ping_view,
-    mock_glean_ping_explore,
+    mock_glean_ping,
     runner,
     glean_apps,
     tmp_path,
     msg_glean_probes,
 ):
     with _prepare_lookml_actual_test(
-        mock_glean_ping_view,
-        mock_glean_ping_explore,
+        mock_glean_ping,
         runner,
         glean_apps,
         tmp_path,
@@ -781,19 +777,16 @@ def test_lookml_actual_baseline_view(
         print_and_test(namespaces_text, open(Path("looker-hub/namespaces.yaml")).read())
 
 
-@patch("generator.views.glean_ping_view.GleanPing")
-@patch("generator.explores.glean_ping_explore.GleanPing")
+@patch("generator.glean_probes.GleanPing")
 def test_lookml_actual_baseline_view_parameterized(
-    mock_glean_ping_view,
-    mock_glean_ping_explore,
+    mock_glean_ping,
     runner,
     glean_apps,
     tmp_path,
     msg_glean_probes,
 ):
     with _prepare_lookml_actual_test(
-        mock_glean_ping_view,
-        mock_glean_ping_explore,
+        mock_glean_ping,
         runner,
         glean_apps,
         tmp_path,
@@ -963,19 +956,16 @@ def test_lookml_actual_baseline_view_parameterized(
         )
 
 
-@patch("generator.views.glean_ping_view.GleanPing")
-@patch("generator.explores.glean_ping_explore.GleanPing")
+@patch("generator.glean_probes.GleanPing")
 def test_lookml_actual_metrics_view(
-    mock_glean_ping_view,
-    mock_glean_ping_explore,
+    mock_glean_ping,
     runner,
     glean_apps,
     tmp_path,
     msg_glean_probes,
 ):
     with _prepare_lookml_actual_test(
-        mock_glean_ping_view,
-        mock_glean_ping_explore,
+        mock_glean_ping,
         runner,
         glean_apps,
         tmp_path,
@@ -1495,19 +1485,16 @@ def test_lookml_actual_metrics_view(
         )
 
 
-@patch("generator.views.glean_ping_view.GleanPing")
-@patch("generator.explores.glean_ping_explore.GleanPing")
+@patch("generator.glean_probes.GleanPing")
 def test_lookml_actual_growth_accounting_view(
-    mock_glean_ping_view,
-    mock_glean_ping_explore,
+    mock_glean_ping,
     runner,
     glean_apps,
     tmp_path,
     msg_glean_probes,
 ):
     with _prepare_lookml_actual_test(
-        mock_glean_ping_view,
-        mock_glean_ping_explore,
+        mock_glean_ping,
         runner,
         glean_apps,
         tmp_path,
@@ -1536,8 +1523,8 @@ def test_lookml_actual_growth_accounting_view(
                             "sql": "${TABLE}.document_id",
                         },
                     ]
-                    + GrowthAccountingView.default_dimensions,
-                    "measures": GrowthAccountingView.default_measures,
+                    + _materialize(GrowthAccountingView.default_dimensions),
+                    "measures": _materialize(GrowthAccountingView.default_measures),
                 }
             ]
         }
@@ -1553,19 +1540,16 @@ def test_lookml_actual_growth_accounting_view(
         )
 
 
-@patch("generator.views.glean_ping_view.GleanPing")
-@patch("generator.explores.glean_ping_explore.GleanPing")
+@patch("generator.glean_probes.GleanPing")
 def test_lookml_actual_baseline_explore(
-    mock_glean_ping_view,
-    mock_glean_ping_explore,
+    mock_glean_ping,
     runner,
     glean_apps,
     tmp_path,
     msg_glean_probes,
 ):
     with _prepare_lookml_actual_test(
-        mock_glean_ping_view,
-        mock_glean_ping_explore,
+        mock_glean_ping,
         runner,
         glean_apps,
         tmp_path,
@@ -1597,19 +1581,16 @@ def test_lookml_actual_baseline_explore(
         )
 
 
-@patch("generator.views.glean_ping_view.GleanPing")
-@patch("generator.explores.glean_ping_explore.GleanPing")
+@patch("generator.glean_probes.GleanPing")
 def test_lookml_actual_client_counts(
-    mock_glean_ping_view,
-    mock_glean_ping_explore,
+    mock_glean_ping,
     runner,
     glean_apps,
     tmp_path,
     msg_glean_probes,
 ):
     with _prepare_lookml_actual_test(
-        mock_glean_ping_view,
-        mock_glean_ping_explore,
+        mock_glean_ping,
         runner,
         glean_apps,
         tmp_path,
@@ -1621,9 +1602,11 @@ def test_lookml_actual_client_counts(
                 {
                     "extends": ["baseline_clients_daily_table"],
                     "name": "client_counts",
-                    "dimensions": ClientCountsView.default_dimensions,
-                    "dimension_groups": ClientCountsView.default_dimension_groups,
-                    "measures": ClientCountsView.default_measures,
+                    "dimensions": _materialize(ClientCountsView.default_dimensions),
+                    "dimension_groups": _materialize(
+                        ClientCountsView.default_dimension_groups
+                    ),
+                    "measures": _materialize(ClientCountsView.default_measures),
                 }
             ],
         }
@@ -1652,7 +1635,7 @@ def test_lookml_actual_client_counts(
                             ],
                         ],
                     },
-                    "queries": ClientCountsExplore.queries,
+                    "queries": _materialize(ClientCountsExplore.queries),
                     "sql_always_where": "${client_counts.submission_date} >= '2010-01-01'",
                 }
             ],
@@ -1762,3 +1745,60 @@ def test_context_id(runner, glean_apps, tmp_path):
             lkml.load(lkml.dump(expected)),
             lkml.load(Path("looker-hub/custom/views/context.view.lkml").read_text()),
         )
+
+
+def test_lookml_allowlist(runner, tmp_path):
+    namespaces = tmp_path / "namespaces.yaml"
+    namespaces.write_text(
+        dedent(
+            """
+            allowed:
+              pretty_name: Allowed
+              views: {}
+            disallowed:
+              pretty_name: Disallowed
+              views: {}
+            unlisted:
+              pretty_name: Unlisted
+              views: {}
+            """
+        )
+    )
+    allowlist = tmp_path / "namespaces-allowlist.yaml"
+    allowlist.write_text("- allowed\n- disallowed\n")
+    disallowlist = tmp_path / "namespaces-disallowlist.yaml"
+    disallowlist.write_text("- disallowed\n")
+    with runner.isolated_filesystem():
+        with patch("google.cloud.bigquery.Client", MockClient):
+            result = runner.invoke(
+                lookml,
+                [
+                    "--namespaces",
+                    str(namespaces),
+                    "--allowlist",
+                    str(allowlist),
+                    "--disallowlist",
+                    str(disallowlist),
+                ],
+            )
+        assert result.exit_code == 0, result.output
+        assert sorted(p.name for p in Path("looker-hub").iterdir() if p.is_dir()) == [
+            "allowed"
+        ]
+
+
+def test_failed_view_leaves_no_partial_file(tmp_path):
+    def iter_views():
+        yield {"name": "baseline", "dimensions": [{"name": "a", "type": "string"}]}
+        raise ValueError("schema lookup failed")
+
+    path = tmp_path / "baseline.view.lkml"
+    path.write_text("view: baseline {}\n")
+    view = Mock(namespace="glean-app", view_type="ping_view")
+    view.name = "baseline"
+    view.iter_lookml.return_value = {"views": iter_views()}
+    with pytest.raises(ValueError):
+        _generate_view(None, tmp_path, view, None)
+    # the previous version of the view is kept
+    assert [p.name for p in tmp_path.iterdir()] == ["baseline.view.lkml"]
+    assert path.read_text() == "view: baseline {}\n"
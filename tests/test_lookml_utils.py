@@ -1,5 +1,168 @@
+import re
+import timeit
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pytest
+from google.cloud.bigquery.schema import SchemaField
+
+from generator.views import PingView, lookml_utils
 from generator.views.lookml_utils import escape_filter_expr
 
+from .utils import get_mock_bq_client
+
+FIELD_TYPES = ["STRING", "INTEGER", "FLOAT", "BOOLEAN", "TIMESTAMP", "DATE", "BYTES"]
+
+
+def wide_schema(n_fields: int) -> List[SchemaField]:
+    """Build a Glean-like schema with roughly `n_fields` leaf fields."""
+    metric_types = [f"metric_type_{i}" for i in range(10)]
+    per_type = n_fields // len(metric_types)
+    return [
+        SchemaField("submission_timestamp", "TIMESTAMP"),
+        SchemaField("submission_date", "DATE"),
+        SchemaField(
+            "client_info", "RECORD", fields=[SchemaField("client_id", "STRING")]
+        ),
+        SchemaField(
+            "metrics",
+            "RECORD",
+            fields=[
+                SchemaField(
+                    metric_type,
+                    "RECORD",
+                    fields=[
+                        SchemaField(
+                            f"category_{i % 7}_metric_{i}",
+                            FIELD_TYPES[i % len(FIELD_TYPES)],
+                            mode="REPEATED" if i % 11 == 0 else "NULLABLE",
+                            description=f"Metric {i}" if i % 3 == 0 else None,
+                        )
+                        for i in range(per_type)
+                    ],
+                )
+                for metric_type in metric_types
+            ],
+        ),
+    ]
+
+
+def _reference_get_dimension(
+    path: Tuple[str, ...], field_type: str, mode: str, description: Optional[str]
+) -> Dict[str, Any]:
+    """Recursive dimension generation, as it was before the iterative flattener."""
+    result: Dict[str, Any] = {}
+    result["sql"] = "${TABLE}." + ".".join(path)
+    name = path
+    if (
+        mode == "REPEATED"
+        or path in lookml_utils.HIDDEN_DIMENSIONS
+        or field_type not in lookml_utils.BIGQUERY_TYPE_TO_DIMENSION_TYPE
+    ):
+        result["hidden"] = "yes"
+    else:
+        result["type"] = lookml_utils.BIGQUERY_TYPE_TO_DIMENSION_TYPE[field_type]
+
+        group_label, group_item_label = None, None
+        if len(path) > 1:
+            group_label = " ".join(path[:-1]).replace("_", " ").title()
+            group_item_label = path[-1].replace("_", " ").title()
+        if result["type"] == "time":
+            name = *path[:-1], re.sub("_(date|time(stamp)?)$", "", path[-1])
+            result["timeframes"] = [
+                "raw",
+                "time",
+                "date",
+                "week",
+                "month",
+                "quarter",
+                "year",
+            ]
+            if field_type == "DATE":
+                result["timeframes"].remove("time")
+                result["convert_tz"] = "no"
+                result["datatype"] = "date"
+            if group_label and group_item_label:
+                result["label"] = f"{group_label}: {group_item_label}"
+        elif len(path) > 1:
+            result["group_label"] = group_label
+            result["group_item_label"] = group_item_label
+        if path in lookml_utils.MAP_LAYER_NAMES:
+            result["map_layer_name"] = lookml_utils.MAP_LAYER_NAMES[path]
+    result["name"] = "__".join(name)
+
+    if description:
+        result["description"] = description
+
+    return result
+
+
+def _reference_helper(schema: List[SchemaField], *prefix: str) -> Iterable[dict]:
+    for field in sorted(schema, key=lambda f: f.name):
+        if field.field_type == "RECORD" and not field.mode == "REPEATED":
+            yield from _reference_helper(field.fields, *prefix, field.name)
+        else:
+            yield _reference_get_dimension(
+                (*prefix, field.name), field.field_type, field.mode, field.description
+            )
+
+
+def test_wide_schema_dimensions():
+    schema = wide_schema(10_000)
+    expected = list(_reference_helper(schema))
+    actual = list(lookml_utils._generate_dimensions_helper(schema))
+    assert len(actual) > 10_000
+    assert actual == expected
+    # key order determines the order of fields in the written LookML
+    assert [list(d) for d in actual] == [list(d) for d in expected]
+
+
+def test_ping_view_built_lazily(monkeypatch):
+    built = []
+    dimension = lookml_utils.SchemaColumns.dimension
+    monkeypatch.setattr(
+        lookml_utils.SchemaColumns,
+        "dimension",
+        lambda self, i: built.append(i) or dimension(self, i),
+    )
+    client = get_mock_bq_client(wide_schema(100))
+    view = PingView("glean_app", "baseline", [{"table": "mozdata.glean_app.baseline"}])
+    lookml = view.iter_lookml(client, None)
+    [view_defn] = lookml["views"]
+    # nothing is built until the view is written, and dimensions are built
+    # one at a time as they're consumed
+    assert built == []
+    next(view_defn["dimensions"])
+    assert len(built) <= 2
+    # the rest are generated as the view is written
+    rest = lookml_utils._materialize(view_defn)
+    expected = view.to_lookml(client, None)["views"][0]
+    assert rest["dimensions"] == expected["dimensions"][1:]
+    assert rest["measures"] == expected["measures"]
+    assert expected["measures"] == [
+        {
+            "name": "clients",
+            "type": "count_distinct",
+            "sql": "${client_info__client_id}",
+        }
+    ]
+
+
+@pytest.mark.benchmark
+def test_wide_schema_dimensions_benchmark(request):
+    schema = wide_schema(10_000)
+    reference = min(
+        timeit.repeat(lambda: list(_reference_helper(schema)), number=1, repeat=5)
+    )
+    actual = min(
+        timeit.repeat(
+            lambda: list(lookml_utils._generate_dimensions_helper(schema)),
+            number=1,
+            repeat=5,
+        )
+    )
+    # only fail if the iterative helper is clearly slower than the recursive one
+    assert actual < reference * request.config.getoption("bench_threshold")
+
 
 def test_escape_char():
     expr = "a_b"
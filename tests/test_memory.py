@@ -0,0 +1,56 @@
+import json
+import tracemalloc
+
+import click
+from click.testing import CliRunner
+
+from generator import memory
+
+
+def _allocate():
+    return [bytearray(1024) for _ in range(1000)]
+
+
+def test_checkpoint_without_report():
+    memory.checkpoint("stage")
+    assert memory._report is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_recording(tmp_path):
+    path = tmp_path / "memory.json"
+    with memory.recording(path, "test"):
+        allocated = _allocate()
+        memory.checkpoint("allocate")
+        del allocated
+    assert memory._report is None
+    assert not tracemalloc.is_tracing()
+
+    stages = json.loads(path.read_text())["stages"]
+    assert [stage["stage"] for stage in stages] == ["allocate", "test"]
+    allocate = stages[0]
+    assert allocate["current_bytes"] >= 1000 * 1024
+    assert allocate["peak_bytes"] >= allocate["current_bytes"]
+    assert allocate["peak_rss_bytes"] >= allocate["current_bytes"]
+    [top, *_] = allocate["top_allocations"]
+    assert "test_memory.py" in top["site"]
+    assert top["size_diff_bytes"] >= 1000 * 1024
+    # memory freed after the last checkpoint isn't reported as allocated
+    assert stages[1]["current_bytes"] < allocate["current_bytes"]
+
+
+def test_memory_report_option(tmp_path):
+    @click.command()
+    @memory.memory_report_option
+    def allocate():
+        _allocate()
+        memory.checkpoint("allocate")
+
+    runner = CliRunner()
+    assert runner.invoke(allocate, []).exit_code == 0
+
+    path = tmp_path / "memory.json"
+    result = runner.invoke(allocate, ["--memory-report", str(path)])
+    assert result.exit_code == 0
+    stages = json.loads(path.read_text())["stages"]
+    assert [stage["stage"] for stage in stages] == ["allocate", "allocate"]
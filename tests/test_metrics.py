@@ -0,0 +1,130 @@
+import click
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from generator import metrics, tracing
+from generator.spoke import update_spoke
+from generator.views import lookml_utils
+
+
+def parse(text):
+    """Parse samples from the Prometheus text format, keyed by name and labels."""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        key, value = line.rsplit(" ", 1)
+        samples[key] = float(value)
+    return samples
+
+
+def test_run_metrics():
+    run_metrics = metrics.RunMetrics("lookml")
+    tracing.add_listener(run_metrics.observe)
+    try:
+        with tracing.span("generate_namespace", namespace="glean-app"):
+            with tracing.span("get_table", "network", table="a.b"):
+                pass
+            with tracing.span("get_table", "network", table="a.c"):
+                pass
+            with tracing.span("write_lookml", "io", view="baseline") as attrs:
+                attrs["bytes"] = 100
+            with tracing.span("write_lookml", "io", explore="baseline") as attrs:
+                attrs["bytes"] = 50
+        with tracing.span("generate_namespace", namespace="glean-app"):
+            pass
+        lookml_utils._title("metric_name_for_test_run_metrics")
+        lookml_utils._title("metric_name_for_test_run_metrics")
+    finally:
+        tracing.remove_listener(run_metrics.observe)
+    run_metrics.success = True
+
+    samples = parse(run_metrics.to_text())
+    command = 'command="lookml"'
+    assert samples[f"lookml_generator_last_run_success{{{command}}}"] == 1
+    assert samples[f"lookml_generator_namespaces_total{{{command}}}"] == 1
+    assert samples[f"lookml_generator_views_total{{{command}}}"] == 1
+    assert samples[f"lookml_generator_explores_total{{{command}}}"] == 1
+    assert samples[f"lookml_generator_files_written_total{{{command}}}"] == 2
+    assert samples[f"lookml_generator_bytes_written_total{{{command}}}"] == 150
+    assert (
+        samples[
+            f'lookml_generator_stage_duration_seconds_count{{{command},stage="write_lookml"}}'
+        ]
+        == 2
+    )
+    call = f'{command},call="get_table"'
+    assert samples[f"lookml_generator_api_call_duration_seconds_count{{{call}}}"] == 2
+    assert (
+        samples[
+            f'lookml_generator_api_call_duration_seconds_bucket{{{call},le="+Inf"}}'
+        ]
+        == 2
+    )
+    assert (
+        samples[f'lookml_generator_api_call_duration_seconds_bucket{{{call},le="60"}}']
+        == 2
+    )
+    cache = f'{command},cache="title"'
+    assert samples[f"lookml_generator_cache_hits_total{{{cache}}}"] == 1
+    assert samples[f"lookml_generator_cache_misses_total{{{cache}}}"] == 1
+    assert samples[f"lookml_generator_cache_hit_ratio{{{cache}}}"] == 0.5
+
+
+def test_escape_labels():
+    assert metrics._format_labels((("a", 'x"y\\z\n'),)) == r'{a="x\"y\\z\n"}'
+
+
+def test_metrics_option_on_failure(tmp_path):
+    @click.command()
+    @metrics.metrics_option
+    def fail():
+        raise click.ClickException("failed")
+
+    path = tmp_path / "metrics.prom"
+    result = CliRunner().invoke(fail, ["--metrics-textfile", str(path)])
+    assert result.exit_code == 1
+    samples = parse(path.read_text())
+    assert samples['lookml_generator_last_run_success{command="fail"}'] == 0
+    assert not tracing._listeners
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize("args", [[], ["--trace", "trace.json"]])
+def test_update_spoke_metrics(tmp_path, args):
+    namespaces = tmp_path / "namespaces.yaml"
+    namespaces.write_text(
+        yaml.safe_dump(
+            {
+                "glean-app": {
+                    "pretty_name": "Glean App",
+                    "glean_app": True,
+                    "spoke": "looker-spoke-default",
+                    "views": {},
+                    "explores": {},
+                }
+            }
+        )
+    )
+    path = tmp_path / "metrics.prom"
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path):
+        result = runner.invoke(
+            update_spoke,
+            [
+                "--namespaces",
+                str(namespaces),
+                "--spoke-dir",
+                str(tmp_path),
+                "--metrics-textfile",
+                str(path),
+                *args,
+            ],
+            env={"LOOKER_API_CLIENT_ID": None},
+        )
+    assert result.exit_code == 0, result.output
+    samples = parse(path.read_text())
+    command = 'command="update-spoke"'
+    assert samples[f"lookml_generator_last_run_success{{{command}}}"] == 1
+    assert samples[f"lookml_generator_files_written_total{{{command}}}"] == 1
@@ -1,3 +1,4 @@
+import importlib
 import sys
 import tarfile
 from io import BytesIO
@@ -27,6 +28,8 @@ from generator.views import (
 
 from .utils import print_and_test
 
+namespaces_module = importlib.import_module("generator.namespaces")
+
 
 @pytest.fixture
 def runner():
@@ -106,17 +109,17 @@ class MockBlob:
         self.name = name
         self.updated = "2021-05-01"
 
-    def download_as_string(self):
+    def download_as_string(self, **kwargs):
         return '{"slug": "test", "name": "op_mon"}'
 
 
 class MockBucket:
     """Mock Bucket."""
 
-    def list_blobs(self, prefix):
+    def list_blobs(self, prefix, **kwargs):
         return [MockBlob("test")]
 
-    def get_blob(self, filename):
+    def get_blob(self, filename, **kwargs):
         return MockBlob("test")
 
 
@@ -126,7 +129,7 @@ class MockStorageClient:
     def __init__(self, project_name):
         pass
 
-    def get_bucket(self, bucket_name):
+    def get_bucket(self, bucket_name, **kwargs):
         return MockBucket()
 
 
@@ -314,6 +317,7 @@ def test_namespaces_full(
                     ],
                     "pretty_name": "Glean App",
                     "spoke": "looker-spoke-default",
+                    "v1_name": "glean-app-release",
                     "views": {
                         "baseline_clients_daily_table": {
                             "tables": [
@@ -439,6 +443,112 @@ def test_namespaces_full(
             print_and_test(expected, actual)
 
 
+def test_namespaces_select(
+    runner,
+    custom_namespaces,
+    generated_sql_uri,
+    app_listings_uri,
+    namespace_disallowlist,
+):
+    existing = {
+        "other": {"pretty_name": "Other", "views": {}},
+        "custom": {"pretty_name": "Old Custom", "views": {}},
+        "glean-app": {
+            "pretty_name": "Old Glean App",
+            "views": {
+                "baseline": {"type": "ping_view", "tables": []},
+                "stale": {"type": "ping_view", "tables": []},
+            },
+            "explores": {"stale": {"type": "ping_explore"}},
+        },
+    }
+    # operational monitoring isn't selected, so its bucket isn't listed
+    with patch("google.cloud.storage.Client", side_effect=AssertionError):
+        with runner.isolated_filesystem():
+            Path("namespaces.yaml").write_text(yaml.safe_dump(existing))
+            result = runner.invoke(
+                namespaces,
+                [
+                    "--custom-namespaces",
+                    custom_namespaces,
+                    "--generated-sql-uri",
+                    generated_sql_uri,
+                    "--app-listings-uri",
+                    app_listings_uri,
+                    "--disallowlist",
+                    namespace_disallowlist,
+                    "--select",
+                    "cust*",
+                    "--select",
+                    "re:glean-.*/views/baseline(_table)?",
+                ],
+            )
+            assert result.exit_code == 0, result.output
+            actual = yaml.safe_load(Path("namespaces.yaml").read_text())
+
+    assert set(actual) == {"other", "custom", "glean-app"}
+    assert actual["other"] == existing["other"]
+    assert actual["custom"]["pretty_name"] == "Custom"
+    glean_app = actual["glean-app"]
+    assert glean_app["pretty_name"] == "Old Glean App"
+    assert set(glean_app["views"]) == {"baseline", "baseline_table", "stale"}
+    assert glean_app["views"]["baseline"]["type"] == "glean_ping_view"
+    assert glean_app["explores"] == existing["glean-app"]["explores"]
+
+
+def test_namespaces_pruned(runner, tmp_path, app_listings_uri, generated_sql_uri):
+    custom_namespaces = tmp_path / "custom-namespaces.yaml"
+    custom_namespaces.write_text(
+        yaml.safe_dump(
+            {
+                "glean-app": {"glean_app": False, "pretty_name": "Not Glean"},
+                "custom": {"pretty_name": "Custom"},
+                "operational_monitoring": {"pretty_name": "Operational Monitoring"},
+            }
+        )
+    )
+    allowlist = tmp_path / "namespaces-allowlist.yaml"
+    allowlist.write_text("- glean-app\n- custom\n- other\n")
+    disallowlist = tmp_path / "namespaces-disallowlist.yaml"
+    disallowlist.write_text("- custom\n")
+
+    # glean-app is replaced, and operational monitoring isn't allowed, so
+    # neither views nor opmon projects are looked up
+    with patch.object(
+        namespaces_module, "parse_archive", side_effect=AssertionError
+    ), patch.object(
+        namespaces_module, "_get_looker_views", side_effect=AssertionError
+    ), patch(
+        "google.cloud.storage.Client", side_effect=AssertionError
+    ):
+        with runner.isolated_filesystem():
+            result = runner.invoke(
+                namespaces,
+                [
+                    "--custom-namespaces",
+                    str(custom_namespaces),
+                    "--generated-sql-uri",
+                    generated_sql_uri,
+                    "--app-listings-uri",
+                    app_listings_uri,
+                    "--disallowlist",
+                    str(disallowlist),
+                    "--allowlist",
+                    str(allowlist),
+                ],
+            )
+            assert result.exit_code == 0, result.output
+            actual = yaml.safe_load(Path("namespaces.yaml").read_text())
+
+    assert actual == {
+        "glean-app": {
+            "glean_app": False,
+            "pretty_name": "Not Glean",
+            "spoke": "looker-spoke-default",
+        }
+    }
+
+
 def test_get_glean_apps(app_listings_uri, glean_apps):
     assert _get_glean_apps(app_listings_uri) == glean_apps
 
@@ -513,6 +623,28 @@ def test_get_looker_views(glean_apps, generated_sql_uri):
     print_and_test(expected, actual)
 
 
+def test_get_db_views(tmp_path):
+    reference = "moz-fx-data-shared-prod.glean_app_derived.events_daily_v1"
+    paths = {
+        f"sql/moz-fx-data-shared-prod/{dataset}/{view}/metadata.yaml": f"""
+            references:
+              view.sql:
+              - {reference}
+            """
+        for dataset, view in (("glean_app", "events_daily"), ("other", "events"))
+    }
+    db_views = _get_db_views(paths_to_tar(tmp_path / "views.tar.gz", paths))
+
+    expected = (("moz-fx-data-shared-prod", "glean_app_derived", "events_daily_v1"),)
+    assert db_views == {
+        "glean_app": {"events_daily": expected},
+        "other": {"events": expected},
+    }
+    # equal references are shared, and missing datasets have no views
+    assert db_views["glean_app"]["events_daily"][0] is db_views["other"]["events"][0]
+    assert db_views["missing"] == {}
+
+
 def test_get_funnel_view(glean_apps, tmp_path):
     dest = tmp_path / "funnels.tar.gz"
     paths = {
@@ -0,0 +1,135 @@
+import pytest
+import yaml
+
+from generator.lookml import _read_namespaces
+from generator.namespaces_yaml import (
+    SafeDumper,
+    SafeLoader,
+    dump_namespaces,
+    load_namespaces,
+    read_index,
+    safe_load,
+    write_namespaces,
+)
+from generator.selection import Selection
+
+
+def get_tables(name):
+    return [
+        {"channel": "release", "table": f"mozdata.{name}.baseline"},
+        {"channel": "beta", "table": f"mozdata.{name}_beta.baseline"},
+    ]
+
+
+@pytest.fixture
+def namespaces():
+    return {
+        name: {
+            "pretty_name": f"{name.title()} App",
+            "glean_app": True,
+            "owners": ["owner@allizom.com"],
+            "views": {
+                "baseline": {"type": "glean_ping_view", "tables": get_tables(name)},
+                "baseline_table": {"type": "table_view", "tables": get_tables(name)},
+                "events": {"type": "ping_view", "tables": get_tables("events")},
+            },
+        }
+        for name in ("fenix", "focus-android", "firefox_desktop")
+    }
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="requires libyaml")
+def test_libyaml():
+    assert SafeLoader is yaml.CSafeLoader
+    assert SafeDumper is yaml.CSafeDumper
+
+
+def test_dump_namespaces(namespaces):
+    content, index = dump_namespaces(namespaces)
+    assert content == yaml.safe_dump(namespaces)
+    assert safe_load(content) == namespaces
+    assert list(index) == sorted(namespaces)
+    for name, (start, size) in index.items():
+        assert safe_load(content.encode()[start : start + size]) == {
+            name: namespaces[name]
+        }
+    assert dump_namespaces({}) == ("{}\n", {})
+
+
+def test_load_selected_namespaces(namespaces, tmp_path):
+    path = tmp_path / "namespaces.yaml"
+    content = write_namespaces(path, namespaces, index=True)
+    assert path.read_text() == content
+
+    index = read_index(path, content)
+    assert load_namespaces(content, index, ["fenix"]) == {"fenix": namespaces["fenix"]}
+    assert load_namespaces(content, index) == namespaces
+
+    with path.open() as f:
+        selected, read_content = _read_namespaces(f, Selection(["focus-*"]))
+    assert read_content == content
+    assert selected == {"focus-android": namespaces["focus-android"]}
+    with path.open() as f:
+        assert _read_namespaces(f)[0] == namespaces
+
+
+def test_stale_index(namespaces, tmp_path):
+    path = tmp_path / "namespaces.yaml"
+    write_namespaces(path, namespaces, index=True)
+    del namespaces["fenix"]
+    path.write_text(yaml.safe_dump(namespaces))
+    assert read_index(path, path.read_text()) is None
+
+    # edits that keep the size of the file move sections too
+    content = write_namespaces(path, namespaces, index=True)
+    edited = content.replace("focus-android", "focus-androie", 1)
+    assert len(edited) == len(content)
+    path.write_text(edited)
+    assert read_index(path, edited) is None
+
+    # writing without an index removes the old one
+    write_namespaces(path, namespaces, index=True)
+    write_namespaces(path, namespaces)
+    assert not (tmp_path / "namespaces.yaml.index").exists()
+
+
+def test_compact(namespaces, tmp_path):
+    content, index = dump_namespaces(namespaces, compact=True)
+    assert len(content) < len(yaml.safe_dump(namespaces))
+    assert content.count("tables: &") == 3
+    assert content.count("tables: *") == 3
+    assert safe_load(content) == namespaces
+    for name, (start, size) in index.items():
+        section = safe_load(content.encode()[start : start + size])
+        assert section == {name: namespaces[name]}
+
+    # loaded views share tables, which are written in full without compact
+    loaded = safe_load(content)
+    fenix_views = loaded["fenix"]["views"]
+    assert fenix_views["baseline"]["tables"] is fenix_views["baseline_table"]["tables"]
+    assert dump_namespaces(loaded)[0] == yaml.safe_dump(namespaces)
+    assert dump_namespaces(loaded, compact=True)[0] == content
+
+
+def test_compact_shared_values(namespaces):
+    # only tables are written with anchors, other values that are referenced
+    # more than once are repeated
+    owners = ["owner@allizom.com"]
+    for defn in namespaces.values():
+        defn["owners"] = owners
+        defn["views"]["baseline"]["owners"] = owners
+    content, index = dump_namespaces(namespaces, compact=True)
+    assert content.count("&") == 3
+    assert safe_load(content) == namespaces
+    for name, (start, size) in index.items():
+        section = safe_load(content.encode()[start : start + size])
+        assert section == {name: namespaces[name]}
+
+
+def test_compact_empty_tables(namespaces):
+    for defn in namespaces.values():
+        defn["views"]["baseline"]["tables"] = []
+        defn["views"]["baseline_table"]["tables"] = []
+    content, _ = dump_namespaces(namespaces, compact=True)
+    assert "&" not in content
+    assert safe_load(content) == namespaces
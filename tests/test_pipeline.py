@@ -0,0 +1,106 @@
+import importlib
+import tarfile
+from pathlib import Path
+from textwrap import dedent
+from unittest.mock import patch
+
+import yaml
+from click.testing import CliRunner
+from google.cloud.bigquery.schema import SchemaField
+
+from generator.lookml import lookml
+from generator.pipeline import all_command
+
+from .utils import get_mock_bq_client
+
+lookml_module = importlib.import_module("generator.lookml")
+namespaces_module = importlib.import_module("generator.namespaces")
+
+
+def write_inputs(tmp_path):
+    custom_namespaces = tmp_path / "custom-namespaces.yaml"
+    custom_namespaces.write_text(
+        dedent(
+            """
+            custom:
+              pretty_name: Custom
+              glean_app: false
+              views:
+                baseline:
+                  type: table_view
+                  tables:
+                  - table: mozdata.custom.baseline
+            """
+        )
+    )
+    disallowlist = tmp_path / "namespaces-disallowlist.yaml"
+    disallowlist.write_text("")
+    generated_sql = tmp_path / "generated-sql.tar.gz"
+    with tarfile.open(generated_sql, "w:gz"):
+        pass
+    return [
+        "--custom-namespaces",
+        str(custom_namespaces),
+        "--disallowlist",
+        str(disallowlist),
+        "--generated-sql-uri",
+        generated_sql.as_uri(),
+    ]
+
+
+def test_all(tmp_path, app_listings_uri):
+    args = write_inputs(tmp_path)
+    mock_bq_client = get_mock_bq_client([SchemaField("country", "STRING")])
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path), patch(
+        "google.cloud.bigquery.Client", return_value=mock_bq_client
+    ), patch.object(
+        namespaces_module,
+        "_get_glean_apps",
+        wraps=namespaces_module._get_glean_apps,
+    ) as get_glean_apps, patch.object(
+        lookml_module,
+        "_get_namespace_tasks",
+        wraps=lookml_module._get_namespace_tasks,
+    ) as get_namespace_tasks:
+        result = runner.invoke(
+            all_command,
+            [*args, "--app-listings-uri", app_listings_uri, "--target-dir", "out"],
+        )
+        assert result.exit_code == 0, result.output
+
+        content = Path("namespaces.yaml").read_text()
+        assert Path("out/namespaces.yaml").read_text() == content
+        assert (
+            "view: baseline" in Path("out/custom/views/baseline.view.lkml").read_text()
+        )
+
+    # app listings are only fetched by namespaces, and v1_name is passed on
+    get_glean_apps.assert_called_once()
+    assert yaml.safe_load(content)["glean-app"]["v1_name"] == "glean-app-release"
+    v1_names = {
+        call.args[2]: call.args[4] for call in get_namespace_tasks.call_args_list
+    }
+    assert v1_names == {"glean-app": "glean-app-release", "custom": None}
+
+
+def test_lookml_uses_persisted_v1_name(tmp_path):
+    namespaces = tmp_path / "namespaces.yaml"
+    namespaces.write_text(
+        yaml.safe_dump(
+            {"glean-app": {"glean_app": True, "v1_name": "glean-app-release"}}
+        )
+    )
+    runner = CliRunner()
+    with runner.isolated_filesystem(temp_dir=tmp_path), patch(
+        "google.cloud.bigquery.Client"
+    ), patch.object(
+        lookml_module, "_get_glean_apps", side_effect=AssertionError
+    ), patch.object(
+        lookml_module,
+        "_get_namespace_tasks",
+        wraps=lookml_module._get_namespace_tasks,
+    ) as get_namespace_tasks:
+        result = runner.invoke(lookml, ["--namespaces", str(namespaces)])
+        assert result.exit_code == 0, result.output
+    assert get_namespace_tasks.call_args.args[4] == "glean-app-release"
@@ -0,0 +1,140 @@
+import json
+import pstats
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from generator.profile import StackSampler, profile
+from generator.tracing import trace_option
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture
+def group():
+    @click.command()
+    @click.option("--seconds", type=float, default=0.05)
+    @trace_option
+    def busy(seconds):
+        _busy(seconds)
+        click.echo("done")
+
+    @click.command()
+    def threaded():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(_busy, [0.05, 0.05]))
+
+    @click.command()
+    def fail():
+        raise click.ClickException("failed")
+
+    return click.Group(
+        commands={"busy": busy, "threaded": threaded, "fail": fail, "profile": profile}
+    )
+
+
+def test_profile(group, tmp_path):
+    out_dir = tmp_path / "profile"
+    result = CliRunner(mix_stderr=False).invoke(
+        group,
+        ["profile", "--output-dir", str(out_dir), "busy", "--seconds", "0.1"],
+    )
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "done\n"
+    assert "ncalls" in result.stderr
+
+    stats = pstats.Stats(str(out_dir / "busy.pstats"))
+    assert any(name == "_busy" for _, _, name in stats.stats)  # type: ignore
+
+    lines = (out_dir / "busy.collapsed").read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any("_busy" in line for line in lines)
+
+
+def test_profile_threads(group, tmp_path):
+    out_dir = tmp_path / "profile"
+    result = CliRunner(mix_stderr=False).invoke(
+        group, ["profile", "--output-dir", str(out_dir), "threaded"]
+    )
+    assert result.exit_code == 0, result.stderr
+
+    # work in other threads is profiled and sampled
+    stats = pstats.Stats(str(out_dir / "threaded.pstats"))
+    [busy] = [v for k, v in stats.stats.items() if k[2] == "_busy"]  # type: ignore
+    assert busy[0] == 2
+    collapsed = (out_dir / "threaded.collapsed").read_text()
+    assert any("_worker" in line and "_busy" in line for line in collapsed.splitlines())
+
+
+def test_profile_failing_command(group, tmp_path):
+    out_dir = tmp_path / "profile"
+    result = CliRunner().invoke(
+        group, ["profile", "--output-dir", str(out_dir), "fail"]
+    )
+    assert result.exit_code == 1
+    assert "failed" in result.output
+    assert (out_dir / "fail.pstats").exists()
+
+
+def test_profile_unknown_command(group, tmp_path):
+    result = CliRunner().invoke(group, ["profile", "--output-dir", str(tmp_path), "x"])
+    assert result.exit_code == 2
+    assert "no command to profile named 'x'" in result.output
+
+
+def test_stack_sampler():
+    with StackSampler(0.001) as sampler:
+        _busy(0.05)
+    assert sum(sampler.stacks.values()) > 0
+    assert any(stack.split(";")[-1].startswith("_busy") for stack in sampler.stacks)
+
+
+def test_profile_metrics(group, tmp_path):
+    metrics = tmp_path / "metrics.prom"
+    result = CliRunner(mix_stderr=False).invoke(
+        group,
+        [
+            "profile",
+            "--output-dir",
+            str(tmp_path / "profile"),
+            "--metrics-textfile",
+            str(metrics),
+            "busy",
+        ],
+    )
+    assert result.exit_code == 0, result.stderr
+    assert 'lookml_generator_last_run_success{command="profile"} 1' in (
+        metrics.read_text()
+    )
+
+
+def test_profile_trace(group, tmp_path):
+    trace, inner_trace = tmp_path / "trace.json", tmp_path / "busy.json"
+    result = CliRunner(mix_stderr=False).invoke(
+        group,
+        [
+            "profile",
+            "--output-dir",
+            str(tmp_path / "profile"),
+            "--trace",
+            str(trace),
+            "busy",
+            "--trace",
+            str(inner_trace),
+        ],
+    )
+    assert result.exit_code == 0, result.stderr
+    # the profiled command's trace is recorded within the profile's
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert sorted(event["name"] for event in events) == ["busy", "profile"]
+    assert json.loads(inner_trace.read_text())["traceEvents"]
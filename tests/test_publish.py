@@ -0,0 +1,154 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from generator.archive import write_archive
+from generator.publish import _blob_id, _ls_tree, publish, publish_command
+
+
+def git(repo: Path, *args: str, input: bytes = None) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], input=input, check=True, capture_output=True
+    ).stdout.decode()
+
+
+@pytest.fixture(autouse=True)
+def git_identity(monkeypatch):
+    for role in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{role}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{role}_EMAIL", "test@example.com")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Get a bare repository with a base branch."""
+    repo = tmp_path / "looker-hub.git"
+    subprocess.run(["git", "init", "--bare", "-q", str(repo)], check=True)
+    readme = b"# looker-hub\n"
+    git(
+        repo,
+        "fast-import",
+        "--quiet",
+        input=b"".join(
+            [
+                b"commit refs/heads/base\n",
+                b"committer Test <test@example.com> 0 +0000\n",
+                b"data 4\nbase\n",
+                b"M 100644 inline README.md\n",
+                f"data {len(readme)}\n".encode() + readme + b"\n",
+                b"M 100644 inline shared/common.lkml\n",
+                b"data 7\ncommon\n\n",
+                b"\n",
+            ]
+        ),
+    )
+    return repo
+
+
+FILES = {
+    "namespaces.yaml": b"glean_app: {}\n",
+    "glean_app/views/baseline.view.lkml": b"view: baseline {}\n",
+    "glean_app/explores/baseline.explore.lkml": b"explore: baseline {}\n",
+}
+
+
+def publish_files(repo, files):
+    return publish(repo, files, "base", "main-nonprod", "Auto-push")
+
+
+def test_publish_creates_branch(repo):
+    commit = publish_files(repo, FILES)
+    assert git(repo, "rev-parse", "main-nonprod").strip() == commit
+    assert (
+        git(repo, "rev-parse", "main-nonprod^").strip()
+        == git(repo, "rev-parse", "base").strip()
+    )
+    assert git(repo, "log", "-1", "--format=%s", "main-nonprod").strip() == "Auto-push"
+
+    tree = _ls_tree(repo, commit)
+    assert sorted(tree) == sorted([*FILES, "README.md", "shared/common.lkml"])
+    for path, content in FILES.items():
+        assert git(repo, "show", f"main-nonprod:{path}").encode() == content
+        assert tree[path] == ("100644", _blob_id(content))
+
+
+def test_publish_unchanged(repo):
+    first = publish_files(repo, FILES)
+    assert publish_files(repo, FILES) is None
+    assert git(repo, "rev-parse", "main-nonprod").strip() == first
+
+
+def test_publish_nothing_generated(repo):
+    assert publish_files(repo, {}) is None
+    assert git(repo, "rev-parse", "main-nonprod") == git(repo, "rev-parse", "base")
+
+
+def test_publish_changes(repo):
+    first = publish_files(repo, FILES)
+    files = dict(FILES)
+    files["glean_app/views/baseline.view.lkml"] = b"view: baseline { }\n"
+    del files["glean_app/explores/baseline.explore.lkml"]
+    second = publish_files(repo, files)
+
+    assert git(repo, "rev-parse", "main-nonprod^").strip() == first
+    assert git(repo, "diff", "--name-status", first, second).splitlines() == [
+        "D\tglean_app/explores/baseline.explore.lkml",
+        "M\tglean_app/views/baseline.view.lkml",
+    ]
+    # unchanged files reuse the blobs of the previous commit
+    first_tree, second_tree = _ls_tree(repo, first), _ls_tree(repo, second)
+    assert first_tree["namespaces.yaml"] == second_tree["namespaces.yaml"]
+    assert first_tree["README.md"] == second_tree["README.md"]
+
+
+def test_publish_source_files_unmodified(repo):
+    files = {**FILES, "README.md": b"generated\n"}
+    with pytest.raises(Exception, match="modified files of base: \\['README.md'\\]"):
+        publish_files(repo, files)
+    assert git(repo, "branch", "--list", "main-nonprod") == ""
+
+    # files that match the source branch are fine
+    assert publish_files(repo, {**FILES, "README.md": b"# looker-hub\n"})
+
+
+def test_publish_leaves_working_tree(repo, tmp_path):
+    clone = tmp_path / "clone"
+    subprocess.run(
+        ["git", "clone", "-q", "-b", "base", str(repo), str(clone)], check=True
+    )
+    (clone / "untracked.txt").write_text("untracked")
+    commit = publish(clone, FILES, "base", "main-nonprod", "Auto-push")
+
+    assert git(clone, "rev-parse", "--abbrev-ref", "HEAD").strip() == "base"
+    assert git(clone, "status", "--porcelain") == "?? untracked.txt\n"
+    assert git(clone, "rev-parse", "main-nonprod").strip() == commit
+
+
+@pytest.mark.parametrize("source", ["target-dir", "archive"])
+def test_publish_command(repo, tmp_path, source):
+    generated = tmp_path / "generated"
+    for path, content in FILES.items():
+        (generated / path).parent.mkdir(parents=True, exist_ok=True)
+        (generated / path).write_bytes(content)
+    if source == "archive":
+        write_archive(generated, tmp_path / "lookml.tar.gz")
+        args = ["--archive", str(tmp_path / "lookml.tar.gz")]
+    else:
+        args = ["--target-dir", str(generated)]
+
+    runner = CliRunner()
+    result = runner.invoke(publish_command, ["--repo", str(repo), *args])
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == git(repo, "rev-parse", "main-nonprod").strip()
+
+    result = runner.invoke(publish_command, ["--repo", str(repo), *args])
+    assert result.exit_code == 0, result.output
+    assert result.output == "Nothing to commit\n"
+
+
+def test_publish_command_requires_one_source(repo, tmp_path):
+    result = CliRunner().invoke(publish_command, ["--repo", str(repo)])
+    assert result.exit_code == 2
+    assert "Exactly one of --target-dir or --archive" in result.output
@@ -0,0 +1,195 @@
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+import yaml
+from google.cloud.bigquery.schema import SchemaField
+
+from generator import tracing
+from generator.explores import explore
+from generator.lookml import _lookml
+from generator.scheduler import Task, run_tasks
+
+from .utils import get_mock_bq_client
+
+
+def test_run_tasks_dependencies():
+    finished = []
+    lock = threading.Lock()
+
+    def work(key, seconds):
+        def run():
+            time.sleep(seconds)
+            with lock:
+                finished.append(key)
+            return key.upper()
+
+        return run
+
+    tasks = [
+        Task("view_a", work("view_a", 0.05)),
+        Task("view_b", work("view_b", 0.01)),
+        Task("explore_a", work("explore_a", 0), ["view_a"]),
+        Task("explore_ab", work("explore_ab", 0), ["view_a", "view_b"]),
+        Task("explore_c", work("explore_c", 0), ["view_c"]),
+    ]
+    done = []
+    results = run_tasks(tasks, 4, lambda task, result: done.append(task.key))
+    assert results == {task.key: task.key.upper() for task in tasks}
+    assert finished.index("explore_a") > finished.index("view_a")
+    assert finished.index("explore_ab") > finished.index("view_a")
+    # explore_c's dependency isn't a task, so it doesn't wait for anything
+    assert finished.index("explore_c") < finished.index("view_a")
+    assert sorted(done) == sorted(results)
+
+
+def test_run_tasks_in_order_with_one_worker():
+    order = []
+    tasks = [
+        Task(i, lambda i=i: order.append(i), [i + 1] if i % 2 == 0 else [])
+        for i in range(6)
+    ]
+    run_tasks(tasks, 1)
+    assert order == [1, 0, 3, 2, 5, 4]
+
+
+def test_run_tasks_inline_with_one_worker():
+    threads = run_tasks([Task(i, threading.get_ident) for i in range(3)], 1)
+    assert set(threads.values()) == {threading.get_ident()}
+    with pytest.raises(ValueError, match="a"):
+        run_tasks([Task("a", Mock(side_effect=ValueError("a"))), Task("b", int)], 1)
+
+
+def test_run_tasks_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    tasks = [Task(i, barrier.wait) for i in range(3)]
+    assert len(run_tasks(tasks, 3)) == 3
+
+
+def test_run_tasks_error():
+    started = []
+
+    def fail(message, seconds=0):
+        def run():
+            started.append(message)
+            time.sleep(seconds)
+            raise ValueError(message)
+
+        return run
+
+    tasks = [
+        Task("a", fail("a", 0.05)),
+        Task("b", fail("b")),
+        Task("c", lambda: started.append("c"), ["b"]),
+    ]
+    # the error of the first failed task is raised, regardless of timing
+    with pytest.raises(ValueError, match="a"):
+        run_tasks(tasks, 2)
+    assert sorted(started) == ["a", "b"]
+
+
+def test_run_tasks_invalid():
+    with pytest.raises(ValueError, match="unique"):
+        run_tasks([Task("a", int), Task("a", int)], 1)
+    with pytest.raises(ValueError, match="circular"):
+        run_tasks([Task("a", int, ["b"]), Task("b", int, ["a"])], 1)
+
+
+@pytest.fixture
+def namespaces():
+    return {
+        f"namespace_{i}": {
+            "pretty_name": f"Namespace {i}",
+            "glean_app": False,
+            "views": {
+                view: {
+                    "type": "ping_view",
+                    "tables": [
+                        {"channel": "release", "table": f"mozdata.ns_{i}.{view}"},
+                        {"channel": "beta", "table": f"mozdata.ns_{i}_beta.{view}"},
+                    ],
+                }
+                for view in ("baseline", "metrics", "events")
+            },
+            "explores": {
+                view: {"type": "ping_explore", "views": {"base_view": view}}
+                for view in ("baseline", "metrics", "events")
+            },
+        }
+        for i in range(4)
+    }
+
+
+def test_lookml_deterministic(namespaces, tmp_path):
+    mock_bq_client = get_mock_bq_client(
+        [
+            SchemaField("client_id", "STRING"),
+            SchemaField("country", "STRING"),
+            SchemaField("submission_timestamp", "TIMESTAMP"),
+        ]
+    )
+    content = yaml.safe_dump(namespaces)
+    with patch("google.cloud.bigquery.Client", return_value=mock_bq_client):
+        _lookml(StringIO(content), [], tmp_path / "serial", workers=1)
+        _lookml(StringIO(content), [], tmp_path / "parallel", workers=8)
+
+    def tree(root: Path):
+        return {
+            str(p.relative_to(root)): p.read_text()
+            for p in root.rglob("*")
+            if p.is_file()
+        }
+
+    serial = tree(tmp_path / "serial")
+    assert len(serial) == 4 * 6 + 1
+    assert serial == tree(tmp_path / "parallel")
+    assert "submission_date" in serial["namespace_0/explores/baseline.explore.lkml"]
+
+
+def test_view_lookml_parsed_once(tmp_path):
+    views_path = tmp_path / "views"
+    views_path.mkdir()
+    path = views_path / "baseline.view.lkml"
+    path.write_text("view: baseline {}")
+
+    ping_explore = explore.Explore("baseline", {"base_view": "baseline"}, views_path)
+    with patch.object(explore.lkml, "load", wraps=explore.lkml.load) as load:
+        ping_explore.get_view_lookml("baseline")
+        ping_explore.get_view_lookml("baseline")
+        assert load.call_count == 1
+
+        # rewritten files are parsed again
+        path.write_text("view: baseline { sql_table_name: a.b ;; }")
+        lookml = ping_explore.get_view_lookml("baseline")
+        assert load.call_count == 2
+    assert lookml == {"views": [{"name": "baseline", "sql_table_name": "a.b"}]}
+
+    # explores get copies that they can't change for each other
+    lookml["views"].clear()
+    assert ping_explore.get_view_lookml("baseline")["views"]
+
+
+def test_namespace_spans_cover_generation(namespaces, tmp_path):
+    mock_bq_client = get_mock_bq_client([SchemaField("client_id", "STRING")])
+    ended = []
+
+    def listener(name, category, duration, attributes):
+        ended.append((name, attributes.get("namespace")))
+
+    tracing.add_listener(listener)
+    try:
+        with patch("google.cloud.bigquery.Client", return_value=mock_bq_client):
+            _lookml(StringIO(yaml.safe_dump(namespaces)), [], tmp_path, workers=4)
+    finally:
+        tracing.remove_listener(listener)
+
+    for namespace in namespaces:
+        end = ended.index(("generate_namespace", namespace))
+        writes = [
+            i for i, span in enumerate(ended) if span == ("write_lookml", namespace)
+        ]
+        assert len(writes) == 6
+        assert max(writes) < end
@@ -0,0 +1,100 @@
+from io import StringIO
+from unittest.mock import patch
+
+import click
+import pytest
+import yaml
+from google.cloud.bigquery.schema import SchemaField
+
+from generator.lookml import _lookml
+from generator.selection import Selection
+
+from .utils import get_mock_bq_client
+
+
+def test_selection():
+    selection = Selection(
+        ["fenix*", "firefox_desktop/views/metrics", "re:focus_.*/e.*"]
+    )
+    assert selection.includes_namespace("fenix")
+    assert selection.includes_namespace("firefox_desktop")
+    assert selection.includes_namespace("focus_android")
+    assert not selection.includes_namespace("firefox_ios")
+
+    assert selection.includes_all("fenix_nightly")
+    assert not selection.includes_all("firefox_desktop")
+    assert not selection.includes_all("focus_android")
+
+    assert selection.includes("fenix", "views", "baseline")
+    assert selection.includes("firefox_desktop", "views", "metrics")
+    assert not selection.includes("firefox_desktop", "views", "metrics_table")
+    assert not selection.includes("firefox_desktop", "explores", "metrics")
+    assert selection.includes("focus_android", "explores", "metrics")
+    assert not selection.includes("focus_android", "views", "metrics")
+
+
+@pytest.mark.parametrize("selector", ["a/b/c/d", "a//b", ""])
+def test_invalid_selector(selector):
+    with pytest.raises(click.BadParameter):
+        Selection([selector])
+
+
+def test_from_option():
+    assert Selection.from_option(()) is None
+    assert Selection.from_option(("fenix",)).includes_all("fenix")
+
+
+def test_merge():
+    existing = {
+        "a": {"pretty_name": "A", "views": {"x": 1, "y": 1}, "explores": {"x": 1}},
+        "b": {"views": {"x": 1}},
+        "c": {"views": {"x": 1}},
+    }
+    selected = {
+        "a": {"pretty_name": "New A", "views": {"x": 2, "z": 2}, "explores": {"x": 2}},
+        "d": {"views": {"x": 2}},
+    }
+    merged = Selection(["a/views", "b", "d/views/x"]).merge(existing, selected)
+    assert merged == {
+        # only selected views are replaced, and y is no longer generated
+        "a": {
+            "pretty_name": "A",
+            "views": {"x": 2, "z": 2},
+            "explores": {"x": 1},
+        },
+        # b is selected as a whole, and no longer generated
+        "c": {"views": {"x": 1}},
+        # d is new
+        "d": {"views": {"x": 2}},
+    }
+
+
+def test_lookml_select(tmp_path):
+    namespaces = {
+        namespace: {
+            "pretty_name": namespace,
+            "glean_app": False,
+            "views": {
+                view: {"type": "table_view", "tables": [{"table": f"a.b.{view}"}]}
+                for view in ("baseline", "metrics")
+            },
+        }
+        for namespace in ("fenix", "firefox_desktop")
+    }
+    mock_bq_client = get_mock_bq_client([SchemaField("country", "STRING")])
+    stale = tmp_path / "fenix" / "views" / "metrics.view.lkml"
+    stale.parent.mkdir(parents=True)
+    stale.write_text("stale")
+    with patch("google.cloud.bigquery.Client", return_value=mock_bq_client):
+        _lookml(
+            StringIO(yaml.safe_dump(namespaces)),
+            [],
+            tmp_path,
+            selection=Selection(["fenix/views/base*"]),
+        )
+
+    assert sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*.lkml")) == [
+        "fenix/views/baseline.view.lkml",
+        "fenix/views/metrics.view.lkml",
+    ]
+    assert stale.read_text() == "stale"
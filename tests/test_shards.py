@@ -0,0 +1,199 @@
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import click
+import pytest
+import yaml
+from click.testing import CliRunner
+from google.cloud.bigquery.schema import SchemaField
+
+from generator.lookml import _lookml, lookml
+from generator.selection import Selection
+from generator.shards import MANIFEST, SHARD, _namespace_cost, _partition, merge_shards
+
+from .utils import get_mock_bq_client
+
+
+def table_namespace(n_views: int) -> dict:
+    return {
+        "pretty_name": "Namespace",
+        "glean_app": False,
+        "views": {
+            f"view_{i}": {
+                "type": "table_view",
+                "tables": [{"table": f"mozdata.dataset.table_{i}"}],
+            }
+            for i in range(n_views)
+        },
+    }
+
+
+@pytest.fixture
+def namespaces():
+    return {f"namespace_{i}": table_namespace(i + 1) for i in range(7)}
+
+
+def test_shard_param():
+    assert SHARD.convert("2/4", None, None) == (2, 4)
+    for value in ("0/4", "5/4", "2", "a/b"):
+        with pytest.raises(click.BadParameter):
+            SHARD.convert(value, None, None)
+
+
+def test_namespace_cost():
+    assert _namespace_cost(table_namespace(3)) == 3
+    assert (
+        _namespace_cost(
+            {
+                "views": {
+                    "baseline": {
+                        "type": "glean_ping_view",
+                        "tables": [{"channel": "release"}, {"channel": "beta"}],
+                    }
+                },
+                "explores": {"baseline": {}},
+            }
+        )
+        == 21
+    )
+
+
+def test_partition(namespaces):
+    shards = _partition(namespaces, 3)
+    assert shards == _partition(dict(reversed(namespaces.items())), 3)
+    assert sorted(sum(shards, [])) == sorted(namespaces)
+    costs = [sum(_namespace_cost(namespaces[n]) for n in shard) for shard in shards]
+    # costs 1 to 7 sum to 28, which can't be split more evenly than this
+    assert sorted(costs) == [9, 9, 10]
+    assert _partition(namespaces, 10)[9] == []
+
+
+def test_sharded_lookml(namespaces, tmp_path):
+    namespaces_content = yaml.safe_dump(namespaces)
+    mock_bq_client = get_mock_bq_client([SchemaField("country", "STRING")])
+    with patch("google.cloud.bigquery.Client", return_value=mock_bq_client):
+        _lookml(StringIO(namespaces_content), [], tmp_path / "full")
+        for i in range(1, 4):
+            _lookml(StringIO(namespaces_content), [], tmp_path / f"shard_{i}", (i, 3))
+
+    shard_dirs = [tmp_path / f"shard_{i}" for i in range(1, 4)]
+    for shard_dir in shard_dirs:
+        manifest = yaml.safe_load((shard_dir / MANIFEST).read_text())
+        generated = {p.name for p in shard_dir.iterdir() if p.is_dir()}
+        assert set(manifest["namespaces"]) == generated
+        for name, files in manifest["namespaces"].items():
+            assert f"{name}/views/view_0.view.lkml" in files
+
+    runner = CliRunner()
+    merged = tmp_path / "merged"
+    result = runner.invoke(
+        merge_shards, ["--target-dir", str(merged), *map(str, shard_dirs)]
+    )
+    assert result.exit_code == 0, result.output
+
+    def tree(root: Path):
+        return {
+            str(p.relative_to(root)): p.read_text()
+            for p in root.rglob("*")
+            if p.is_file()
+        }
+
+    assert tree(merged) == tree(tmp_path / "full")
+
+    result = runner.invoke(
+        merge_shards, ["--target-dir", str(merged), *map(str, shard_dirs[:2])]
+    )
+    assert result.exit_code == 1
+    assert "missing shards [3]" in result.output
+
+    result = runner.invoke(
+        merge_shards,
+        ["--target-dir", str(merged), *map(str, shard_dirs), str(shard_dirs[0])],
+    )
+    assert result.exit_code == 1
+    assert "shard 1/3 is given twice" in result.output
+
+    [view, *_] = (shard_dirs[0]).glob("*/views/*.view.lkml")
+    view.unlink()
+    result = runner.invoke(
+        merge_shards, ["--target-dir", str(merged), *map(str, shard_dirs)]
+    )
+    assert result.exit_code == 1
+    assert "is missing files" in result.output
+
+
+def test_sharded_lookml_disallowlist(namespaces, tmp_path):
+    namespaces_path = tmp_path / "namespaces.yaml"
+    namespaces_path.write_text(yaml.safe_dump(namespaces))
+    disallowlist = tmp_path / "namespaces-disallowlist.yaml"
+    disallowlist.write_text("- namespace_0\n- namespace_6\n")
+    mock_bq_client = get_mock_bq_client([SchemaField("country", "STRING")])
+    runner = CliRunner()
+    shard_dirs = [tmp_path / f"shard_{i}" for i in range(1, 4)]
+    with patch("google.cloud.bigquery.Client", return_value=mock_bq_client):
+        for i, shard_dir in enumerate(shard_dirs, 1):
+            result = runner.invoke(
+                lookml,
+                [
+                    "--namespaces",
+                    str(namespaces_path),
+                    "--disallowlist",
+                    str(disallowlist),
+                    "--target-dir",
+                    str(shard_dir),
+                    "--shard",
+                    f"{i}/3",
+                ],
+            )
+            assert result.exit_code == 0, result.output
+
+    merged = tmp_path / "merged"
+    result = runner.invoke(
+        merge_shards, ["--target-dir", str(merged), *map(str, shard_dirs)]
+    )
+    assert result.exit_code == 0, result.output
+    expected = {f"namespace_{i}" for i in range(1, 6)}
+    assert {p.name for p in merged.iterdir() if p.is_dir()} == expected
+    assert set(yaml.safe_load((merged / "namespaces.yaml").read_text())) == expected
+
+
+def test_sharded_lookml_selection(namespaces, tmp_path):
+    namespaces_content = yaml.safe_dump(namespaces)
+    selection = Selection(["namespace_[1-3]", "namespace_5/views/view_0"])
+    mock_bq_client = get_mock_bq_client([SchemaField("country", "STRING")])
+    with patch("google.cloud.bigquery.Client", return_value=mock_bq_client):
+        _lookml(StringIO(namespaces_content), [], tmp_path / "full", None, selection)
+        for i in range(1, 4):
+            _lookml(
+                StringIO(namespaces_content),
+                [],
+                tmp_path / f"shard_{i}",
+                (i, 3),
+                selection,
+            )
+
+    shard_dirs = [tmp_path / f"shard_{i}" for i in range(1, 4)]
+    runner = CliRunner()
+    merged = tmp_path / "merged"
+    result = runner.invoke(
+        merge_shards, ["--target-dir", str(merged), *map(str, shard_dirs)]
+    )
+    assert result.exit_code == 0, result.output
+    assert sorted(str(p.relative_to(merged)) for p in merged.rglob("*.lkml")) == sorted(
+        str(p.relative_to(tmp_path / "full"))
+        for p in (tmp_path / "full").rglob("*.lkml")
+    )
+    assert (merged / "namespace_5/views/view_0.view.lkml").is_file()
+    assert not (merged / "namespace_5/views/view_1.view.lkml").exists()
+
+    # shards of different selections aren't merged
+    manifest = shard_dirs[0] / MANIFEST
+    manifest.write_text(
+        yaml.safe_dump({**yaml.safe_load(manifest.read_text()), "select": None})
+    )
+    result = runner.invoke(
+        merge_shards, ["--target-dir", str(merged), *map(str, shard_dirs)]
+    )
+    assert result.exit_code == 1
+    assert "different selections" in result.output
@@ -0,0 +1,104 @@
+import json
+
+import click
+import yaml
+from click.testing import CliRunner
+
+from generator import tracing
+from generator.spoke import update_spoke
+
+
+def test_span_without_tracing():
+    with tracing.span("work", table="a.b") as attrs:
+        attrs["bytes"] = 1
+    assert tracing._tracer is None
+
+
+def test_recording(tmp_path):
+    path = tmp_path / "trace.json"
+    with tracing.recording(path, "test"):
+        with tracing.span("outer", view="baseline"):
+            with tracing.span("inner", "io") as attrs:
+                attrs["bytes"] = 10
+    assert tracing._tracer is None
+
+    trace = json.loads(path.read_text())
+    events = {event["name"]: event for event in trace["traceEvents"]}
+    assert set(events) == {"test", "outer", "inner"}
+    assert events["test"]["cat"] == "command"
+    assert events["outer"]["args"] == {"view": "baseline"}
+    assert events["inner"]["args"] == {"bytes": 10}
+    assert events["inner"]["cat"] == "io"
+    assert all(event["ph"] == "X" for event in events.values())
+    # spans are nested in time
+    assert events["outer"]["ts"] <= events["inner"]["ts"]
+    assert (
+        events["inner"]["ts"] + events["inner"]["dur"]
+        <= events["outer"]["ts"] + events["outer"]["dur"]
+    )
+
+
+def test_recording_on_error(tmp_path):
+    path = tmp_path / "trace.json"
+    try:
+        with tracing.recording(path, "test"):
+            raise ValueError()
+    except ValueError:
+        pass
+    assert tracing._tracer is None
+    assert [e["name"] for e in json.loads(path.read_text())["traceEvents"]] == ["test"]
+
+
+def test_trace_option(tmp_path):
+    @click.command()
+    @click.option("--name")
+    @tracing.trace_option
+    def hello(name):
+        with tracing.span("greet", who=name):
+            click.echo(f"hello {name}")
+
+    runner = CliRunner()
+    result = runner.invoke(hello, ["--name", "world"])
+    assert result.exit_code == 0
+    assert result.output == "hello world\n"
+
+    path = tmp_path / "trace.json"
+    result = runner.invoke(hello, ["--name", "world", "--trace", str(path)])
+    assert result.exit_code == 0
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["greet", "hello"]
+
+
+def test_update_spoke_trace(tmp_path):
+    namespaces = tmp_path / "namespaces.yaml"
+    namespaces.write_text(
+        yaml.safe_dump(
+            {
+                "glean-app": {
+                    "pretty_name": "Glean App",
+                    "glean_app": True,
+                    "spoke": "looker-spoke-default",
+                    "views": {},
+                    "explores": {},
+                }
+            }
+        )
+    )
+    path = tmp_path / "trace.json"
+    result = CliRunner().invoke(
+        update_spoke,
+        [
+            "--namespaces",
+            str(namespaces),
+            "--spoke-dir",
+            str(tmp_path),
+            "--trace",
+            str(path),
+        ],
+        env={"LOOKER_API_CLIENT_ID": None},
+    )
+    assert result.exit_code == 0, result.output
+    events = json.loads(path.read_text())["traceEvents"]
+    [write] = [e for e in events if e["name"] == "write_lookml"]
+    assert write["args"]["path"].endswith("glean-app.model.lkml")
+    assert events[-1]["name"] == "update_spoke"